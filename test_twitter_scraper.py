@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты офлайн-частей скрапера (без браузера и MySQL) на сохраненном снимке
+twitter_html_cache/Cointelegraph_selenium.html.
+Запуск: python -m pytest -q
+"""
+
+import os
+import gzip
+import datetime
+
+import pytest
+
+from twitter_scraper_snapshot import parse_timeline_html, build_tweet_record, parse_timeline_file
+from twitter_scraper_utils import (
+    snowflake_to_datetime, snowflake_to_iso, parse_twitter_date, datetime_to_snowflake, filter_tweets_since
+)
+from twitter_scraper_state import cut_records_at_mark
+from twitter_scraper_known_tweets import build_bloom_filter, make_known_tweet_predicate
+
+FIXTURE_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "twitter_html_cache", "Cointelegraph_selenium.html")
+
+PINNED_ID = "1876437345844806076"
+FIRST_TIMELINE_ID = "1917670348117393526"
+
+
+@pytest.fixture(scope="module")
+def timeline():
+    with open(FIXTURE_HTML, "r", encoding="utf-8") as f:
+        return parse_timeline_html(f.read(), "Cointelegraph")
+
+
+def tweet_id_of(record):
+    return record["url"].rsplit("/", 1)[-1]
+
+
+# --- Разбор снимка HTML ---
+
+def test_parse_timeline_html_extracts_all_tweets(timeline):
+    ids = [tweet_id_of(tweet) for tweet in timeline]
+    assert len(ids) == 6
+    assert len(set(ids)) == len(ids)
+    assert ids[0] == PINNED_ID
+    assert ids[1] == FIRST_TIMELINE_ID
+
+
+def test_parse_timeline_html_fields(timeline):
+    pinned, first = timeline[0], timeline[1]
+    assert pinned["is_pinned"] and not first["is_pinned"]
+    assert pinned["stats"] == {"likes": 1985, "retweets": 595, "replies": 883}
+    assert first["url"] == f"https://x.com/Cointelegraph/status/{FIRST_TIMELINE_ID}"
+    assert first["created_at"] == "2025-04-30T20:00:14.000Z"
+    assert first["text"].startswith("⚡️ INSIGHT: Is Bitcoin Really a Hedge")
+    assert not any(tweet["is_retweet"] for tweet in timeline)
+
+
+def test_parse_timeline_html_empty_page():
+    assert parse_timeline_html("", "Cointelegraph") == []
+    assert parse_timeline_html("<html><body></body></html>", "Cointelegraph") == []
+
+
+def test_build_tweet_record_canonical_url():
+    record = build_tweet_record("123", "/Cointelegraph/status/123/photo/1?s=20", "text",
+                                "2025-04-30T20:00:14.000Z", {"likes": 1, "retweets": 0, "replies": 0})
+    assert record["url"] == "https://x.com/Cointelegraph/status/123"
+    assert record["is_retweet"] is False and record["original_author"] is None
+    assert record["is_truncated"] is False and record["is_pinned"] is False
+
+
+def test_build_tweet_record_retweet_and_pinned():
+    retweet = build_tweet_record("456", None, "text", "2025-04-30T20:00:14.000Z", {},
+                                 social_context="Cointelegraph reposted", author="bitcoin", is_truncated=True)
+    assert retweet["url"] == "https://x.com/bitcoin/status/456"
+    assert retweet["is_retweet"] is True and retweet["original_author"] == "bitcoin"
+    assert retweet["is_truncated"] is True
+
+    pinned = build_tweet_record("789", "/Cointelegraph/status/789", "text", "", {}, social_context="Pinned")
+    assert pinned["is_pinned"] is True and pinned["is_retweet"] is False
+
+
+# --- Отметка инкрементального сбора ---
+
+def test_cut_records_at_mark_without_mark(timeline):
+    records, reached = cut_records_at_mark(timeline, None, tweet_id_of)
+    assert records == timeline and reached is False
+
+
+def test_cut_records_at_mark_skips_pinned(timeline):
+    # Закрепленный твит старше отметки, но стоит вверху ленты и не останавливает разбор
+    mark = int("1917662790413590853")
+    records, reached = cut_records_at_mark(timeline, mark, tweet_id_of)
+    assert reached is True
+    assert [tweet_id_of(tweet) for tweet in records] == [PINNED_ID, FIRST_TIMELINE_ID, "1917670350248153197"]
+
+
+def test_cut_records_at_mark_ignores_retweets():
+    records = [
+        {"url": "https://x.com/a/status/300"},
+        {"url": "https://x.com/b/status/100", "is_retweet": True},
+        {"url": "https://x.com/a/status/250"},
+        {"url": "https://x.com/a/status/200"},
+    ]
+    cut, reached = cut_records_at_mark(records, 200, tweet_id_of)
+    assert reached is True
+    assert cut == records[:3]
+
+
+def test_cut_records_at_mark_not_reached(timeline):
+    records, reached = cut_records_at_mark(timeline, 1, tweet_id_of)
+    assert records == timeline and reached is False
+
+
+# --- Время публикации по ID твита ---
+
+def test_snowflake_to_datetime_matches_page_time():
+    dt = snowflake_to_datetime(FIRST_TIMELINE_ID)
+    assert dt.tzinfo is not None
+    assert dt.replace(microsecond=0) == datetime.datetime(2025, 4, 30, 20, 0, 14, tzinfo=datetime.timezone.utc)
+    assert snowflake_to_iso(FIRST_TIMELINE_ID).startswith("2025-04-30T20:00:14.")
+
+
+def test_snowflake_invalid_ids():
+    assert snowflake_to_datetime(None) is None
+    assert snowflake_to_datetime("abc") is None
+    assert snowflake_to_datetime(12345) is None
+    assert snowflake_to_iso("abc") == ""
+
+
+# --- Фильтр Блума ---
+
+def test_bloom_filter_has_no_false_negatives():
+    base = int(FIRST_TIMELINE_ID)
+    tweet_ids = [base + i * 4096 for i in range(5000)]
+    contains = build_bloom_filter(tweet_ids, fp_rate=0.01)
+    assert all(contains(tweet_id) for tweet_id in tweet_ids)
+    assert contains(str(tweet_ids[0]))
+
+
+def test_bloom_filter_false_positive_rate():
+    base = int(FIRST_TIMELINE_ID)
+    contains = build_bloom_filter([base + i * 4096 for i in range(5000)], fp_rate=0.01)
+    probes = [base + i * 4096 + 1 for i in range(20000)]
+    false_positives = sum(1 for tweet_id in probes if contains(tweet_id))
+    assert false_positives / len(probes) < 0.03
+
+
+def test_known_tweet_predicate():
+    mark = int(FIRST_TIMELINE_ID)
+    assert make_known_tweet_predicate(None, None) is None
+    is_known = make_known_tweet_predicate(mark, lambda tweet_id: int(tweet_id) == mark + 10)
+    assert is_known(str(mark)) and is_known(mark - 1) and is_known(mark + 10)
+    assert not is_known(mark + 1)
+
+
+# --- Разбор дат и граница окна ---
+
+def test_datetime_to_snowflake_is_lower_bound():
+    dt = snowflake_to_datetime(FIRST_TIMELINE_ID)
+    boundary_id = datetime_to_snowflake(dt)
+    assert boundary_id <= int(FIRST_TIMELINE_ID)
+    assert snowflake_to_datetime(boundary_id) == dt
+
+
+@pytest.mark.parametrize("date_str", [
+    "2025-04-30T20:00:14.000Z",
+    "2025-04-30T20:00:14Z",
+    "2025-04-30T20:00:14+00:00",
+    "Wed Apr 30 20:00:14 +0000 2025",
+    "2025-04-30 20:00:14 +0000",
+])
+def test_parse_twitter_date_formats(date_str):
+    expected = datetime.datetime(2025, 4, 30, 20, 0, 14, tzinfo=datetime.timezone.utc)
+    assert parse_twitter_date(date_str) == expected
+
+
+def test_parse_twitter_date_api_weekdays_starting_with_t():
+    # 'Tue'/'Thu' не должны приниматься за ISO-строку с "T"
+    assert parse_twitter_date("Tue Apr 29 08:15:00 +0000 2025") == \
+        datetime.datetime(2025, 4, 29, 8, 15, tzinfo=datetime.timezone.utc)
+    assert parse_twitter_date("Thu May 01 08:15:00 +0000 2025") == \
+        datetime.datetime(2025, 5, 1, 8, 15, tzinfo=datetime.timezone.utc)
+
+
+def test_parse_twitter_date_empty():
+    assert parse_twitter_date("") is None
+    assert parse_twitter_date(None) is None
+
+
+def test_filter_tweets_since(timeline):
+    cutoff = datetime.datetime(2025, 4, 30, 19, 15, tzinfo=datetime.timezone.utc)
+    recent = filter_tweets_since(timeline, cutoff)
+    assert [tweet_id_of(tweet) for tweet in recent] == [
+        FIRST_TIMELINE_ID, "1917670350248153197", "1917662790413590853"]
+
+
+def test_parse_timeline_file_reads_gzip_snapshot(tmp_path, timeline):
+    with open(FIXTURE_HTML, "rb") as f:
+        data = f.read()
+    archived = tmp_path / "Cointelegraph_20250430200000_0123456789abcdef.html.gz"
+    archived.write_bytes(gzip.compress(data))
+    assert parse_timeline_file(str(archived)) == timeline
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для постоянного (на диске) кэша ответов API твитов (cdn.syndication.twimg.com).
+Ключ - tweet_id, размер ограничен (вытеснение по давности использования - LRU).
+Неизменяемые поля (текст, created_at, автор) хранятся без ограничения по времени,
+счетчики (лайки, ретвиты, ответы) считаются свежими только API_CACHE_COUNTS_TTL секунд.
+Эндпоинт отдает только ответ целиком (отдельного запроса счетчиков нет), поэтому при
+устаревших счетчиках скрапер берет из кэша неизменяемые поля, а счетчики - с уже
+загруженной страницы ленты (get_cached_tweet_entry), не запрашивая твит повторно.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.api_cache')
+
+# Настройки кэша
+API_CACHE_FILE = os.path.join("twitter_cache", "api_tweets.sqlite3")
+API_CACHE_MAX_ENTRIES = 50000  # Максимальное количество твитов в кэше
+API_CACHE_COUNTS_TTL = 15 * 60  # Срок свежести счетчиков (сек); текст и дата не устаревают
+API_CACHE_EVICT_EVERY = 500  # Проверять размер кэша после каждых N записей
+
+_config = {
+    "path": API_CACHE_FILE,
+    "max_entries": API_CACHE_MAX_ENTRIES,
+    "counts_ttl": API_CACHE_COUNTS_TTL,
+    "enabled": True,
+}
+
+_connection = None
+_lock = threading.Lock()
+_writes_since_evict = 0
+_stats = {"hits": 0, "content_hits": 0, "stale_hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+
+
+def configure_api_cache(path=None, max_entries=None, counts_ttl=None, enabled=None):
+    """
+    Изменяет настройки кэша (вызывать до первого обращения)
+
+    Args:
+        path: Путь к файлу кэша
+        max_entries: Максимальное количество твитов
+        counts_ttl: Срок свежести счетчиков в секундах
+        enabled: Включить/выключить кэш
+    """
+    global _connection
+    with _lock:
+        if path is not None and path != _config["path"]:
+            if _connection is not None:
+                _connection.close()
+                _connection = None
+            _config["path"] = path
+        if max_entries is not None:
+            _config["max_entries"] = max_entries
+        if counts_ttl is not None:
+            _config["counts_ttl"] = counts_ttl
+        if enabled is not None:
+            _config["enabled"] = enabled
+
+
+def _get_connection():
+    """Открывает (один раз) файл кэша; вызывается под _lock"""
+    global _connection
+    if _connection is None:
+        cache_dir = os.path.dirname(_config["path"])
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        connection = sqlite3.connect(_config["path"], check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS api_tweets (
+                tweet_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_api_tweets_last_access ON api_tweets (last_access)")
+        connection.commit()
+        _connection = connection
+    return _connection
+
+
+def _read_entry(tweet_id):
+    """Читает запись кэша и отмечает обращение (LRU): (ответ API в JSON, fetched_at) или None; вызывается под _lock"""
+    connection = _get_connection()
+    row = connection.execute(
+        "SELECT payload, fetched_at FROM api_tweets WHERE tweet_id = ?", (tweet_id,)
+    ).fetchone()
+    if row is not None:
+        connection.execute("UPDATE api_tweets SET last_access = ? WHERE tweet_id = ?", (time.time(), tweet_id))
+        connection.commit()
+    return row
+
+
+def get_cached_tweet(tweet_id, require_fresh_counts=True, record_stats=True):
+    """
+    Возвращает сохраненный ответ API для твита
+
+    Args:
+        tweet_id: ID твита
+        require_fresh_counts: Нужны ли свежие счетчики; если False, подходит
+                              запись любого возраста (нужны только текст, дата и т.п.)
+        record_stats: Учитывать ли обращение в статистике попаданий
+
+    Returns:
+        dict: Ответ API или None (нет в кэше или счетчики устарели)
+    """
+    if not _config["enabled"]:
+        return None
+    tweet_id = str(tweet_id)
+    try:
+        with _lock:
+            row = _read_entry(tweet_id)
+            if row is None:
+                if record_stats:
+                    _stats["misses"] += 1
+                return None
+
+            payload, fetched_at = row
+            if require_fresh_counts and time.time() - fetched_at > _config["counts_ttl"]:
+                if record_stats:
+                    _stats["stale_hits"] += 1
+                return None
+
+            if record_stats:
+                _stats["hits"] += 1
+        return json.loads(payload)
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning("Ошибка чтения кэша API для твита %s: %s", tweet_id, e)
+        return None
+
+
+def get_cached_tweet_entry(tweet_id, accept_stale=True):
+    """
+    Возвращает сохраненный ответ API вместе с признаком свежести счетчиков.
+    Запись с устаревшими счетчиками тоже возвращается: текст, дата и автор в ней верны
+
+    Args:
+        tweet_id: ID твита
+        accept_stale: Возвращать ли запись с устаревшими счетчиками (False - как промах)
+
+    Returns:
+        tuple: (ответ API или None, свежие ли счетчики)
+    """
+    if not _config["enabled"]:
+        return None, False
+    tweet_id = str(tweet_id)
+    try:
+        with _lock:
+            row = _read_entry(tweet_id)
+            if row is None:
+                _stats["misses"] += 1
+                return None, False
+            payload, fetched_at = row
+            counts_fresh = time.time() - fetched_at <= _config["counts_ttl"]
+            if not counts_fresh and not accept_stale:
+                _stats["stale_hits"] += 1
+                return None, False
+            _stats["hits" if counts_fresh else "content_hits"] += 1
+        return json.loads(payload), counts_fresh
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning("Ошибка чтения кэша API для твита %s: %s", tweet_id, e)
+        return None, False
+
+
+def get_stale_cached_tweet(tweet_id):
+    """Возвращает сохраненный ответ API независимо от возраста (резерв при ошибке сети)"""
+    return get_cached_tweet(tweet_id, require_fresh_counts=False, record_stats=False)
+
+
+def store_cached_tweet(tweet_id, payload):
+    """
+    Сохраняет ответ API в кэш (с вытеснением самых давно использованных записей)
+
+    Args:
+        tweet_id: ID твита
+        payload: Ответ API (dict)
+    """
+    global _writes_since_evict
+    if not _config["enabled"] or not payload:
+        return
+    tweet_id = str(tweet_id)
+    now = time.time()
+    try:
+        with _lock:
+            connection = _get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO api_tweets (tweet_id, payload, fetched_at, last_access) VALUES (?, ?, ?, ?)",
+                (tweet_id, json.dumps(payload, ensure_ascii=False), now, now)
+            )
+            _stats["stores"] += 1
+            _writes_since_evict += 1
+            if _writes_since_evict >= API_CACHE_EVICT_EVERY:
+                _writes_since_evict = 0
+                _evict(connection)
+            connection.commit()
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        logger.warning("Ошибка записи в кэш API для твита %s: %s", tweet_id, e)
+
+
+def _evict(connection):
+    """Удаляет самые давно использованные записи сверх max_entries; вызывается под _lock"""
+    count = connection.execute("SELECT COUNT(*) FROM api_tweets").fetchone()[0]
+    excess = count - _config["max_entries"]
+    if excess > 0:
+        connection.execute(
+            "DELETE FROM api_tweets WHERE tweet_id IN "
+            "(SELECT tweet_id FROM api_tweets ORDER BY last_access LIMIT ?)", (excess,)
+        )
+        _stats["evicted"] += excess
+        logger.info("Из кэша API вытеснено %s записей", excess)
+
+
+def get_api_cache_stats():
+    """
+    Возвращает статистику кэша для подбора размера и TTL
+
+    Returns:
+        dict: hits, content_hits (неизменяемые поля из кэша, счетчики со страницы), stale_hits,
+              misses, stores, evicted, entries и hit_ratio
+    """
+    with _lock:
+        stats = dict(_stats)
+        try:
+            stats["entries"] = _get_connection().execute("SELECT COUNT(*) FROM api_tweets").fetchone()[0]
+        except sqlite3.Error:
+            stats["entries"] = None
+    lookups = stats["hits"] + stats["content_hits"] + stats["stale_hits"] + stats["misses"]
+    stats["hit_ratio"] = (stats["hits"] + stats["content_hits"]) / lookups if lookups else 0.0
+    return stats
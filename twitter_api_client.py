@@ -7,22 +7,104 @@
 import json
 import time
 import logging
+import threading
 import requests
 import re
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from twitter_api_cache import get_cached_tweet, get_cached_tweet_entry, get_stale_cached_tweet, store_cached_tweet
 
 logger = logging.getLogger('twitter_scraper.api')
 
+# Параллельные запросы к API: общий пул потоков и общая keep-alive сессия
+API_MAX_WORKERS = 8
+API_TIMEOUT = 15
+
+API_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.5' # Предпочитаем английский язык
+}
+
+_session = None
+_executor = None
+_init_lock = threading.Lock()
+
+# Статистика запросов к API (для оценки задержек)
+_timing_lock = threading.Lock()
+_timing_stats = {"requests": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0}
+
+
+def get_api_session():
+    """Возвращает общую сессию requests с пулом keep-alive соединений"""
+    global _session
+    if _session is None:
+        with _init_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=API_MAX_WORKERS)
+                session.mount('https://', adapter)
+                session.headers.update(API_HEADERS)
+                _session = session
+    return _session
+
+
+def _get_executor():
+    """Возвращает общий пул потоков для запросов к API"""
+    global _executor
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS, thread_name_prefix='twitter-api')
+    return _executor
+
+
+def _record_timing(elapsed, failed=False):
+    """Учитывает время одного запроса к API"""
+    with _timing_lock:
+        _timing_stats["requests"] += 1
+        _timing_stats["total_time"] += elapsed
+        _timing_stats["max_time"] = max(_timing_stats["max_time"], elapsed)
+        if failed:
+            _timing_stats["errors"] += 1
 
-def get_tweet_by_id(tweet_id):
+
+def get_api_timing_stats():
+    """
+    Возвращает статистику запросов к API
+
+    Returns:
+        dict: requests, errors, avg_time и max_time (в секундах)
+    """
+    with _timing_lock:
+        stats = dict(_timing_stats)
+    stats["avg_time"] = stats["total_time"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
+
+
+def get_tweet_by_id(tweet_id, use_cache=True, require_fresh_counts=True, cache_checked=False):
     """
     Получает полные данные твита по его ID через API
+    (сначала проверяется постоянный кэш twitter_api_cache)
 
     Args:
         tweet_id: ID твита
+        use_cache: Использовать ли кэш ответов API
+        require_fresh_counts: Нужны ли свежие счетчики; False - подойдет запись
+                              из кэша любого возраста (текст и дата не меняются)
+        cache_checked: Кэш уже проверен вызывающим (get_cached_tweet_content) - сразу запрос к API
 
     Returns:
         dict: Полные данные твита или None в случае ошибки
     """
+    if use_cache and not cache_checked:
+        cached = get_cached_tweet(tweet_id, require_fresh_counts=require_fresh_counts)
+        if cached:
+            logger.debug("Данные твита %s взяты из кэша API", tweet_id)
+            return cached
+
+    started = time.perf_counter()
     try:
         # Формируем URL для API запроса
         # Используем альтернативный эндпоинт, который может быть стабильнее
@@ -31,30 +113,81 @@ def get_tweet_by_id(tweet_id):
         # api_url = f"https://api.twitter.com/2/tweets/{tweet_id}?tweet.fields=created_at,public_metrics,entities&expansions=author_id"
         # (Но для последнего нужна авторизация)
 
-        logger.debug(f"Запрос к API: {api_url}")
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.5' # Предпочитаем английский язык
-        }
+        logger.debug("Запрос к API: %s", api_url)
 
-        response = requests.get(api_url, headers=headers, timeout=15) # Увеличен таймаут
+        # Общая сессия с keep-alive соединениями вместо нового соединения на каждый запрос
+        response = get_api_session().get(api_url, timeout=API_TIMEOUT)
         response.raise_for_status() # Проверяем на HTTP ошибки
 
         tweet_data = response.json()
-        logger.info(f"Успешно получены данные твита {tweet_id} через API")
+        elapsed = time.perf_counter() - started
+        _record_timing(elapsed)
+        logger.info("Успешно получены данные твита %s через API за %.0f мс", tweet_id, elapsed * 1000)
+        if use_cache:
+            store_cached_tweet(tweet_id, tweet_data)
         return tweet_data
 
     except requests.exceptions.RequestException as e:
-        logger.warning(f"Ошибка сети при запросе твита {tweet_id} через API: {e}")
+        _record_timing(time.perf_counter() - started, failed=True)
+        logger.warning("Ошибка сети при запросе твита %s через API: %s", tweet_id, e)
+        # Резерв: устаревшая запись кэша (текст и дата верны, счетчики могут отставать)
+        if use_cache:
+            stale = get_stale_cached_tweet(tweet_id)
+            if stale:
+                logger.info("Используем устаревшие данные твита %s из кэша API", tweet_id)
+                return stale
         return None
     except json.JSONDecodeError as e:
-         logger.warning(f"Ошибка декодирования JSON от API для твита {tweet_id}: {e}")
+         _record_timing(time.perf_counter() - started, failed=True)
+         logger.warning("Ошибка декодирования JSON от API для твита %s: %s", tweet_id, e)
          return None
     except Exception as e:
-        logger.error(f"Непредвиденная ошибка при запросе твита {tweet_id} через API: {e}")
+        logger.error("Непредвиденная ошибка при запросе твита %s через API: %s", tweet_id, e)
+        return None
+
+
+def submit_tweet_fetch(tweet_id, require_fresh_counts=True, cache_checked=False):
+    """
+    Запускает получение твита через API в общем пуле потоков, не дожидаясь ответа
+
+    Args:
+        tweet_id: ID твита
+        require_fresh_counts: Передается в get_tweet_by_id
+        cache_checked: Передается в get_tweet_by_id
+
+    Returns:
+        Future: Результат get_tweet_by_id (dict или None)
+    """
+    return _get_executor().submit(get_tweet_by_id, tweet_id, require_fresh_counts=require_fresh_counts,
+                                  cache_checked=cache_checked)
+
+
+def get_cached_tweet_content(tweet_id, tweet_url, page_stats=None):
+    """
+    Собирает твит из кэша API без запроса: текст, дата, автор и признак ретвита - из сохраненного
+    ответа, счетчики - из него же, если они свежие, иначе со страницы (page_stats).
+    Запроса только за счетчиками у эндпоинта нет, поэтому твит запрашивается заново,
+    только если его нет в кэше или счетчиков нет и на странице.
+
+    Args:
+        tweet_id: ID твита
+        tweet_url: URL твита
+        page_stats: Счетчики, извлеченные со страницы ({"likes", "retweets", "replies"}) или None
+
+    Returns:
+        dict: Данные твита в формате скрипта или None (нужен запрос к API)
+    """
+    # Все нули - скорее всего, счетчики со страницы не разобраны
+    has_page_stats = bool(page_stats) and any(page_stats.values())
+    payload, counts_fresh = get_cached_tweet_entry(tweet_id, accept_stale=has_page_stats)
+    if payload is None:
+        return None
+    tweet_data = process_api_tweet_data(payload, tweet_url)
+    if not tweet_data or not tweet_data.get("text"):
         return None
+    if not counts_fresh:
+        tweet_data["stats"] = dict(page_stats)
+    return tweet_data
 
 
 def process_api_tweet_data(api_data, tweet_url):
@@ -136,5 +269,5 @@ def process_api_tweet_data(api_data, tweet_url):
 
         return tweet_data
     except Exception as e:
-        logger.error(f"Ошибка при обработке данных API для твита {tweet_url}: {e}")
+        logger.error("Ошибка при обработке данных API для твита %s: %s", tweet_url, e)
         return None
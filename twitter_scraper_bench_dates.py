@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Микробенчмарк разбора дат и фильтрации твитов по окну на корпусе из 100 000 меток времени:
+прежние parse_twitter_date/filter_recent_tweets (копия ниже, без отладочного вывода)
+против быстрого пути, LRU-кэша (строки API повторяются в каждом цикле) и filter_tweets_since.
+
+Пример: python twitter_scraper_bench_dates.py --count 100000 --repeat 3
+"""
+
+import time
+import random
+import argparse
+import datetime
+
+from twitter_scraper_utils import (
+    parse_twitter_date, filter_tweets_since, snowflake_to_datetime, _parse_twitter_date_cached,
+    TWITTER_EPOCH_MS, SNOWFLAKE_TIMESTAMP_SHIFT, PARSE_DATE_CACHE_SIZE
+)
+from twitter_scraper_snapshot import extract_tweet_id
+
+
+def legacy_parse_twitter_date(date_str):
+    """Прежняя parse_twitter_date (без debug_print)"""
+    if not date_str:
+        return None
+    try:
+        if "Z" in date_str:
+            return datetime.datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        if "T" in date_str and ('+' in date_str or '-' in date_str.split('T')[1]):
+            return datetime.datetime.fromisoformat(date_str)
+        formats = ["%a %b %d %H:%M:%S %z %Y", "%Y-%m-%d %H:%M:%S %z", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"]
+        for fmt in formats:
+            try:
+                dt = datetime.datetime.strptime(date_str, fmt)
+                if dt.tzinfo is None:
+                    dt = dt.replace(tzinfo=datetime.timezone.utc)
+                return dt
+            except ValueError:
+                continue
+    except Exception:
+        pass
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def legacy_filter_recent_tweets(tweets, hours=24):
+    """Прежняя filter_recent_tweets: datetime для каждого твита (без отладочного вывода)"""
+    cutoff_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=hours)
+    recent_tweets = []
+    for tweet in tweets:
+        tweet_time = snowflake_to_datetime(extract_tweet_id(tweet.get("url")))
+        if tweet_time is None and tweet.get("created_at"):
+            tweet_time = legacy_parse_twitter_date(tweet["created_at"])
+        if tweet_time and tweet_time >= cutoff_time:
+            recent_tweets.append(tweet)
+    return recent_tweets
+
+
+def build_corpus(count, seed=1):
+    """Твиты за последние 48 часов: ID (snowflake) и created_at в основном формате"""
+    rng = random.Random(seed)
+    now_ms = int(time.time() * 1000)
+    tweets = []
+    for _ in range(count):
+        timestamp_ms = now_ms - rng.randrange(48 * 3600 * 1000)
+        tweet_id = ((timestamp_ms - TWITTER_EPOCH_MS) << SNOWFLAKE_TIMESTAMP_SHIFT) | rng.randrange(1 << 22)
+        created_at = datetime.datetime.fromtimestamp(timestamp_ms / 1000, tz=datetime.timezone.utc)
+        tweets.append({
+            "url": f"https://x.com/user/status/{tweet_id}",
+            "created_at": created_at.strftime('%Y-%m-%dT%H:%M:%S.') + f"{timestamp_ms % 1000:03d}Z",
+        })
+    return tweets
+
+
+def _best_of(repeat, function):
+    """Лучшее время из repeat запусков (сек)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарк parse_twitter_date и filter_recent_tweets")
+    parser.add_argument("--count", type=int, default=100000, help="Количество меток времени")
+    parser.add_argument("--repeat", type=int, default=3, help="Количество повторов (берется лучшее время)")
+    args = parser.parse_args()
+
+    tweets = build_corpus(args.count)
+    dates = [tweet["created_at"] for tweet in tweets]
+    text_only = [{"created_at": date} for date in dates]  # Без URL: время только из строки
+    # Формат created_at ответов API; в цикле сбора одни и те же твиты разбираются повторно
+    api_dates = [legacy_parse_twitter_date(date).strftime("%a %b %d %H:%M:%S +0000 %Y")
+                 for date in dates[:PARSE_DATE_CACHE_SIZE]]
+
+    assert [legacy_parse_twitter_date(d) for d in dates[:1000]] == [parse_twitter_date(d) for d in dates[:1000]]
+    # Прежняя версия принимала 'Tue ...'/'Thu ...' за ISO и возвращала текущее время
+    assert [datetime.datetime.strptime(d, "%a %b %d %H:%M:%S %z %Y") for d in api_dates[:1000]] == \
+        [parse_twitter_date(d) for d in api_dates[:1000]]
+
+    def parse_all(values):
+        for value in values:
+            parse_twitter_date(value)
+
+    def parse_cold(values):
+        _parse_twitter_date_cached.cache_clear()
+        parse_all(values)
+
+    cutoff_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=24)
+    parse_all(api_dates)
+    results = [
+        ("'...T...Z': прежняя parse_twitter_date", _best_of(args.repeat, lambda: [legacy_parse_twitter_date(d) for d in dates])),
+        ("'...T...Z': parse_twitter_date (быстрый путь)", _best_of(args.repeat, lambda: parse_all(dates))),
+        ("формат API: прежняя parse_twitter_date",
+         _best_of(args.repeat, lambda: [legacy_parse_twitter_date(d) for d in api_dates])),
+        ("формат API: parse_twitter_date (пустой кэш)", _best_of(1, lambda: parse_cold(api_dates))),
+        ("формат API: parse_twitter_date (повторный разбор)", _best_of(args.repeat, lambda: parse_all(api_dates))),
+        ("фильтр по окну, твиты с ID: прежний", _best_of(args.repeat, lambda: legacy_filter_recent_tweets(tweets))),
+        ("фильтр по окну, твиты с ID: filter_tweets_since",
+         _best_of(args.repeat, lambda: filter_tweets_since(tweets, cutoff_time))),
+        ("фильтр по окну, только created_at: прежний",
+         _best_of(args.repeat, lambda: legacy_filter_recent_tweets(text_only))),
+        ("фильтр по окну, только created_at: filter_tweets_since",
+         _best_of(args.repeat, lambda: filter_tweets_since(text_only, cutoff_time))),
+    ]
+
+    print(f"Корпус: {args.count} меток времени ({len(api_dates)} в формате API), лучшее из {args.repeat}")
+    for label, elapsed in results:
+        size = len(api_dates) if label.startswith("формат API") else args.count
+        print(f"{label:<60} {elapsed * 1000:8.1f} мс  ({elapsed / size * 1e9:6.0f} нс/шт.)")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,13 +15,30 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='twitter_scraper.log',
-    filemode='a'
+from twitter_scraper_pool import process_accounts_parallel, start_browser_workers, stop_browser_workers
+from twitter_api_cache import get_api_cache_stats
+from twitter_api_client import get_api_timing_stats
+from twitter_scraper_tweets import get_page_timing_stats
+from twitter_scraper_db import init_connection_pool, get_pooled_connection, estimate_pool_size
+from twitter_scraper_user_cache import warm_user_cache
+from twitter_scraper_html_archive import stop_html_archiver
+from twitter_scraper_refresh import (
+    start_refresh_workers, stop_refresh_workers, serve_accounts_stale_while_revalidate, get_refresh_stats
 )
+from twitter_scraper_db_writer import (
+    start_db_writer, stop_db_writer, flush_db_writer, enqueue_account_tweets, get_db_writer_stats
+)
+from twitter_scraper_spool import append_to_spool, replay_spool, close_spool, get_spool_size
+from twitter_scraper_stats_history import maintain_stats_history
+from twitter_scraper_stats import (
+    start_exact_statistics, stop_exact_statistics, get_daily_tweet_counts, get_user_tweet_counts
+)
+from twitter_scraper_logging import setup_logging, stop_logging, install_debug_toggle_signal
+
+# Настройка логирования (в main): запись в файл выполняет фоновый поток (twitter_scraper_logging)
+LOG_FILE = 'twitter_scraper.log'
+DEBUG_LOGGING = False  # Отладочные сообщения в консоль и лог; во время работы переключаются сигналом SIGUSR1
+LOG_MODULE_LEVELS = {}  # Уровни отдельных модулей, например {'twitter_scraper.tweets': logging.WARNING}
 logger = logging.getLogger('twitter_scraper')
 
 # Настройки
@@ -32,11 +49,6 @@ ARTICLE_CACHE_DIR = "twitter_article_cache"
 LINKS_CACHE_DIR = "twitter_links_cache"
 HTML_CACHE_DIR = "twitter_html_cache"  # Директория для временных HTML
 
-# Создаем директории
-for directory in [CACHE_DIR, IMAGES_DIR, ARTICLE_CACHE_DIR, LINKS_CACHE_DIR, HTML_CACHE_DIR]:
-    os.makedirs(directory, exist_ok=True)
-    logger.info(f"Создана директория: {directory}")
-
 # Настройки подключения к MySQL
 MYSQL_CONFIG = {
     'host': '217.154.19.224',
@@ -57,10 +69,10 @@ def initialize_dependencies():
     try:
         # Импортируем базовые утилиты
         from twitter_scraper_utils import (
-            debug_print, initialize_mysql, save_user_to_db, save_tweet_to_db,
+            debug_print, initialize_mysql, save_user_to_db, save_tweet_to_db, save_tweets_to_db,
             parse_twitter_date, filter_recent_tweets, format_time_ago,
-            initialize_browser, manual_auth_with_prompt, download_image,
-            extract_tweet_stats, extract_images_from_tweet, extract_retweet_info
+            initialize_browser, manual_auth_with_prompt,
+            extract_tweet_stats, extract_retweet_info
         )
 
         # Добавляем в словарь
@@ -69,10 +81,8 @@ def initialize_dependencies():
                 dependencies[func_name] = func
 
         # Импортируем расширенные утилиты
-        from twitter_scraper_enhanced_utils import (
-            process_article_from_tweet, is_tweet_truncated, get_full_tweet_text,
-            extract_all_links_from_tweet, save_links_to_db, extract_retweet_info_enhanced
-        )
+        from twitter_scraper_enhanced_utils import extract_retweet_info_enhanced
+        from twitter_scraper_links_utils import is_tweet_truncated, get_full_tweet_text
 
         # Добавляем в словарь
         for func_name, func in locals().items():
@@ -96,7 +106,7 @@ def initialize_dependencies():
         return dependencies
 
     except ImportError as e:
-        logger.error(f"ОШИБКА: Не удалось импортировать функции: {e}")
+        logger.error("ОШИБКА: Не удалось импортировать функции: %s", e)
         logger.error("Убедитесь, что все необходимые файлы находятся в той же директории")
         sys.exit(1)
 
@@ -125,14 +135,14 @@ def load_accounts_from_file(filename="influencer_twitter.txt"):
                 if username:
                     accounts.append(username)
 
-        logger.info(f"Загружено {len(accounts)} аккаунтов из файла {filename}")
+        logger.info("Загружено %s аккаунтов из файла %s", len(accounts), filename)
         return accounts
 
     except FileNotFoundError:
-        logger.warning(f"Файл {filename} не найден. Создайте файл и добавьте в него Twitter-аккаунты.")
+        logger.warning("Файл %s не найден. Создайте файл и добавьте в него Twitter-аккаунты.", filename)
         return []
     except Exception as e:
-        logger.error(f"Ошибка при чтении файла {filename}: {e}")
+        logger.error("Ошибка при чтении файла %s: %s", filename, e)
         return []
 
 
@@ -140,19 +150,24 @@ def main():
     """
     Основная функция скрапера
     """
-    print("\n=== ЗАПУСК СКРИПТА ПО СБОРУ ТВИТОВ ===\n")
-    logger.info("Запуск скрипта по сбору твитов")
+    setup_logging(LOG_FILE, level=logging.INFO, module_levels=LOG_MODULE_LEVELS, debug=DEBUG_LOGGING)
+    logger.info("=== ЗАПУСК СКРИПТА ПО СБОРУ ТВИТОВ ===")
+    if install_debug_toggle_signal():
+        logger.info("Отладочные сообщения переключаются командой: kill -USR1 %s", os.getpid())
+
+    # Создаем директории
+    for directory in [CACHE_DIR, IMAGES_DIR, ARTICLE_CACHE_DIR, LINKS_CACHE_DIR, HTML_CACHE_DIR]:
+        os.makedirs(directory, exist_ok=True)
+        logger.debug("Директория: %s", directory)
 
     # Импортируем зависимости
     deps = initialize_dependencies()
 
     # Напоминание о необходимости заполнить путь к профилю Chrome
     if not CHROME_PROFILE_PATH:
-        print("ПРИМЕЧАНИЕ: Вы не указали путь к профилю Chrome. Будет использован временный профиль.")
-        logger.warning("Путь к профилю Chrome не указан, используется временный профиль")
+        logger.warning("ПРИМЕЧАНИЕ: Вы не указали путь к профилю Chrome. Будет использован временный профиль.")
     else:
-        print(f"Используется профиль Chrome: {CHROME_PROFILE_PATH}")
-        logger.info(f"Используется профиль Chrome: {CHROME_PROFILE_PATH}")
+        logger.info("Используется профиль Chrome: %s", CHROME_PROFILE_PATH)
 
     # Параметры для настройки
     HOURS_FILTER = 24  # Фильтр по времени публикации (в часах)
@@ -162,48 +177,108 @@ def main():
     EXTRACT_ARTICLES = True  # Извлекать полные статьи из твитов
     EXTRACT_FULL_TWEETS = True  # Извлекать полный текст длинных твитов
     EXTRACT_LINKS = True  # Извлекать все ссылки из твитов
+    EXTRACTION_MODE = "snapshot"  # Способ извлечения: "snapshot", "js", "graphql" (перехват ответов) или "selenium"
+    INCREMENTAL = True  # Останавливать скроллинг на твитах, обработанных в прошлом цикле
+    REFRESH_PAST_MARK = False  # Листать за отметку INCREMENTAL до конца окна, обновляя только счетчики
+    BROWSER_WORKERS = 4  # Количество параллельных браузеров Chrome (1 - последовательная обработка)
+    LIGHTWEIGHT_BROWSER = True  # Не загружать изображения, видео, шрифты и сторонние ресурсы
+    HEADLESS = False  # Без окна браузера (только если вход в профиле уже выполнен)
+    ASYNC_DB_WRITES = True  # Писать в MySQL в фоновом потоке, не задерживая браузеры
+    DB_STATS_SOURCE = "counters"  # Статистика БД: "counters" (счетчики), "estimate" (оценка) или "exact"
+    EXACT_DB_STATS_INTERVAL_HOURS = 0  # Фоновый точный подсчет строк раз в N часов (0 - выключен)
+    STALE_WHILE_REVALIDATE = False  # Отдавать кэш сразу (с отметкой устаревания), обновляя аккаунты в фоне
+    MAX_STALE_HOURS = 24  # Кэш старше этого срока в режиме STALE_WHILE_REVALIDATE не отдается без обновления
 
     # Инициализируем браузер
-    print(f"\n--- Инициализация браузера Chrome ---")
-    driver = deps['initialize_browser'](CHROME_PROFILE_PATH)
+    logger.info("--- Инициализация браузера Chrome ---")
+    # Для режима graphql включаем перехват сетевых ответов через DevTools
+    browser_options = {
+        "capture_network": EXTRACTION_MODE == "graphql",
+        "lightweight": LIGHTWEIGHT_BROWSER,
+        "headless": HEADLESS,
+    }
+    driver = deps['initialize_browser'](CHROME_PROFILE_PATH, **browser_options)
     if not driver:
-        print("Не удалось инициализировать браузер. Завершение работы.")
         logger.error("Не удалось инициализировать браузер. Завершение работы.")
         return
     else:
-        print("Браузер Chrome успешно инициализирован")
         logger.info("Браузер Chrome успешно инициализирован")
 
+    db_connection = None
+    worker_drivers = []
+
     try:
         # Сначала выполняем ручную авторизацию с ожиданием нажатия Enter
-        print("\n--- Авторизация в Twitter ---")
+        logger.info("--- Авторизация в Twitter ---")
         auth_result = deps['manual_auth_with_prompt'](driver)
-        print(f"Результат авторизации: {'УСПЕШНО' if auth_result else 'НЕ УДАЛОСЬ ПОДТВЕРДИТЬ'}")
-        logger.info(f"Результат авторизации: {'успешно' if auth_result else 'не подтверждено'}")
+        logger.info("Результат авторизации: %s", 'УСПЕШНО' if auth_result else 'НЕ УДАЛОСЬ ПОДТВЕРДИТЬ')
+
+        # Запускаем дополнительные браузеры (копии профиля делаются после авторизации)
+        if BROWSER_WORKERS > 1:
+            logger.info("--- Запуск дополнительных браузеров: %s ---", BROWSER_WORKERS - 1)
+            worker_drivers = start_browser_workers(BROWSER_WORKERS - 1, deps['initialize_browser'],
+                                                   CHROME_PROFILE_PATH, **browser_options)
+            logger.info("Запущено дополнительных браузеров: %s", len(worker_drivers))
+
+        # Пул соединений и миграции схемы - один раз при запуске; размер - по всем
+        # одновременным потребителям (основной цикл, браузеры, фоновая запись и подсчет)
+        logger.info("--- Подключение к MySQL ---")
+        pool_size = estimate_pool_size(1 + len(worker_drivers), async_writes=ASYNC_DB_WRITES,
+                                       exact_stats=bool(EXACT_DB_STATS_INTERVAL_HOURS))
+        init_connection_pool(MYSQL_CONFIG, pool_size=pool_size)
+        # Кэш пользователей: известные аккаунты не перезаписываются в каждом цикле
+        warm_connection = get_pooled_connection(MYSQL_CONFIG)
+        if warm_connection:
+            try:
+                warm_user_cache(warm_connection)
+            finally:
+                warm_connection.close()
+        if ASYNC_DB_WRITES:
+            start_db_writer(MYSQL_CONFIG)
+        if EXACT_DB_STATS_INTERVAL_HOURS:
+            start_exact_statistics(MYSQL_CONFIG, EXACT_DB_STATS_INTERVAL_HOURS)
+        if STALE_WHILE_REVALIDATE:
+            # Все браузеры переходят в фоновые потоки обновления аккаунтов
+            start_refresh_workers(
+                [driver] + worker_drivers,
+                deps,
+                mysql_config=None if ASYNC_DB_WRITES else MYSQL_CONFIG,
+                db_writer=enqueue_account_tweets if ASYNC_DB_WRITES else None,
+                max_tweets=MAX_TWEETS,
+                use_cache=True,
+                cache_duration_hours=CACHE_DURATION,
+                time_filter_hours=HOURS_FILTER,
+                extract_full_tweets=EXTRACT_FULL_TWEETS,
+                html_cache_dir=HTML_CACHE_DIR,
+                extraction_mode=EXTRACTION_MODE,
+                incremental=INCREMENTAL,
+                stats_only_known=True,
+                refresh_past_mark=REFRESH_PAST_MARK
+            )
 
         # Начинаем бесконечный цикл
         while True:
-            # Подключаемся к базе данных
-            print("\n--- Подключение к MySQL ---")
+            # Берем соединение из пула
+            logger.info("--- Подключение к MySQL ---")
             db_connection = deps['initialize_mysql'](MYSQL_CONFIG)
             if not db_connection:
-                print("ВНИМАНИЕ: Не удалось подключиться к MySQL. Данные не будут сохранены в базу.")
-                logger.warning("Не удалось подключиться к MySQL. Данные не будут сохранены в базу.")
-                answer = input("Хотите продолжить без сохранения в MySQL? (да/нет): ")
-                if answer.lower() not in ['да', 'yes', 'y', 'д']:
-                    print("Выход из программы...")
-                    logger.info("Пользователь отменил запуск без MySQL. Выход из программы.")
-                    break
+                # Без интерактивного вопроса: данные пишутся в локальный журнал и загружаются позже
+                logger.warning("ВНИМАНИЕ: Не удалось подключиться к MySQL. Данные будут записаны в локальный журнал.")
             else:
-                print("Успешное подключение к MySQL")
                 logger.info("Успешное подключение к MySQL")
 
+                # Загружаем накопленный журнал, если база снова доступна
+                spool_segments, spool_bytes = get_spool_size()
+                if spool_segments:
+                    logger.info("Загрузка локального журнала в MySQL (%s сегм., %s байт)...", spool_segments, spool_bytes)
+                    loaded = replay_spool(db_connection)
+                    logger.info("Из журнала загружено твитов: %s", loaded if loaded is not None else 'ОШИБКА')
+
             # Загружаем список аккаунтов из файла
             accounts_to_track = load_accounts_from_file("influencer_twitter.txt")
 
             # Если файл не найден или пуст, используем дефолтный список
             if not accounts_to_track:
-                print("Используем список аккаунтов по умолчанию")
                 logger.info("Используем список аккаунтов по умолчанию")
                 accounts_to_track = [
                     "Defi0xJeff",
@@ -211,64 +286,73 @@ def main():
                     "OpenAI"
                 ]
 
-            print(f"\n--- Основные параметры ---")
-            print(f"Период твитов: последние {HOURS_FILTER} часа")
-            print(f"Срок действия кэша: {CACHE_DURATION} час")
-            print(f"Максимальное количество твитов: {MAX_TWEETS}")
-            print(f"Принудительное обновление: {'ДА' if FORCE_REFRESH else 'НЕТ'}")
-            print(f"Извлечение полных статей: {'ДА' if EXTRACT_ARTICLES else 'НЕТ'}")
-            print(f"Извлечение полных твитов: {'ДА' if EXTRACT_FULL_TWEETS else 'НЕТ'}")
-            print(f"Извлечение всех ссылок: {'ДА' if EXTRACT_LINKS else 'НЕТ'}")
-            print(f"Аккаунты для отслеживания: {', '.join('@' + account for account in accounts_to_track)}")
-
-            logger.info(f"Параметры: период={HOURS_FILTER}ч, кэш={CACHE_DURATION}ч, макс.твитов={MAX_TWEETS}, " +
-                        f"обновление={FORCE_REFRESH}, статьи={EXTRACT_ARTICLES}, полные твиты={EXTRACT_FULL_TWEETS}, " +
-                        f"ссылки={EXTRACT_LINKS}, аккаунтов={len(accounts_to_track)}")
-
-            all_results = []
-
-            # Обрабатываем каждый аккаунт
-            for username in accounts_to_track:
-                print(f"\n=== Обработка аккаунта @{username} ===")
-                logger.info(f"Начало обработки аккаунта @{username}")
-
-                # Получаем твиты пользователя
-                user_data = deps['get_tweets_with_selenium'](
-                    username,
-                    driver,
-                    db_connection,
+            logger.info("--- Основные параметры ---")
+            logger.info("Период твитов: последние %s часа", HOURS_FILTER)
+            logger.info("Срок действия кэша: %s час", CACHE_DURATION)
+            logger.info("Максимальное количество твитов: %s", MAX_TWEETS)
+            logger.info("Принудительное обновление: %s", 'ДА' if FORCE_REFRESH else 'НЕТ')
+            logger.info("Извлечение полных статей: %s", 'ДА' if EXTRACT_ARTICLES else 'НЕТ')
+            logger.info("Извлечение полных твитов: %s", 'ДА' if EXTRACT_FULL_TWEETS else 'НЕТ')
+            logger.info("Извлечение всех ссылок: %s", 'ДА' if EXTRACT_LINKS else 'НЕТ')
+            logger.info("Способ извлечения твитов: %s", EXTRACTION_MODE)
+            logger.info("Инкрементальный сбор: %s", 'ДА' if INCREMENTAL else 'НЕТ')
+            logger.info("Обновление счетчиков за отметкой: %s", 'ДА' if REFRESH_PAST_MARK else 'НЕТ')
+            logger.info("Параллельных браузеров: %s", 1 + len(worker_drivers))
+            logger.info("Аккаунты для отслеживания: %s", ', '.join('@' + account for account in accounts_to_track))
+
+            # Обрабатываем аккаунты: основной браузер + дополнительные, общая очередь аккаунтов
+            # Запись в MySQL: через фоновый поток (ASYNC_DB_WRITES) или соединением каждого воркера из пула;
+            # без MySQL - в локальный журнал
+            if not db_connection:
+                db_writer = append_to_spool
+            else:
+                db_writer = enqueue_account_tweets if ASYNC_DB_WRITES else None
+            if STALE_WHILE_REVALIDATE:
+                # Браузер ждут только аккаунты без кэша или с кэшем старше MAX_STALE_HOURS
+                processed_results = serve_accounts_stale_while_revalidate(
+                    accounts_to_track,
+                    cache_duration_hours=CACHE_DURATION,
+                    max_stale_hours=MAX_STALE_HOURS,
+                    max_tweets=MAX_TWEETS,
+                    time_filter_hours=HOURS_FILTER
+                )
+            else:
+                processed_results = process_accounts_parallel(
+                    accounts_to_track,
+                    [driver] + worker_drivers,
+                    deps,  # Передаем словарь с функциями
+                    mysql_config=MYSQL_CONFIG if db_connection and not ASYNC_DB_WRITES else None,
+                    db_writer=db_writer,
                     max_tweets=MAX_TWEETS,
                     use_cache=True,
                     cache_duration_hours=CACHE_DURATION,
                     time_filter_hours=HOURS_FILTER,
                     force_refresh=FORCE_REFRESH,
-                    extract_articles=EXTRACT_ARTICLES,
                     extract_full_tweets=EXTRACT_FULL_TWEETS,
-                    extract_links=EXTRACT_LINKS,
-                    dependencies=deps,  # Передаем словарь с функциями
-                    html_cache_dir=HTML_CACHE_DIR  # Добавляем этот параметр
+                    html_cache_dir=HTML_CACHE_DIR,
+                    extraction_mode=EXTRACTION_MODE,
+                    incremental=INCREMENTAL,
+                    stats_only_known=bool(db_connection),
+                    refresh_past_mark=REFRESH_PAST_MARK
                 )
 
+            all_results = []
+            for user_data in processed_results:
+                username = user_data.get("username")
+
                 # Проверяем, что результат содержит твиты
                 has_content = (user_data.get("tweets", []))
                 if has_content:
                     all_results.append(user_data)
-                    print(f"Найдено {len(user_data['tweets'])} твитов от @{username}")
-                    logger.info(f"Найдено {len(user_data['tweets'])} твитов от @{username}")
+                    logger.info("Найдено %s твитов от @%s", len(user_data['tweets']), username)
                 else:
-                    print(f"Нет твитов от @{username} за последние {HOURS_FILTER} часа")
-                    logger.info(f"Нет твитов от @{username} за последние {HOURS_FILTER} часа")
-
-                print(f"=== Завершена обработка @{username} ===\n")
-                logger.info(f"Завершена обработка @{username}")
+                    logger.info("Нет твитов от @%s за последние %s часа", username, HOURS_FILTER)
 
             # Вывод результатов
-            print("\n===== РЕЗУЛЬТАТЫ =====\n")
-            logger.info("Формирование результатов")
+            logger.info("===== РЕЗУЛЬТАТЫ =====")
 
             if not all_results:
-                print(f"Не найдено твитов за последние {HOURS_FILTER} часа от отслеживаемых аккаунтов.")
-                logger.warning(f"Не найдено твитов за последние {HOURS_FILTER} часа от отслеживаемых аккаунтов.")
+                logger.warning("Не найдено твитов за последние %s часа от отслеживаемых аккаунтов.", HOURS_FILTER)
             else:
                 # Отображаем результаты
                 deps['display_results_summary'](all_results, HOURS_FILTER, IMAGES_DIR)
@@ -278,42 +362,102 @@ def main():
 
                 # Если есть подключение к БД, получаем статистику базы данных
                 if db_connection:
-                    db_stats = deps['generate_database_statistics'](db_connection)
+                    # Статистика должна учитывать твиты, еще ожидающие фоновой записи
+                    if ASYNC_DB_WRITES:
+                        flush_db_writer()
+                    db_stats = deps['generate_database_statistics'](db_connection, source=DB_STATS_SOURCE)
 
                     # Выводим статистику базы данных
-                    print("\n--- Информация о базе данных ---")
+                    logger.info("--- Информация о базе данных ---")
                     for category, count in db_stats.items():
-                        print(f"- {category}: {count}")
-
-            # Закрываем соединение с базой данных после каждого цикла
-            if db_connection and hasattr(db_connection, 'is_connected') and db_connection.is_connected():
+                        logger.info("- %s: %s", category, count)
+                    for day, day_tweets, day_retweets in get_daily_tweet_counts(db_connection, days=3):
+                        logger.info("- Твитов за %s: %s (ретвитов %s)", day, day_tweets, day_retweets)
+                    for user_counts in get_user_tweet_counts(db_connection, limit=5):
+                        logger.info("- Твитов @%s: %s (ретвитов %s), последний %s",
+                                    user_counts['username'], user_counts['tweet_count'],
+                                    user_counts['retweet_count'], user_counts['last_tweet_at'])
+
+                    # История счетчиков: новые месячные секции и прореживание старых снимков
+                    history_maintenance = maintain_stats_history(db_connection)
+                    if history_maintenance is not None:
+                        logger.info("Обслуживание истории счетчиков: %s", history_maintenance)
+
+            # Состояние фоновой записи в MySQL
+            if ASYNC_DB_WRITES:
+                writer_stats = get_db_writer_stats()
+                logger.info("Фоновая запись в MySQL: в очереди %s, записано твитов %s, пакетов %s, "
+                            "среднее время записи %.0f мс, повторов %s, в журнал %s, потеряно твитов %s",
+                            writer_stats['queue_depth'], writer_stats['written_tweets'], writer_stats['batches'],
+                            writer_stats['avg_write_time'] * 1000, writer_stats['retries'],
+                            writer_stats['spooled_tweets'], writer_stats['dropped_tweets'])
+
+            # Фоновое обновление аккаунтов (режим STALE_WHILE_REVALIDATE)
+            if STALE_WHILE_REVALIDATE:
+                refresh_stats = get_refresh_stats()
+                logger.info("Фоновое обновление: из свежего кэша %s, из устаревшего %s, с ожиданием %s, "
+                            "в очереди %s, объединено повторных %s",
+                            refresh_stats['served_fresh'], refresh_stats['served_stale'], refresh_stats['waited'],
+                            refresh_stats['pending'], refresh_stats['deduplicated'])
+
+            # Эффективность кэша ответов API (для подбора размера и TTL)
+            api_cache_stats = get_api_cache_stats()
+            logger.info("Кэш API: попаданий %s, счетчики со страницы %s, устаревших %s, промахов %s, "
+                        "доля попаданий %.1f%%, записей %s",
+                        api_cache_stats['hits'], api_cache_stats['content_hits'], api_cache_stats['stale_hits'],
+                        api_cache_stats['misses'], api_cache_stats['hit_ratio'] * 100, api_cache_stats['entries'])
+            api_timing = get_api_timing_stats()
+            logger.info("Запросы к API: %s (ошибок %s), %.2f сек в среднем (макс. %.2f)",
+                        api_timing['requests'], api_timing['errors'], api_timing['avg_time'], api_timing['max_time'])
+
+            # Время загрузки профилей и шагов скролла (сравнение с LIGHTWEIGHT_BROWSER = False)
+            page_timing = get_page_timing_stats()
+            logger.info("Браузер (%s режим): загрузка профиля %.2f сек в среднем (макс. %.2f), "
+                        "шаг скролла %.2f сек (макс. %.2f)",
+                        'облегченный' if LIGHTWEIGHT_BROWSER else 'обычный',
+                        page_timing['avg_page_load_time'], page_timing['max_page_load_time'],
+                        page_timing['avg_scroll_time'], page_timing['max_scroll_time'])
+
+            # Возвращаем соединение в пул после каждого цикла
+            if db_connection:
                 db_connection.close()
-                print("Соединение с базой данных закрыто")
-                logger.info("Соединение с базой данных закрыто")
+                db_connection = None
+                logger.info("Соединение с базой данных возвращено в пул")
 
-            print("\n=== ИТЕРАЦИЯ ЗАВЕРШЕНА, НАЧИНАЮ СЛЕДУЮЩУЮ ===")
-            logger.info("Итерация завершена, начинаю следующую")
+            logger.info("=== ИТЕРАЦИЯ ЗАВЕРШЕНА, НАЧИНАЮ СЛЕДУЮЩУЮ ===")
             
             # Небольшая пауза между итерациями
             time.sleep(5)
 
     finally:
         # Закрываем браузер при выходе из программы
-        print("\n--- Завершение работы ---")
-        logger.info("Завершение работы скрапера")
+        logger.info("--- Завершение работы ---")
+
+        # Браузеры освобождаются потоками фонового обновления до закрытия
+        stop_refresh_workers()
 
         if driver:
             driver.quit()
-            print("Браузер закрыт")
             logger.info("Браузер закрыт")
 
-        if db_connection and hasattr(db_connection, 'is_connected') and db_connection.is_connected():
+        if worker_drivers:
+            stop_browser_workers(worker_drivers)
+            logger.info("Дополнительные браузеры закрыты: %s", len(worker_drivers))
+
+        # Дописываем очередь фоновой записи
+        if ASYNC_DB_WRITES:
+            stop_db_writer()
+            logger.info("Очередь записи в MySQL дописана")
+        close_spool()
+        stop_exact_statistics()
+        stop_html_archiver()
+
+        if db_connection:
             db_connection.close()
-            print("Соединение с базой данных закрыто")
             logger.info("Соединение с базой данных закрыто")
 
-        print("\n=== СКРИПТ ЗАВЕРШИЛ РАБОТУ ===")
-        logger.info("СКРИПТ ЗАВЕРШИЛ РАБОТУ")
+        logger.info("=== СКРИПТ ЗАВЕРШИЛ РАБОТУ ===")
+        stop_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для работы с MySQL: пул соединений (mysql.connector.pooling) с проверкой
+соединения при выдаче и версионные миграции схемы, которые выполняются один раз
+при создании пула, а не при каждом подключении.
+Долгие миграции (перестройка tweets) можно выполнить заранее, не останавливая
+сбор: python twitter_scraper_migrate.py
+"""
+
+import time
+import logging
+import threading
+
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.db')
+
+DB_POOL_NAME = "twitter_scraper"
+DB_POOL_SIZE = 5  # Не больше DB_POOL_MAX_SIZE
+DB_POOL_MAX_SIZE = 32  # Ограничение mysql.connector
+DB_POOL_TIMEOUT = 30  # Ожидание свободного соединения (сек)
+DB_RECONNECT_ATTEMPTS = 3
+DB_MIGRATION_BATCH_SIZE = 5000  # Строк за одну транзакцию при копировании таблицы
+
+# Схема v2 таблицы tweets: ключ - ID твита (BIGINT UNSIGNED, растет со временем),
+# без суррогатного id и url (url = x.com/<автор>/status/<tweet_id>),
+# составной индекс для выборки последних твитов пользователя за период
+TWEETS_V2_COLUMNS = ("tweet_id, user_id, tweet_text, created_at, likes, retweets, replies, "
+                     "is_retweet, original_author, inserted_at")
+
+TWEETS_V2_SQL = """
+    CREATE TABLE IF NOT EXISTS tweets_v2 (
+        tweet_id BIGINT UNSIGNED NOT NULL PRIMARY KEY,
+        user_id INT,
+        tweet_text TEXT,
+        created_at DATETIME,
+        likes INT UNSIGNED NOT NULL DEFAULT 0,
+        retweets INT UNSIGNED NOT NULL DEFAULT 0,
+        replies INT UNSIGNED NOT NULL DEFAULT 0,
+        is_retweet BOOLEAN NOT NULL DEFAULT FALSE,
+        original_author VARCHAR(255),
+        inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        INDEX idx_user_created (user_id, created_at),
+        INDEX idx_created_at (created_at)
+    ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+# Строка старой таблицы (псевдоним {row}) в столбцы TWEETS_V2_COLUMNS
+_V1_TO_V2_SELECT = """
+    SELECT CAST({row}.tweet_id AS UNSIGNED), {row}.user_id, {row}.tweet_text, {row}.created_at,
+           GREATEST({row}.likes, 0), GREATEST({row}.retweets, 0), GREATEST({row}.replies, 0),
+           COALESCE({row}.is_retweet, FALSE), {row}.original_author, {row}.inserted_at
+"""
+
+# Пока идет копирование, изменения старой таблицы переносятся триггерами
+_V2_SYNC_TRIGGERS = {
+    "tweets_v2_sync_insert": "AFTER INSERT",
+    "tweets_v2_sync_update": "AFTER UPDATE",
+}
+_V2_SYNC_UPSERT = """
+    INSERT INTO tweets_v2 ({columns})
+    {select} FROM DUAL WHERE NEW.tweet_id REGEXP '^[0-9]+$'
+    ON DUPLICATE KEY UPDATE tweet_text = VALUES(tweet_text), likes = VALUES(likes),
+        retweets = VALUES(retweets), replies = VALUES(replies)
+"""
+
+
+def migrate_tweets_v2(connection, batch_size=DB_MIGRATION_BATCH_SIZE, pause=0.0):
+    """
+    Перестраивает tweets в схему v2 без остановки записи (как pt-online-schema-change):
+    1. создает tweets_v2 и триггеры, переносящие новые вставки/обновления/удаления;
+    2. копирует существующие строки пакетами по диапазонам id (INSERT IGNORE -
+       строки, уже перенесенные триггером, новее);
+    3. атомарно меняет таблицы местами (RENAME TABLE), старая остается как tweets_v1.
+    Пустая таблица (новая установка) просто пересоздается в схеме v2, без копирования и tweets_v1.
+    Прерванную миграцию можно запустить повторно.
+
+    Args:
+        connection: Соединение с MySQL
+        batch_size: Строк за одну транзакцию
+        pause: Пауза между пакетами (сек) для снижения нагрузки
+    """
+    cursor = connection.cursor()
+    cursor.execute("SHOW COLUMNS FROM tweets LIKE 'url'")
+    if cursor.fetchone() is None:
+        logger.info("Таблица tweets уже в схеме v2")
+        return
+
+    cursor.execute(TWEETS_V2_SQL)
+    cursor.execute("SELECT 1 FROM tweets LIMIT 1")
+    if cursor.fetchone() is None:
+        cursor.execute("DROP TABLE tweets")
+        cursor.execute("RENAME TABLE tweets_v2 TO tweets")
+        connection.commit()
+        logger.info("Пустая таблица tweets пересоздана в схеме v2")
+        return
+
+    for trigger_name, timing in _V2_SYNC_TRIGGERS.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+        cursor.execute(f"CREATE TRIGGER {trigger_name} {timing} ON tweets FOR EACH ROW " +
+                       _V2_SYNC_UPSERT.format(columns=TWEETS_V2_COLUMNS, select=_V1_TO_V2_SELECT.format(row="NEW")))
+    cursor.execute("DROP TRIGGER IF EXISTS tweets_v2_sync_delete")
+    cursor.execute("CREATE TRIGGER tweets_v2_sync_delete AFTER DELETE ON tweets FOR EACH ROW "
+                   "DELETE FROM tweets_v2 WHERE tweet_id = CAST(OLD.tweet_id AS UNSIGNED)")
+    connection.commit()
+
+    cursor.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM tweets")
+    first_id, last_id = cursor.fetchone()
+    copy_sql = (f"INSERT IGNORE INTO tweets_v2 ({TWEETS_V2_COLUMNS}) " + _V1_TO_V2_SELECT.format(row="t") +
+                " FROM tweets t WHERE t.id >= %s AND t.id < %s AND t.tweet_id REGEXP '^[0-9]+$'")
+    copied = 0
+    for batch_start in range(first_id, last_id + 1, batch_size):
+        cursor.execute(copy_sql, (batch_start, batch_start + batch_size))
+        copied += cursor.rowcount
+        connection.commit()
+        logger.info("Миграция tweets v2: скопировано до id %s из %s (строк: %s)",
+                    min(batch_start + batch_size - 1, last_id), last_id, copied)
+        if pause:
+            time.sleep(pause)
+
+    cursor.execute("RENAME TABLE tweets TO tweets_v1, tweets_v2 TO tweets")
+    for trigger_name in list(_V2_SYNC_TRIGGERS) + ["tweets_v2_sync_delete"]:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+    connection.commit()
+    logger.info("Таблица tweets переведена в схему v2 (скопировано %s строк); "
+                "старая таблица сохранена как tweets_v1", copied)
+
+
+# Миграции схемы: (версия, описание, [SQL или функция(connection)]); применяются по возрастанию версии
+SCHEMA_MIGRATIONS = [
+    (1, "Таблицы users и tweets", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(255) NOT NULL UNIQUE,
+            name VARCHAR(255),
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tweets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            tweet_id VARCHAR(255) UNIQUE,
+            user_id INT,
+            tweet_text TEXT,
+            created_at DATETIME,
+            url VARCHAR(255),
+            likes INT DEFAULT 0,
+            retweets INT DEFAULT 0,
+            replies INT DEFAULT 0,
+            is_retweet BOOLEAN DEFAULT FALSE,
+            original_author VARCHAR(255),
+            inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            INDEX idx_created_at (created_at),
+            INDEX idx_user_id (user_id)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+        """,
+    ]),
+    (2, "История счетчиков твитов tweet_stats_history", [
+        # Только добавление строк; секционирование по месяцам (секции добавляет
+        # twitter_scraper_stats_history.ensure_stats_history_partitions)
+        """
+        CREATE TABLE IF NOT EXISTS tweet_stats_history (
+            tweet_id BIGINT UNSIGNED NOT NULL,
+            observed_at DATETIME NOT NULL,
+            likes INT UNSIGNED NOT NULL DEFAULT 0,
+            retweets INT UNSIGNED NOT NULL DEFAULT 0,
+            replies INT UNSIGNED NOT NULL DEFAULT 0,
+            PRIMARY KEY (tweet_id, observed_at),
+            INDEX idx_observed_at (observed_at)
+        ) ENGINE=InnoDB
+        PARTITION BY RANGE COLUMNS (observed_at) (
+            PARTITION p_future VALUES LESS THAN (MAXVALUE)
+        )
+        """,
+    ]),
+    (3, "Схема v2 таблицы tweets: BIGINT UNSIGNED tweet_id, индекс (user_id, created_at)", [
+        migrate_tweets_v2,
+    ]),
+    (4, "Счетчики строк users/tweets, по пользователям и по дням", [
+        # Счетчики обновляются триггерами в той же транзакции, что и запись твитов,
+        # поэтому статистика не требует SELECT COUNT(*) по растущим таблицам
+        """
+        CREATE TABLE IF NOT EXISTS table_counters (
+            table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+            row_count BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_tweet_counts (
+            user_id INT NOT NULL PRIMARY KEY,
+            tweet_count INT NOT NULL DEFAULT 0,
+            retweet_count INT NOT NULL DEFAULT 0,
+            last_tweet_at DATETIME,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS daily_tweet_counts (
+            day DATE NOT NULL PRIMARY KEY,
+            tweet_count INT NOT NULL DEFAULT 0,
+            retweet_count INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+        """,
+        "DROP TRIGGER IF EXISTS users_counters_insert",
+        """
+        CREATE TRIGGER users_counters_insert AFTER INSERT ON users FOR EACH ROW
+            INSERT INTO table_counters (table_name, row_count) VALUES ('users', 1)
+            ON DUPLICATE KEY UPDATE row_count = row_count + 1
+        """,
+        # Каскадное удаление твитов (FOREIGN KEY ... ON DELETE CASCADE) не вызывает
+        # триггеры tweets, поэтому счетчики твитов пользователя вычитаются здесь
+        "DROP TRIGGER IF EXISTS users_counters_delete",
+        """
+        CREATE TRIGGER users_counters_delete BEFORE DELETE ON users FOR EACH ROW
+        BEGIN
+            UPDATE daily_tweet_counts d
+            JOIN (
+                SELECT DATE(created_at) AS day, COUNT(*) AS tweets, SUM(is_retweet) AS retweets
+                FROM tweets WHERE user_id = OLD.id AND created_at IS NOT NULL
+                GROUP BY DATE(created_at)
+            ) t ON d.day = t.day
+            SET d.tweet_count = d.tweet_count - t.tweets, d.retweet_count = d.retweet_count - t.retweets;
+            UPDATE table_counters
+            SET row_count = row_count - (SELECT COUNT(*) FROM tweets WHERE user_id = OLD.id)
+            WHERE table_name = 'tweets';
+            UPDATE table_counters SET row_count = row_count - 1 WHERE table_name = 'users';
+            DELETE FROM user_tweet_counts WHERE user_id = OLD.id;
+        END
+        """,
+        "DROP TRIGGER IF EXISTS tweets_counters_insert",
+        """
+        CREATE TRIGGER tweets_counters_insert AFTER INSERT ON tweets FOR EACH ROW
+        BEGIN
+            INSERT INTO table_counters (table_name, row_count) VALUES ('tweets', 1)
+            ON DUPLICATE KEY UPDATE row_count = row_count + 1;
+            IF NEW.user_id IS NOT NULL THEN
+                INSERT INTO user_tweet_counts (user_id, tweet_count, retweet_count, last_tweet_at)
+                VALUES (NEW.user_id, 1, NEW.is_retweet, NEW.created_at)
+                ON DUPLICATE KEY UPDATE tweet_count = tweet_count + 1,
+                    retweet_count = retweet_count + VALUES(retweet_count),
+                    last_tweet_at = GREATEST(COALESCE(last_tweet_at, VALUES(last_tweet_at)),
+                                             COALESCE(VALUES(last_tweet_at), last_tweet_at));
+            END IF;
+            IF NEW.created_at IS NOT NULL THEN
+                INSERT INTO daily_tweet_counts (day, tweet_count, retweet_count)
+                VALUES (DATE(NEW.created_at), 1, NEW.is_retweet)
+                ON DUPLICATE KEY UPDATE tweet_count = tweet_count + 1,
+                    retweet_count = retweet_count + VALUES(retweet_count);
+            END IF;
+        END
+        """,
+        "DROP TRIGGER IF EXISTS tweets_counters_delete",
+        """
+        CREATE TRIGGER tweets_counters_delete AFTER DELETE ON tweets FOR EACH ROW
+        BEGIN
+            UPDATE table_counters SET row_count = row_count - 1 WHERE table_name = 'tweets';
+            UPDATE user_tweet_counts
+            SET tweet_count = tweet_count - 1, retweet_count = retweet_count - OLD.is_retweet
+            WHERE user_id = OLD.user_id;
+            UPDATE daily_tweet_counts
+            SET tweet_count = tweet_count - 1, retweet_count = retweet_count - OLD.is_retweet
+            WHERE day = DATE(OLD.created_at);
+        END
+        """,
+        # Начальные значения - однократный подсчет существующих строк
+        "REPLACE INTO table_counters (table_name, row_count) SELECT 'users', COUNT(*) FROM users",
+        "REPLACE INTO table_counters (table_name, row_count) SELECT 'tweets', COUNT(*) FROM tweets",
+        """
+        REPLACE INTO user_tweet_counts (user_id, tweet_count, retweet_count, last_tweet_at)
+        SELECT user_id, COUNT(*), SUM(is_retweet), MAX(created_at)
+        FROM tweets WHERE user_id IS NOT NULL GROUP BY user_id
+        """,
+        """
+        REPLACE INTO daily_tweet_counts (day, tweet_count, retweet_count)
+        SELECT DATE(created_at), COUNT(*), SUM(is_retweet)
+        FROM tweets WHERE created_at IS NOT NULL GROUP BY DATE(created_at)
+        """,
+    ]),
+]
+
+_pool = None
+_pool_lock = threading.Lock()
+# Размер, запрошенный при запуске: с ним пул создается и позже, если MySQL тогда был недоступен
+_pool_size = DB_POOL_SIZE
+
+
+def get_schema_version(connection):
+    """Возвращает версию схемы базы (0, если миграции еще не выполнялись)"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+    """)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def run_schema_migrations(connection, migrations=SCHEMA_MIGRATIONS):
+    """
+    Применяет миграции схемы с версией выше текущей
+
+    Args:
+        connection: Соединение с MySQL
+        migrations: Список миграций (версия, описание, [SQL])
+
+    Returns:
+        int: Версия схемы после миграций
+    """
+    version = get_schema_version(connection)
+    cursor = connection.cursor()
+    for migration_version, description, statements in sorted(migrations, key=lambda m: m[0]):
+        if migration_version <= version:
+            continue
+        logger.info("Миграция схемы до версии %s: %s", migration_version, description)
+        for statement in statements:
+            if callable(statement):
+                statement(connection)
+            else:
+                cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                       (migration_version, description))
+        connection.commit()
+        version = migration_version
+    return version
+
+
+def estimate_pool_size(browser_workers, async_writes=False, exact_stats=False):
+    """
+    Размер пула по числу одновременных потребителей соединений: основной цикл,
+    по одному на браузер (соединение записи аккаунта или, при фоновой записи, загрузка
+    сохраненных ID в load_known_tweet_ids), поток фоновой записи и поток точного подсчета
+
+    Args:
+        browser_workers: Количество браузеров
+        async_writes: Запущена ли фоновая запись (twitter_scraper_db_writer)
+        exact_stats: Запущен ли фоновый точный подсчет строк (twitter_scraper_stats)
+
+    Returns:
+        int: Размер пула (не больше DB_POOL_MAX_SIZE)
+    """
+    size = 1 + browser_workers + (1 if async_writes else 0) + (1 if exact_stats else 0)
+    return min(size, DB_POOL_MAX_SIZE)
+
+
+def _discard_connection(connection):
+    """
+    Возвращает в пул соединение, не прошедшее проверку, с разорванным сетевым соединением:
+    пул переподключит его при следующей выдаче, а не отдаст сломанным
+    """
+    try:
+        connection.disconnect()
+    except Error:
+        pass
+    try:
+        # reset_session на разорванном соединении завершается ошибкой, но в пул оно все равно возвращается
+        connection.close()
+    except Error:
+        pass
+
+
+def init_connection_pool(config, pool_size=None):
+    """
+    Создает пул соединений (один раз) и приводит схему к последней версии.
+    Повторные вызовы возвращают уже созданный пул.
+
+    Args:
+        config: Настройки подключения к MySQL
+        pool_size: Количество соединений в пуле (None - запрошенное ранее, по умолчанию DB_POOL_SIZE)
+
+    Returns:
+        MySQLConnectionPool: Пул соединений или None при ошибке
+    """
+    global _pool, _pool_size
+    with _pool_lock:
+        if pool_size is None:
+            pool_size = _pool_size
+        else:
+            _pool_size = pool_size
+        if _pool is not None:
+            return _pool
+        try:
+            pool = pooling.MySQLConnectionPool(pool_name=DB_POOL_NAME, pool_size=pool_size,
+                                               pool_reset_session=True, **config)
+            connection = pool.get_connection()
+            try:
+                version = run_schema_migrations(connection)
+            finally:
+                connection.close()
+            logger.info("Создан пул соединений MySQL (%s), версия схемы: %s", pool_size, version)
+            _pool = pool
+            return _pool
+        except Error as e:
+            logger.error("Не удалось создать пул соединений MySQL: %s", e)
+            return None
+
+
+def get_pooled_connection(config=None, timeout=DB_POOL_TIMEOUT):
+    """
+    Выдает соединение из пула (close() возвращает его в пул).
+    Перед выдачей соединение проверяется ping с переподключением; если все
+    соединения заняты, ожидает освобождения до timeout секунд.
+
+    Args:
+        config: Настройки MySQL - для создания пула, если он еще не создан
+                (размер - запрошенный в init_connection_pool)
+        timeout: Максимальное ожидание свободного соединения (сек)
+
+    Returns:
+        PooledMySQLConnection: Соединение или None
+    """
+    pool = _pool
+    if pool is None:
+        if config is None:
+            logger.error("Пул соединений MySQL не создан")
+            return None
+        pool = init_connection_pool(config)
+        if pool is None:
+            return None
+
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while True:
+        try:
+            connection = pool.get_connection()
+        except PoolError:
+            if time.monotonic() >= deadline:
+                logger.error("Нет свободных соединений MySQL за %s сек", timeout)
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+            continue
+        except Error as e:
+            logger.error("Ошибка при получении соединения MySQL из пула: %s", e)
+            return None
+
+        try:
+            connection.ping(reconnect=True, attempts=DB_RECONNECT_ATTEMPTS, delay=1)
+            return connection
+        except Error as e:
+            logger.error("Соединение MySQL не отвечает: %s", e)
+            _discard_connection(connection)
+            return None
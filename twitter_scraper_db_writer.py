@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для фоновой записи в MySQL. Скрапер только кладет твиты аккаунта
+в ограниченную очередь и сразу возвращается к браузеру; отдельный поток
+объединяет аккаунты в пакеты, пишет их одной транзакцией, повторяет при
+ошибках с нарастающей паузой и дописывает очередь при остановке.
+Пакет, не записанный после всех повторов, сохраняется в локальный журнал
+(twitter_scraper_spool) и загружается в базу позже.
+"""
+
+import time
+import queue
+import logging
+import threading
+
+from twitter_scraper_utils import initialize_mysql, save_tweets_to_db
+from twitter_scraper_user_cache import save_user_cached, forget_user
+from twitter_scraper_spool import append_to_spool
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.db_writer')
+
+DB_WRITE_QUEUE_SIZE = 100  # Максимум аккаунтов в очереди (при заполнении скрапер ждет)
+DB_WRITE_BATCH_TWEETS = 500  # Аккаунты объединяются в транзакцию, пока не наберется столько твитов
+DB_WRITE_MAX_RETRIES = 5
+DB_WRITE_RETRY_DELAY = 1.0  # Первая пауза перед повтором (сек), далее удваивается
+DB_WRITE_MAX_RETRY_DELAY = 30.0
+
+_STOP = object()
+
+_queue = None
+_thread = None
+_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "enqueued_accounts": 0, "written_accounts": 0, "written_tweets": 0, "spooled_tweets": 0, "dropped_tweets": 0,
+    "batches": 0, "retries": 0, "total_write_time": 0.0, "max_write_time": 0.0, "max_queue_wait": 0.0,
+}
+
+
+def _update_stats(**values):
+    """Обновляет счетчики (ключи с префиксом max_ - максимум, остальные суммируются)"""
+    with _stats_lock:
+        for key, value in values.items():
+            if key.startswith("max_"):
+                _stats[key] = max(_stats[key], value)
+            else:
+                _stats[key] += value
+
+
+def _write_batch(connection, items):
+    """Записывает пакет аккаунтов одной транзакцией; при ошибке откатывает ее и возбуждает RuntimeError"""
+    written_tweets = 0
+    try:
+        for username, name, tweets, _ in items:
+            user_id = save_user_cached(connection, username, name, commit=False)
+            if not user_id:
+                raise RuntimeError(f"не удалось сохранить пользователя {username}")
+            saved = save_tweets_to_db(connection, user_id, tweets, commit=False)
+            if saved is None:
+                raise RuntimeError(f"не удалось сохранить твиты @{username}")
+            written_tweets += saved
+        connection.commit()
+        return written_tweets
+    except Exception:
+        try:
+            connection.rollback()
+        except Exception:
+            pass
+        # ID пользователей, записанных в откатанной транзакции, недействительны
+        for username, _, _, _ in items:
+            forget_user(username)
+        raise
+
+
+def _write_with_retry(mysql_config, connection, items):
+    """
+    Пишет пакет с повторами (новое соединение из пула перед каждым повтором)
+
+    Returns:
+        tuple: (соединение для следующих пакетов или None, записан ли пакет)
+    """
+    delay = DB_WRITE_RETRY_DELAY
+    for attempt in range(DB_WRITE_MAX_RETRIES + 1):
+        if connection is None:
+            connection = initialize_mysql(mysql_config)
+        if connection is not None:
+            started = time.perf_counter()
+            try:
+                written_tweets = _write_batch(connection, items)
+                elapsed = time.perf_counter() - started
+                _update_stats(written_accounts=len(items), written_tweets=written_tweets, batches=1,
+                              total_write_time=elapsed, max_write_time=elapsed)
+                logger.info("Записано %s твитов (%s аккаунтов) за %.0f мс", written_tweets, len(items), elapsed * 1000)
+                return connection, True
+            except Exception as e:
+                logger.warning("Ошибка записи пакета в MySQL (попытка %s): %s", attempt + 1, e)
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                connection = None
+
+        if attempt < DB_WRITE_MAX_RETRIES:
+            _update_stats(retries=1)
+            time.sleep(delay)
+            delay = min(delay * 2, DB_WRITE_MAX_RETRY_DELAY)
+    return connection, False
+
+
+def _writer_loop(mysql_config):
+    """Забирает аккаунты из очереди, объединяет в пакеты и пишет, пока не получит _STOP"""
+    connection = None
+    stopping = False
+    try:
+        while not stopping:
+            item = _queue.get()
+            if item is _STOP:
+                _queue.task_done()
+                break
+
+            # Добираем из очереди то, что уже накопилось, до размера пакета
+            items = [item]
+            batch_tweets = len(item[2])
+            while batch_tweets < DB_WRITE_BATCH_TWEETS:
+                try:
+                    extra = _queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is _STOP:
+                    stopping = True
+                    _queue.task_done()
+                    break
+                items.append(extra)
+                batch_tweets += len(extra[2])
+
+            now = time.monotonic()
+            _update_stats(max_queue_wait=max(now - enqueued_at for _, _, _, enqueued_at in items))
+
+            connection, written = _write_with_retry(mysql_config, connection, items)
+            if not written:
+                logger.error("Пакет из %s аккаунтов (%s твитов) не записан после %s повторов, "
+                             "сохраняем в локальный журнал", len(items), batch_tweets, DB_WRITE_MAX_RETRIES)
+                for username, name, tweets, _ in items:
+                    if append_to_spool(username, name, tweets):
+                        _update_stats(spooled_tweets=len(tweets))
+                    else:
+                        _update_stats(dropped_tweets=len(tweets))
+            for _ in items:
+                _queue.task_done()
+    finally:
+        if connection is not None:
+            connection.close()
+        logger.info("Фоновая запись в MySQL остановлена")
+
+
+def start_db_writer(mysql_config, queue_size=DB_WRITE_QUEUE_SIZE):
+    """
+    Запускает поток фоновой записи (повторный вызов ничего не делает)
+
+    Args:
+        mysql_config: Настройки MySQL (соединения берутся из пула twitter_scraper_db)
+        queue_size: Максимальное количество аккаунтов в очереди
+    """
+    global _queue, _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _queue = queue.Queue(maxsize=queue_size)
+        _thread = threading.Thread(target=_writer_loop, args=(mysql_config,),
+                                   name="twitter-db-writer", daemon=True)
+        _thread.start()
+        logger.info("Запущена фоновая запись в MySQL")
+
+
+def enqueue_account_tweets(username, name, tweets):
+    """
+    Ставит пользователя и его твиты в очередь записи
+    (блокируется, только если очередь заполнена)
+
+    Args:
+        username: Имя пользователя Twitter
+        name: Отображаемое имя
+        tweets: Список словарей твитов
+
+    Returns:
+        bool: Поставлено ли в очередь или записано в локальный журнал
+    """
+    if _queue is None or _thread is None or not _thread.is_alive():
+        logger.error("Фоновая запись не запущена, твиты @%s записываются в локальный журнал", username)
+        return append_to_spool(username, name, tweets)
+    _queue.put((username, name, list(tweets), time.monotonic()))
+    _update_stats(enqueued_accounts=1)
+    return True
+
+
+def flush_db_writer():
+    """Ждет, пока все поставленные в очередь аккаунты будут записаны"""
+    if _queue is not None and _thread is not None and _thread.is_alive():
+        _queue.join()
+
+
+def stop_db_writer(timeout=60):
+    """Дописывает очередь и останавливает поток записи"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            return
+        if _thread.is_alive():
+            _queue.put(_STOP)
+            _thread.join(timeout)
+            if _thread.is_alive():
+                logger.error("Фоновая запись не завершилась за %s сек, в очереди: %s", timeout, _queue.qsize())
+        _thread = None
+
+
+def get_db_writer_stats():
+    """
+    Возвращает статистику фоновой записи
+
+    Returns:
+        dict: queue_depth, счетчики аккаунтов/твитов/пакетов/повторов,
+              avg_write_time, max_write_time и max_queue_wait (в секундах)
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["queue_depth"] = _queue.qsize() if _queue is not None else 0
+    stats["avg_write_time"] = stats["total_write_time"] / stats["batches"] if stats["batches"] else 0.0
+    return stats
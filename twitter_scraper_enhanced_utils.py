@@ -32,11 +32,11 @@ for directory in required_dirs:
     if not os.path.exists(directory):
         try:
             os.makedirs(directory, exist_ok=True)
-            logger.debug(f"Создана директория: {directory}")
+            logger.debug("Создана директория: %s", directory)
         except OSError as e:
-             logger.error(f"Не удалось создать директорию {directory}: {e}")
+             logger.error("Не удалось создать директорию %s: %s", directory, e)
     else:
-         logger.debug(f"Директория существует: {directory}")
+         logger.debug("Директория существует: %s", directory)
 
 
 # --- Импорт функций для работы с ссылками удален ---
@@ -75,7 +75,7 @@ try:
     )
     logger.info("Импортированы функции для работы с ретвитами")
 except ImportError as e:
-    logger.error(f"Ошибка при импорте функций для работы с ретвитами: {e}")
+    logger.error("Ошибка при импорте функций для работы с ретвитами: %s", e)
     # Добавляем заглушки, если импорт не удался, чтобы основной скрипт не падал
     def extract_retweet_info_enhanced(tweet_element):
         logger.warning("Используется заглушка extract_retweet_info_enhanced")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для чтения ответов GraphQL (UserTweets), которые страница профиля X
+загружает сама при скроллинге. Ответы перехватываются через журнал
+производительности Chrome (DevTools Network) и содержат точные ID,
+полный текст, счетчики и структуру ретвитов/цитат.
+Для работы браузер должен быть запущен с initialize_browser(..., capture_network=True).
+"""
+
+import re
+import json
+import html
+import logging
+import datetime
+
+from twitter_scraper_snapshot import BASE_URL
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.graphql')
+
+# Операции GraphQL с лентой профиля
+TIMELINE_OPERATIONS = ("UserTweets",)
+GRAPHQL_URL_RE = re.compile(r'/graphql/[^/]+/(\w+)')
+
+
+def drain_network_log(driver):
+    """Очищает накопленный журнал производительности (перед переходом на новую страницу)"""
+    try:
+        driver.get_log('performance')
+    except Exception as e:
+        logger.debug("Журнал производительности недоступен: %s", e)
+
+
+def collect_graphql_responses(driver, operations=TIMELINE_OPERATIONS):
+    """
+    Читает из журнала производительности ответы GraphQL нужных операций
+    и загружает их тела через Network.getResponseBody.
+
+    Args:
+        driver: Экземпляр Selenium WebDriver с включенным журналом 'performance'
+        operations: Имена операций GraphQL
+
+    Returns:
+        list: Список разобранных JSON-ответов или None, если журнал недоступен
+    """
+    try:
+        entries = driver.get_log('performance')
+    except Exception as e:
+        logger.warning("Журнал производительности недоступен (перехват сети не включен?): %s", e)
+        return None
+
+    payloads = []
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+            if message.get("method") != "Network.responseReceived":
+                continue
+            params = message.get("params", {})
+            url = params.get("response", {}).get("url", "")
+            match = GRAPHQL_URL_RE.search(url)
+            if not match or match.group(1) not in operations:
+                continue
+
+            body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params["requestId"]})
+            payloads.append(json.loads(body.get("body", "")))
+            logger.info("Перехвачен ответ GraphQL %s", match.group(1))
+        except Exception as e:
+            # Тело может быть уже выгружено браузером или ответ не JSON
+            logger.debug("Не удалось прочитать ответ GraphQL: %s", e)
+
+    return payloads
+
+
+def _iter_instructions(payload):
+    """Возвращает инструкции ленты (разные версии схемы: timeline и timeline_v2)"""
+    user_result = (payload.get("data", {}).get("user", {}) or {}).get("result", {}) or {}
+    for key in ("timeline", "timeline_v2"):
+        timeline = (user_result.get(key) or {}).get("timeline") or {}
+        if timeline.get("instructions"):
+            return timeline["instructions"]
+    return []
+
+
+def _iter_entry_results(entry):
+    """Возвращает tweet_results.result для записи ленты (одиночной или модуля-ветки)"""
+    content = entry.get("content", {}) or {}
+    item_content = content.get("itemContent")
+    if item_content:
+        yield (item_content.get("tweet_results") or {}).get("result")
+    for item in content.get("items", []) or []:
+        item_content = (item.get("item") or {}).get("itemContent") or {}
+        yield (item_content.get("tweet_results") or {}).get("result")
+
+
+def _unwrap_tweet(result):
+    """Разворачивает TweetWithVisibilityResults в обычный Tweet"""
+    if not result:
+        return None
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        return result.get("tweet")
+    return result
+
+
+def _screen_name(tweet):
+    """Handle автора твита (новая схема: core.screen_name, старая: legacy.screen_name)"""
+    user = ((tweet.get("core") or {}).get("user_results") or {}).get("result") or {}
+    return (user.get("core") or {}).get("screen_name") or (user.get("legacy") or {}).get("screen_name")
+
+
+def _full_text(tweet):
+    """Полный текст твита: note_tweet для длинных твитов, иначе legacy.full_text"""
+    note = ((tweet.get("note_tweet") or {}).get("note_tweet_results") or {}).get("result") or {}
+    text = note.get("text") or (tweet.get("legacy") or {}).get("full_text", "")
+    return html.unescape(text)
+
+
+def _iso_created_at(created_at):
+    """'Wed Apr 30 20:00:14 +0000 2025' -> '2025-04-30T20:00:14.000Z' (как time[datetime])"""
+    try:
+        dt = datetime.datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
+        return dt.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    except (TypeError, ValueError):
+        return created_at or ""
+
+
+def parse_tweet_result(result):
+    """
+    Преобразует tweet_results.result в словарь твита формата get_tweets_with_selenium.
+    Для ретвитов (как и в DOM) берутся ID, текст и счетчики оригинального твита.
+
+    Returns:
+        dict: Данные твита или None
+    """
+    tweet = _unwrap_tweet(result)
+    if not tweet or tweet.get("__typename") not in (None, "Tweet"):
+        return None
+    legacy = tweet.get("legacy") or {}
+
+    original = _unwrap_tweet((legacy.get("retweeted_status_result") or {}).get("result"))
+    is_retweet = original is not None
+    source = original if is_retweet else tweet
+    source_legacy = source.get("legacy") or {}
+
+    tweet_id = source.get("rest_id") or source_legacy.get("id_str")
+    author = _screen_name(source)
+    if not tweet_id or not author:
+        return None
+
+    return {
+        "text": _full_text(source),
+        "created_at": _iso_created_at(source_legacy.get("created_at")),
+        "url": f"{BASE_URL}/{author}/status/{tweet_id}",
+        "stats": {
+            "likes": source_legacy.get("favorite_count", 0),
+            "retweets": source_legacy.get("retweet_count", 0),
+            "replies": source_legacy.get("reply_count", 0),
+        },
+        "is_retweet": is_retweet,
+        "original_author": author if is_retweet else None,
+        "is_truncated": False,
+        "is_pinned": False,
+    }
+
+
+def parse_user_tweets_payload(payload):
+    """
+    Извлекает твиты из ответа GraphQL UserTweets (включая закрепленный твит).
+
+    Returns:
+        list: Список словарей твитов в порядке ленты
+    """
+    records = []
+    for instruction in _iter_instructions(payload):
+        entries = instruction.get("entries") or []
+        if instruction.get("entry"):
+            entries = [instruction["entry"]]
+        is_pin_instruction = instruction.get("type") == "TimelinePinEntry"
+        for entry in entries:
+            for result in _iter_entry_results(entry):
+                try:
+                    record = parse_tweet_result(result)
+                except Exception as e:
+                    logger.warning("Ошибка при разборе твита из ответа GraphQL: %s", e)
+                    continue
+                if record:
+                    record["is_pinned"] = is_pin_instruction
+                    records.append(record)
+    return records
+
+
+def collect_timeline_tweets(driver):
+    """
+    Собирает твиты из всех ответов UserTweets, полученных с последнего вызова.
+
+    Returns:
+        list: Список словарей твитов или None, если перехват сети недоступен
+    """
+    payloads = collect_graphql_responses(driver)
+    if payloads is None:
+        return None
+    records = []
+    for payload in payloads:
+        records.extend(parse_user_tweets_payload(payload))
+    logger.info("Из ответов GraphQL извлечено %s твитов", len(records))
+    return records
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для архива HTML-снимков страниц профилей (для отладки разбора).
+Скрапер передает уже полученный page_source и сразу продолжает работу; фоновый поток
+сжимает снимок (zstd, если установлен пакет zstandard, иначе gzip), пропускает
+страницы, совпадающие по хешу с уже сохраненными, и хранит для каждого аккаунта
+не больше HTML_ARCHIVE_KEEP последних снимков с отметкой времени.
+Снимки читаются обратно через read_snapshot / latest_snapshot (офлайн-разбор
+в twitter_scraper_snapshot).
+"""
+
+import os
+import gzip
+import time
+import queue
+import hashlib
+import logging
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.html_archive')
+
+HTML_ARCHIVE_KEEP = 5  # Снимков на аккаунт (более старые удаляются)
+HTML_ARCHIVE_SAMPLE_EVERY = 1  # Сохранять каждую N-ю загрузку профиля аккаунта (1 - каждую)
+HTML_ARCHIVE_QUEUE_SIZE = 16  # При заполненной очереди снимок пропускается, а не задерживает скрапер
+
+_STOP = object()
+
+_queue = None
+_thread = None
+_lock = threading.Lock()
+_page_counters = {}  # username -> количество загрузок профиля (для выборки)
+_stats = {"queued": 0, "sampled_out": 0, "dropped": 0, "duplicates": 0, "written": 0,
+          "raw_bytes": 0, "compressed_bytes": 0}
+
+
+def _compress(data):
+    """Сжимает данные: (байты, расширение файла)"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), ".html.zst"
+    return gzip.compress(data, compresslevel=6), ".html.gz"
+
+
+def _is_snapshot_suffix(suffix):
+    """Проверяет, что после имени аккаунта идет ровно {время}_{хеш} (имя другого аккаунта может начинаться так же)"""
+    parts = suffix.split("_")
+    return len(parts) == 2 and len(parts[0]) == 14 and parts[0].isdigit()
+
+
+def _account_snapshots(archive_dir, username):
+    """Снимки аккаунта от старых к новым (имя файла: {username}_{время}_{хеш}.html.*)"""
+    prefix = f"{username}_"
+    try:
+        names = [name for name in os.listdir(archive_dir)
+                 if name.startswith(prefix) and ".html" in name and not name.endswith(".tmp")
+                 and _is_snapshot_suffix(name[len(prefix):])]
+    except OSError:
+        return []
+    return sorted(names)
+
+
+def latest_snapshot(archive_dir, username):
+    """
+    Путь к последнему снимку аккаунта в архиве
+
+    Args:
+        archive_dir: Директория архива
+        username: Имя пользователя Twitter
+
+    Returns:
+        str: Путь к файлу или None, если снимков нет
+    """
+    snapshots = _account_snapshots(archive_dir, username)
+    return os.path.join(archive_dir, snapshots[-1]) if snapshots else None
+
+
+def snapshot_username(file_name):
+    """Имя аккаунта из имени файла снимка ({username}_{время}_{хеш}.html.*) или None"""
+    base_name = os.path.basename(file_name).split(".html")[0]
+    parts = base_name.rsplit("_", 2)
+    if len(parts) == 3 and _is_snapshot_suffix(f"{parts[1]}_{parts[2]}"):
+        return parts[0]
+    return None
+
+
+def read_snapshot(path):
+    """
+    Читает HTML-снимок: несжатый .html, .html.gz или .html.zst
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        str: HTML страницы
+    """
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"для чтения {path} нужен пакет zstandard")
+        with open(path, "rb") as f:
+            data = zstandard.ZstdDecompressor().stream_reader(f).read()
+    elif path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            data = f.read()
+    else:
+        with open(path, "rb") as f:
+            data = f.read()
+    return data.decode("utf-8")
+
+
+def _write_snapshot(archive_dir, username, page_source, captured_at):
+    """Сохраняет снимок, если такого содержимого у аккаунта еще нет, и удаляет лишние старые"""
+    data = page_source.encode("utf-8")
+    content_hash = hashlib.sha256(data).hexdigest()[:16]
+    snapshots = _account_snapshots(archive_dir, username)
+    if any(name.split("_")[-1].split(".")[0] == content_hash for name in snapshots[-HTML_ARCHIVE_KEEP:]):
+        with _lock:
+            _stats["duplicates"] += 1
+        return
+
+    compressed, extension = _compress(data)
+    os.makedirs(archive_dir, exist_ok=True)
+    name = f"{username}_{time.strftime('%Y%m%d%H%M%S', time.gmtime(captured_at))}_{content_hash}{extension}"
+    path = os.path.join(archive_dir, name)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(compressed)
+    os.replace(temp_path, path)
+    with _lock:
+        _stats["written"] += 1
+        _stats["raw_bytes"] += len(data)
+        _stats["compressed_bytes"] += len(compressed)
+    logger.info("HTML-снимок @%s сохранен: %s (%s -> %s байт)", username, path, len(data), len(compressed))
+
+    snapshots.append(name)
+    for old_name in snapshots[:-HTML_ARCHIVE_KEEP]:
+        try:
+            os.remove(os.path.join(archive_dir, old_name))
+        except OSError as e:
+            logger.warning("Не удалось удалить старый HTML-снимок %s: %s", old_name, e)
+
+
+def _archive_loop():
+    """Записывает снимки из очереди, пока не получит _STOP"""
+    while True:
+        item = _queue.get()
+        try:
+            if item is _STOP:
+                break
+            try:
+                _write_snapshot(*item)
+            except Exception as e:
+                logger.error("Не удалось сохранить HTML-снимок @%s: %s", item[1], e)
+        finally:
+            _queue.task_done()
+
+
+def _ensure_started():
+    """Запускает фоновый поток записи при первом снимке; вызывается под _lock"""
+    global _queue, _thread
+    if _thread is None or not _thread.is_alive():
+        _queue = queue.Queue(maxsize=HTML_ARCHIVE_QUEUE_SIZE)
+        _thread = threading.Thread(target=_archive_loop, name="twitter-html-archive", daemon=True)
+        _thread.start()
+
+
+def archive_page_source(username, page_source, archive_dir, sample_every=None):
+    """
+    Передает снимок страницы фоновому потоку (не блокируется)
+
+    Args:
+        username: Имя пользователя Twitter
+        page_source: HTML страницы (уже полученный driver.page_source)
+        archive_dir: Директория архива
+        sample_every: Сохранять каждую N-ю загрузку профиля (по умолчанию HTML_ARCHIVE_SAMPLE_EVERY; 0 - не сохранять)
+
+    Returns:
+        bool: Поставлен ли снимок в очередь
+    """
+    if sample_every is None:
+        sample_every = HTML_ARCHIVE_SAMPLE_EVERY
+    if not archive_dir or not page_source or not sample_every:
+        return False
+
+    with _lock:
+        count = _page_counters.get(username, 0)
+        _page_counters[username] = count + 1
+        if count % sample_every:
+            _stats["sampled_out"] += 1
+            return False
+        _ensure_started()
+        try:
+            _queue.put_nowait((archive_dir, username, page_source, time.time()))
+        except queue.Full:
+            _stats["dropped"] += 1
+            logger.warning("Очередь HTML-снимков заполнена, снимок @%s пропущен", username)
+            return False
+        _stats["queued"] += 1
+    return True
+
+
+def stop_html_archiver(timeout=30):
+    """Дописывает очередь снимков и останавливает поток"""
+    global _thread
+    with _lock:
+        thread = _thread
+        _thread = None
+    if thread is None or not thread.is_alive():
+        return
+    _queue.put(_STOP)
+    thread.join(timeout)
+    if thread.is_alive():
+        logger.error("Запись HTML-снимков не завершилась за %s сек", timeout)
+
+
+def get_html_archive_stats():
+    """
+    Возвращает статистику архива
+
+    Returns:
+        dict: queued, sampled_out, dropped, duplicates, written, raw_bytes, compressed_bytes
+    """
+    with _lock:
+        return dict(_stats)
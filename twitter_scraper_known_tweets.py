@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для предварительной загрузки ID твитов аккаунта, уже сохраненных в MySQL.
+ID за окно сбора загружаются одним запросом (по индексу (user_id, created_at))
+в множество, а для крупных аккаунтов - в фильтр Блума. Известные твиты идут
+по короткому пути: только обновление счетчиков, без запросов к API и раскрытия текста.
+"""
+
+import math
+import logging
+import datetime
+
+from mysql.connector import Error
+
+from twitter_scraper_db import get_pooled_connection
+from twitter_scraper_user_cache import get_cached_user
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.known_tweets')
+
+# Начиная с этого количества ID хранятся в фильтре Блума. В окне 24 ч даже активные
+# аккаунты набирают сотни твитов, так что фильтр нужен в основном при time_filter_hours=None
+KNOWN_IDS_BLOOM_THRESHOLD = 5000
+KNOWN_IDS_BLOOM_FP_RATE = 0.001  # Допустимая доля ложных срабатываний фильтра
+
+_MASK64 = (1 << 64) - 1
+
+
+def _bloom_hashes(tweet_id, size, hash_count):
+    """Позиции битов для ID (двойное хеширование по 64-битному перемешиванию)"""
+    h1 = (tweet_id * 0x9E3779B97F4A7C15) & _MASK64
+    h1 ^= h1 >> 31
+    h2 = ((tweet_id ^ (tweet_id >> 29)) * 0xBF58476D1CE4E5B9) & _MASK64 | 1
+    return [(h1 + i * h2) % size for i in range(hash_count)]
+
+
+def build_bloom_filter(tweet_ids, fp_rate=KNOWN_IDS_BLOOM_FP_RATE):
+    """
+    Строит фильтр Блума по списку числовых ID
+
+    Returns:
+        function: tweet_id -> bool (возможны ложные срабатывания с долей около fp_rate)
+    """
+    count = max(len(tweet_ids), 1)
+    size = max(int(-count * math.log(fp_rate) / (math.log(2) ** 2)), 8)
+    hash_count = max(int(round(size / count * math.log(2))), 1)
+    bits = bytearray((size + 7) // 8)
+    for tweet_id in tweet_ids:
+        for position in _bloom_hashes(tweet_id, size, hash_count):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def contains(tweet_id):
+        tweet_id = int(tweet_id)
+        return all(bits[position >> 3] & (1 << (position & 7))
+                   for position in _bloom_hashes(tweet_id, size, hash_count))
+
+    logger.info("Фильтр Блума: %s ID, %s байт, %s хеш-функций", len(tweet_ids), len(bits), hash_count)
+    return contains
+
+
+def load_known_tweet_ids(username, time_filter_hours, connection=None):
+    """
+    Загружает ID твитов аккаунта за последние time_filter_hours часов, уже сохраненных в базе
+
+    Args:
+        username: Имя пользователя Twitter
+        time_filter_hours: Окно сбора в часах (None - все твиты аккаунта)
+        connection: Соединение с MySQL (если не указано, берется из пула на время запроса)
+
+    Returns:
+        tuple: (функция tweet_id -> bool, количество ID); при ошибке - (None, 0)
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_pooled_connection()
+        if connection is None:
+            return None, 0
+
+    cached_user = get_cached_user(username)
+    if cached_user is not None:
+        query = "SELECT t.tweet_id FROM tweets t WHERE t.user_id = %s"
+        params = [cached_user[0]]
+    else:
+        query = "SELECT t.tweet_id FROM tweets t JOIN users u ON u.id = t.user_id WHERE u.username = %s"
+        params = [username]
+    if time_filter_hours:
+        since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=time_filter_hours)
+        query += " AND t.created_at >= %s"
+        params.append(since.strftime('%Y-%m-%d %H:%M:%S'))
+
+    try:
+        cursor = connection.cursor(raw=True)
+        cursor.execute(query, params)
+        tweet_ids = [int(row[0]) for row in cursor.fetchall()]
+        cursor.close()
+    except Error as e:
+        logger.error("Не удалось загрузить сохраненные твиты @%s: %s", username, e)
+        return None, 0
+    finally:
+        if own_connection:
+            connection.close()
+
+    if len(tweet_ids) >= KNOWN_IDS_BLOOM_THRESHOLD:
+        contains = build_bloom_filter(tweet_ids)
+    else:
+        known = set(tweet_ids)
+        contains = lambda tweet_id: int(tweet_id) in known
+    logger.info("Загружено %s сохраненных твитов @%s", len(tweet_ids), username)
+    return contains, len(tweet_ids)
+
+
+def make_known_tweet_predicate(high_water_mark=None, is_saved_tweet=None):
+    """
+    Объединяет отметку инкрементального сбора и сохраненные в базе ID в одну проверку
+
+    Args:
+        high_water_mark: ID самого нового твита прошлого цикла (None - без отметки)
+        is_saved_tweet: Функция tweet_id -> bool из load_known_tweet_ids (None - без нее)
+
+    Returns:
+        function: tweet_id -> bool или None, если проверять нечего
+    """
+    if not high_water_mark and is_saved_tweet is None:
+        return None
+
+    def is_known_tweet(tweet_id):
+        if high_water_mark and str(tweet_id).isdigit() and int(tweet_id) <= high_water_mark:
+            return True
+        return is_saved_tweet is not None and is_saved_tweet(tweet_id)
+
+    return is_known_tweet
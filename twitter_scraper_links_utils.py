@@ -13,14 +13,23 @@ import logging
 # import requests
 # from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 # mysql.connector больше не нужен
 # from mysql.connector import Error
 import time
 
+from twitter_api_client import submit_tweet_fetch, process_api_tweet_data
+from twitter_scraper_snapshot import extract_tweet_id
+from twitter_scraper_utils import is_lightweight_browser, apply_resource_blocking
+
 # Настройка логирования
 logger = logging.getLogger('twitter_scraper.links')
 
 # Константы
+# Отложенное получение полного текста обрезанных твитов (после прохода по ленте)
+FULL_TEXT_PAGE_TIMEOUT = 15  # Ожидание текста твита на его странице (сек)
+FULL_TEXT_EXPAND_TIMEOUT = 5  # Ожидание раскрытия после клика "Show more" (сек)
 # LINKS_CACHE_DIR больше не нужен
 # LINKS_CACHE_DIR = "twitter_links_cache"
 # os.makedirs(LINKS_CACHE_DIR, exist_ok=True)
@@ -60,7 +69,7 @@ def is_tweet_truncated(tweet_element):
                     # Проверяем наличие многоточия в тексте элемента
                     try:
                         if '…' in elem.text or '...' in elem.text:
-                            logger.info(f"Обнаружен обрезанный твит (класс: {class_name})")
+                            logger.info("Обнаружен обрезанный твит (класс: %s)", class_name)
                             return True
                     except: # Игнорируем ошибки StaleElementReferenceException
                         pass
@@ -75,7 +84,7 @@ def is_tweet_truncated(tweet_element):
             try:
                 elements = tweet_element.find_elements(By.XPATH, xpath)
                 if elements:
-                    logger.info(f"Обнаружен обрезанный твит (кнопка: {xpath})")
+                    logger.info("Обнаружен обрезанный твит (кнопка: %s)", xpath)
                     return True
             except: # Игнорируем ошибки StaleElementReferenceException
                  pass
@@ -100,7 +109,7 @@ def is_tweet_truncated(tweet_element):
                 try:
                     href = link.get_attribute('href')
                     if href and ('/status/' in href) and ('s=20' in href or 's=19' in href):
-                        logger.info(f"Обнаружен обрезанный твит (параметр s= в URL)")
+                        logger.info("Обнаружен обрезанный твит (параметр s= в URL)")
                         return True
                 except: # Игнорируем ошибки StaleElementReferenceException
                     pass
@@ -112,7 +121,7 @@ def is_tweet_truncated(tweet_element):
     except Exception as e:
         # Логируем только если ошибка не StaleElementReferenceException
         if "stale element reference" not in str(e).lower():
-             logger.error(f"Ошибка при проверке обрезанности твита: {e}")
+             logger.error("Ошибка при проверке обрезанности твита: %s", e)
         return False
 
 
@@ -128,7 +137,7 @@ def get_full_tweet_text(driver, tweet_url, max_attempts=3):
     try:
         # Очищаем URL от параметров запроса
         clean_url = tweet_url.split('?')[0].split('#')[0]
-        logger.info(f"Загружаем полную версию твита: {clean_url}")
+        logger.info("Загружаем полную версию твита: %s", clean_url)
 
         current_window = driver.current_window_handle
 
@@ -185,12 +194,12 @@ def get_full_tweet_text(driver, tweet_url, max_attempts=3):
                                 clicked_show_more = True
                                 break # Выходим из внутреннего цикла по кнопкам
                             except Exception as e:
-                                logger.debug(f"Не удалось кликнуть на кнопку: {e}")
+                                logger.debug("Не удалось кликнуть на кнопку: %s", e)
                         if clicked_show_more:
                             break # Выходим из цикла по селекторам
 
             except Exception as e:
-                logger.debug(f"Ошибка при поиске кнопок Show more: {e}")
+                logger.debug("Ошибка при поиске кнопок Show more: %s", e)
 
             # 2. Извлекаем текст после попыток раскрытия
             all_text_elements = []
@@ -227,11 +236,11 @@ def get_full_tweet_text(driver, tweet_url, max_attempts=3):
             if current_text and not current_text.endswith('…') and not current_text.endswith('...'):
                 if len(current_text) > len(full_text):
                     full_text = current_text
-                    logger.info(f"Найден полный текст длиной {len(full_text)} символов (Попытка {attempt+1})")
+                    logger.info("Найден полный текст длиной %s символов (Попытка %s)", len(full_text), attempt+1)
                 break # Полный текст найден
             elif len(current_text) > len(full_text):
                 full_text = current_text # Сохраняем самый длинный найденный текст
-                logger.info(f"Найден частично раскрытый текст ({len(full_text)} символов), пробуем еще раз")
+                logger.info("Найден частично раскрытый текст (%s символов), пробуем еще раз", len(full_text))
 
             # Дополнительно прокручиваем страницу и ждем раскрытия
             if attempt < max_attempts - 1: # Не делаем на последней попытке
@@ -261,9 +270,9 @@ def get_full_tweet_text(driver, tweet_url, max_attempts=3):
 
             if js_text and len(js_text) > len(full_text):
                 full_text = js_text
-                logger.info(f"Извлечен текст через JavaScript: {len(full_text)} символов")
+                logger.info("Извлечен текст через JavaScript: %s символов", len(full_text))
         except Exception as e:
-            logger.debug(f"Не удалось извлечь текст через JavaScript: {e}")
+            logger.debug("Не удалось извлечь текст через JavaScript: %s", e)
 
         # Закрываем вкладку и возвращаемся
         driver.close()
@@ -271,14 +280,14 @@ def get_full_tweet_text(driver, tweet_url, max_attempts=3):
         driver.switch_to.window(current_window)
 
         if not full_text:
-            logger.warning(f"Не удалось извлечь текст твита по URL: {tweet_url}")
+            logger.warning("Не удалось извлечь текст твита по URL: %s", tweet_url)
         else:
-            logger.info(f"Итоговый извлеченный текст: {len(full_text)} символов")
+            logger.info("Итоговый извлеченный текст: %s символов", len(full_text))
 
         return full_text
 
     except Exception as e:
-        logger.error(f"Ошибка при получении полного текста твита: {e}")
+        logger.error("Ошибка при получении полного текста твита: %s", e)
         import traceback
         traceback.print_exc()
 
@@ -337,7 +346,7 @@ def extract_full_tweet_text_from_html(driver, tweet_url):
             if text_parts:
                 full_text = ' '.join(text_parts)
         except Exception as e:
-            logger.warning(f"Ошибка при извлечении текста методом 1 (HTML): {e}")
+            logger.warning("Ошибка при извлечении текста методом 1 (HTML): %s", e)
 
         # Если первый метод не сработал, пробуем другой
         if not full_text:
@@ -356,7 +365,7 @@ def extract_full_tweet_text_from_html(driver, tweet_url):
                 if len(temp_text.strip()) > len(full_text):
                     full_text = temp_text.strip()
             except Exception as e:
-                logger.warning(f"Ошибка при извлечении текста методом 2 (HTML): {e}")
+                logger.warning("Ошибка при извлечении текста методом 2 (HTML): %s", e)
 
         # Третий метод - используем JavaScript для извлечения текста
         if not full_text or len(full_text) < 50:
@@ -382,7 +391,7 @@ def extract_full_tweet_text_from_html(driver, tweet_url):
                 if js_text and len(js_text) > len(full_text):
                     full_text = js_text
             except Exception as e:
-                logger.warning(f"Ошибка при извлечении текста через JavaScript (HTML): {e}")
+                logger.warning("Ошибка при извлечении текста через JavaScript (HTML): %s", e)
 
         # Закрываем вкладку и возвращаемся
         driver.close()
@@ -392,7 +401,7 @@ def extract_full_tweet_text_from_html(driver, tweet_url):
         return full_text
 
     except Exception as e:
-        logger.error(f"Общая ошибка при извлечении текста твита (HTML): {e}")
+        logger.error("Общая ошибка при извлечении текста твита (HTML): %s", e)
         try:
             if opened_new_window:
                 driver.close()
@@ -401,3 +410,142 @@ def extract_full_tweet_text_from_html(driver, tweet_url):
         except:
             pass
         return full_text
+
+
+# Текст основного твита на странице /status/<id>: статья со ссылкой на этот ID
+# (или первая статья); если текст свернут - кликает "Show more" и возвращает null
+READ_STATUS_TEXT_JS = r"""
+const tweetId = arguments[0];
+const expand = arguments[1];
+const articles = Array.from(document.querySelectorAll('article[data-testid="tweet"]'));
+if (!articles.length) return null;
+const article = articles.find(a => a.querySelector('a[href*="/status/' + tweetId + '"]')) || articles[0];
+const showMore = article.querySelector('[data-testid="tweet-text-show-more-link"]');
+if (showMore) {
+    if (expand) showMore.click();
+    return null;
+}
+const textEl = article.querySelector('div[data-testid="tweetText"]');
+return textEl ? textEl.innerText.trim() : null;
+"""
+
+
+def _read_status_text(driver, tweet_id):
+    """
+    Ждет текст твита на открытой странице твита (без фиксированных пауз):
+    до появления статьи, затем до исчезновения ссылки "Show more" после клика
+    """
+    try:
+        WebDriverWait(driver, FULL_TEXT_PAGE_TIMEOUT).until(
+            lambda d: d.execute_script(READ_STATUS_TEXT_JS, tweet_id, False) is not None
+            or d.find_elements(By.CSS_SELECTOR, '[data-testid="tweet-text-show-more-link"]')
+        )
+        # Пустой текст (твит только с медиа) - тоже результат, ждем только null (ссылка "Show more" еще на месте)
+        status_text = {}
+
+        def text_ready(d):
+            text = d.execute_script(READ_STATUS_TEXT_JS, tweet_id, True)
+            if text is None:
+                return False
+            status_text["text"] = text
+            return True
+
+        WebDriverWait(driver, FULL_TEXT_EXPAND_TIMEOUT).until(text_ready)
+        return status_text["text"]
+    except TimeoutException:
+        logger.warning("Таймаут ожидания текста твита %s", tweet_id)
+        return ""
+
+
+def fetch_full_texts_in_tab(driver, tweet_urls):
+    """
+    Загружает страницы твитов по очереди в одной отдельной вкладке
+    (вкладка открывается один раз, лента в основной вкладке не трогается)
+
+    Args:
+        driver: Экземпляр Selenium WebDriver
+        tweet_urls: Список URL твитов
+
+    Returns:
+        dict: {url: полный текст} для успешно прочитанных твитов
+    """
+    texts = {}
+    if not tweet_urls:
+        return texts
+
+    main_window = driver.current_window_handle
+    worker_window = None
+    try:
+        driver.switch_to.new_window('tab')
+        worker_window = driver.current_window_handle
+        # Блокировка через DevTools действует на вкладку - повторяем ее для новой
+        if is_lightweight_browser(driver):
+            try:
+                apply_resource_blocking(driver)
+            except Exception as e:
+                logger.warning("Не удалось включить блокировку ресурсов во вкладке полного текста: %s", e)
+        for tweet_url in tweet_urls:
+            tweet_id = extract_tweet_id(tweet_url)
+            try:
+                driver.get(tweet_url.split('?')[0].split('#')[0])
+                text = _read_status_text(driver, tweet_id)
+                if text:
+                    texts[tweet_url] = text
+            except Exception as e:
+                logger.warning("Не удалось получить полный текст твита %s: %s", tweet_url, e)
+    except Exception as e:
+        logger.error("Ошибка вкладки для получения полного текста: %s", e)
+    finally:
+        try:
+            if worker_window:
+                driver.close()
+            driver.switch_to.window(main_window)
+        except Exception as e:
+            logger.error("Не удалось вернуться к основной вкладке: %s", e)
+    return texts
+
+
+def resolve_truncated_tweets(driver, tweets, use_browser=True):
+    """
+    Получает полный текст обрезанных твитов после прохода по ленте:
+    сначала параллельно через API (общий пул twitter_api_client, ответ кэша любого
+    возраста подходит), затем оставшиеся - через отдельную вкладку браузера.
+    Полный текст записывается прямо в словари твитов.
+
+    Args:
+        driver: Экземпляр Selenium WebDriver
+        tweets: Список словарей твитов (обрабатываются те, у которых is_truncated)
+        use_browser: Открывать ли страницы твитов, не полученных через API
+
+    Returns:
+        list: Твиты, текст которых был дополнен
+    """
+    pending = [tweet for tweet in tweets if tweet.get("is_truncated") and extract_tweet_id(tweet.get("url"))]
+    if not pending:
+        return []
+    logger.info("Получение полного текста для %s обрезанных твитов", len(pending))
+
+    resolved = []
+    remaining = []
+    futures = [(tweet, submit_tweet_fetch(extract_tweet_id(tweet["url"]), require_fresh_counts=False))
+               for tweet in pending]
+    for tweet, future in futures:
+        api_tweet = process_api_tweet_data(future.result(), tweet["url"])
+        if api_tweet and len(api_tweet.get("text", "")) > len(tweet.get("text", "")):
+            tweet["text"] = api_tweet["text"]
+            tweet["is_truncated"] = False
+            resolved.append(tweet)
+        else:
+            remaining.append(tweet)
+
+    if remaining and use_browser and driver:
+        texts = fetch_full_texts_in_tab(driver, [tweet["url"] for tweet in remaining])
+        for tweet in remaining:
+            text = texts.get(tweet["url"], "")
+            if len(text) > len(tweet.get("text", "")):
+                tweet["text"] = text
+                tweet["is_truncated"] = False
+                resolved.append(tweet)
+
+    logger.info("Полный текст получен для %s из %s обрезанных твитов", len(resolved), len(pending))
+    return resolved
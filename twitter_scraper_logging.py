@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для настройки логирования скрапера.
+Все логгеры пишут через QueueHandler в очередь, а файл и консоль обслуживает
+отдельный поток QueueListener, поэтому запись на диск не задерживает скрапинг.
+Уровни задаются для каждого модуля (twitter_scraper.<модуль>); отладочные сообщения
+включаются во время работы через set_debug (или сигналом SIGUSR1) и при выключенном уровне DEBUG не форматируются.
+В консоль выводятся сообщения основного скрипта (логгер twitter_scraper) от INFO и ошибки всех модулей.
+"""
+
+import sys
+import queue
+import signal
+import logging
+import threading
+import logging.handlers
+
+LOG_FILE = 'twitter_scraper.log'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEBUG_CONSOLE_FORMAT = '[ОТЛАДКА] %(name)s: %(message)s'
+CONSOLE_FORMAT = '%(message)s'
+LOG_LEVEL = logging.INFO
+
+# Уровни отдельных модулей (имя логгера -> уровень), например {'twitter_scraper.db': logging.WARNING}
+LOG_MODULE_LEVELS = {}
+
+_root_name = 'twitter_scraper'
+_listener = None
+_console_handler = None
+_debug_console_handler = None
+_debug_enabled = False
+_lock = threading.Lock()
+
+
+def setup_logging(log_file=LOG_FILE, level=LOG_LEVEL, module_levels=None, debug=False):
+    """
+    Настраивает неблокирующее логирование (повторный вызов ничего не делает)
+
+    Args:
+        log_file: Файл лога (дописывается)
+        level: Уровень по умолчанию для логгеров twitter_scraper.*
+        module_levels: Уровни отдельных модулей (дополняют LOG_MODULE_LEVELS)
+        debug: Включить отладочный вывод сразу (см. set_debug)
+    """
+    global _listener, _console_handler, _debug_console_handler, LOG_LEVEL
+    with _lock:
+        if _listener is not None:
+            return
+        LOG_LEVEL = level
+        file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        # Ход работы основного скрипта и ошибки модулей - в консоль (вместо print)
+        _console_handler = logging.StreamHandler(sys.stdout)
+        _console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        _console_handler.setLevel(logging.INFO)
+        _console_handler.addFilter(lambda record: record.levelno >= logging.ERROR or
+                                   (record.name == _root_name and record.levelno >= logging.INFO))
+        # Отладочные сообщения выводятся в консоль, как прежний debug_print
+        _debug_console_handler = logging.StreamHandler(sys.stdout)
+        _debug_console_handler.setFormatter(logging.Formatter(DEBUG_CONSOLE_FORMAT))
+        _debug_console_handler.addFilter(lambda record: record.levelno == logging.DEBUG)
+
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, _console_handler,
+                                                   _debug_console_handler, respect_handler_level=True)
+        _listener.start()
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(logging.INFO)
+
+        for name, module_level in {**LOG_MODULE_LEVELS, **(module_levels or {})}.items():
+            logging.getLogger(name).setLevel(module_level)
+    set_debug(debug)
+
+
+def set_debug(enabled):
+    """
+    Включает или выключает отладочные сообщения во время работы
+
+    Args:
+        enabled: True - уровень DEBUG для логгеров twitter_scraper.*, False - LOG_LEVEL
+    """
+    global _debug_enabled
+    _debug_enabled = bool(enabled)
+    # Уровень задается корневому логгеру скрапера; модули из LOG_MODULE_LEVELS сохраняют свой
+    logging.getLogger(_root_name).setLevel(logging.DEBUG if _debug_enabled else LOG_LEVEL)
+    if _debug_console_handler is not None:
+        _debug_console_handler.setLevel(logging.DEBUG if _debug_enabled else logging.CRITICAL + 1)
+
+
+def is_debug_enabled():
+    """Включены ли отладочные сообщения"""
+    return _debug_enabled
+
+
+def stop_logging():
+    """Дописывает сообщения из очереди и останавливает поток записи"""
+    global _listener
+    with _lock:
+        listener = _listener
+        _listener = None
+    if listener is not None:
+        listener.stop()
+
+
+def install_debug_toggle_signal():
+    """
+    Переключает отладочные сообщения по сигналу SIGUSR1 (kill -USR1 <pid>) без перезапуска скрапера
+
+    Returns:
+        bool: Установлен ли обработчик (на Windows сигнала нет)
+    """
+    if not hasattr(signal, 'SIGUSR1'):
+        return False
+    signal.signal(signal.SIGUSR1, lambda signum, frame: set_debug(not _debug_enabled))
+    return True
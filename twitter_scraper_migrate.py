@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Выполняет миграции схемы MySQL (twitter_scraper_db.SCHEMA_MIGRATIONS) отдельно от скрапера.
+Перестройка tweets в схему v2 идет пакетами и не блокирует запись, поэтому
+ее можно запускать, пока работает сбор предыдущей версии.
+
+Пример: python twitter_scraper_migrate.py --batch-size 5000 --pause 0.1
+"""
+
+import sys
+import logging
+import argparse
+import functools
+
+import mysql.connector
+from mysql.connector import Error
+
+import twitter_scraper_db
+from twitter_scraper_core import MYSQL_CONFIG
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграции схемы MySQL скрапера Twitter")
+    parser.add_argument("--batch-size", type=int, default=twitter_scraper_db.DB_MIGRATION_BATCH_SIZE,
+                        help="Строк за одну транзакцию при копировании таблицы")
+    parser.add_argument("--pause", type=float, default=0.0,
+                        help="Пауза между пакетами в секундах")
+    args = parser.parse_args()
+
+    # Прогресс миграции выводим в консоль (скрапер пишет лог в файл)
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    logging.getLogger('twitter_scraper.db').addHandler(console)
+
+    migrations = []
+    for version, description, statements in twitter_scraper_db.SCHEMA_MIGRATIONS:
+        statements = [
+            functools.partial(statement, batch_size=args.batch_size, pause=args.pause)
+            if statement is twitter_scraper_db.migrate_tweets_v2 else statement
+            for statement in statements
+        ]
+        migrations.append((version, description, statements))
+
+    try:
+        connection = mysql.connector.connect(**MYSQL_CONFIG)
+    except Error as e:
+        print(f"Ошибка при подключении к MySQL: {e}")
+        sys.exit(1)
+
+    try:
+        before = twitter_scraper_db.get_schema_version(connection)
+        after = twitter_scraper_db.run_schema_migrations(connection, migrations)
+        print(f"Версия схемы: {before} -> {after}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для параллельной обработки аккаунтов несколькими браузерами Chrome.
+Каждый воркер работает со своей копией профиля Chrome и своим соединением из пула MySQL,
+аккаунты раздаются из общей очереди, результаты собираются в исходном порядке.
+"""
+
+import os
+import queue
+import shutil
+import logging
+import threading
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.pool')
+
+# Директория для копий профиля Chrome (по одной на воркер)
+WORKER_PROFILES_DIR = "twitter_worker_profiles"
+
+# Файлы и кэши профиля, которые не нужно копировать (блокировки и объемные кэши)
+PROFILE_COPY_IGNORE = shutil.ignore_patterns(
+    'Singleton*', '*.lock', 'lockfile', 'LOCK',
+    'Cache', 'Code Cache', 'GPUCache', 'Service Worker', 'ShaderCache', 'GrShaderCache'
+)
+
+
+def prepare_worker_profile(base_profile_path, worker_index, profiles_dir=WORKER_PROFILES_DIR):
+    """
+    Создает копию профиля Chrome для воркера (Chrome не позволяет двум
+    экземплярам использовать один user-data-dir).
+
+    Args:
+        base_profile_path: Путь к исходному профилю Chrome (с авторизацией)
+        worker_index: Номер воркера
+        profiles_dir: Директория для копий профилей
+
+    Returns:
+        str: Путь к копии профиля или None (будет использован временный профиль)
+    """
+    if not base_profile_path or not os.path.exists(base_profile_path):
+        logger.warning("Исходный профиль Chrome не найден, воркер %s использует временный профиль", worker_index)
+        return None
+
+    worker_profile = os.path.abspath(os.path.join(profiles_dir, f"worker_{worker_index}"))
+    try:
+        # Копируем заново при каждом запуске, чтобы получить свежие cookies авторизации
+        if os.path.exists(worker_profile):
+            shutil.rmtree(worker_profile, ignore_errors=True)
+        shutil.copytree(base_profile_path, worker_profile, ignore=PROFILE_COPY_IGNORE)
+        logger.info("Создана копия профиля Chrome для воркера %s: %s", worker_index, worker_profile)
+        return worker_profile
+    except Exception as e:
+        logger.error("Не удалось скопировать профиль Chrome для воркера %s: %s", worker_index, e)
+        return None
+
+
+def start_browser_workers(num_workers, initialize_browser, chrome_profile_path=None,
+                          profiles_dir=WORKER_PROFILES_DIR, first_index=1, **browser_kwargs):
+    """
+    Запускает дополнительные браузеры Chrome, каждый со своей копией профиля.
+
+    Args:
+        num_workers: Количество браузеров для запуска
+        initialize_browser: Функция инициализации браузера (из twitter_scraper_utils)
+        chrome_profile_path: Путь к исходному профилю Chrome
+        profiles_dir: Директория для копий профилей
+        first_index: Номер первого воркера (0 обычно занят основным браузером)
+        **browser_kwargs: Дополнительные параметры для initialize_browser
+
+    Returns:
+        list: Список успешно запущенных драйверов
+    """
+    drivers = []
+    for worker_index in range(first_index, first_index + num_workers):
+        profile_path = prepare_worker_profile(chrome_profile_path, worker_index, profiles_dir)
+        driver = initialize_browser(profile_path, **browser_kwargs)
+        if driver:
+            drivers.append(driver)
+            logger.info("Браузер воркера %s запущен", worker_index)
+        else:
+            logger.error("Не удалось запустить браузер воркера %s", worker_index)
+    return drivers
+
+
+def stop_browser_workers(drivers):
+    """Закрывает браузеры воркеров"""
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning("Ошибка при закрытии браузера воркера: %s", e)
+
+
+def _worker_loop(worker_index, driver, account_queue, results, results_lock, dependencies,
+                 mysql_config, scrape_kwargs):
+    """Обрабатывает аккаунты из очереди одним браузером, пока очередь не опустеет"""
+    get_tweets_with_selenium = dependencies['get_tweets_with_selenium']
+    initialize_mysql = dependencies.get('initialize_mysql')
+
+    db_connection = None
+    if mysql_config and initialize_mysql:
+        db_connection = initialize_mysql(mysql_config)
+        if not db_connection:
+            logger.warning("Воркер %s: нет подключения к MySQL, данные не будут сохранены в базу", worker_index)
+
+    try:
+        while True:
+            try:
+                position, username = account_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            logger.info("Воркер %s: начало обработки аккаунта @%s", worker_index, username)
+            try:
+                user_data = get_tweets_with_selenium(
+                    username,
+                    driver,
+                    db_connection,
+                    dependencies=dependencies,
+                    **scrape_kwargs
+                )
+            except Exception as e:
+                logger.error("Воркер %s: ошибка при обработке @%s: %s", worker_index, username, e)
+                user_data = {"username": username, "name": username, "tweets": []}
+
+            with results_lock:
+                results[position] = user_data
+            logger.info("Воркер %s: завершена обработка @%s", worker_index, username)
+            account_queue.task_done()
+    finally:
+        if db_connection:
+            db_connection.close()
+            logger.info("Воркер %s: соединение с базой данных возвращено в пул", worker_index)
+
+
+def process_accounts_parallel(accounts, drivers, dependencies, mysql_config=None, **scrape_kwargs):
+    """
+    Обрабатывает аккаунты параллельно: один поток на браузер, общая очередь аккаунтов.
+
+    Args:
+        accounts: Список имен пользователей
+        drivers: Список драйверов Selenium (по одному на воркер)
+        dependencies: Словарь с функциями (из initialize_dependencies)
+        mysql_config: Настройки MySQL; каждый воркер берет свое соединение из пула (twitter_scraper_db)
+        **scrape_kwargs: Параметры для get_tweets_with_selenium (max_tweets, time_filter_hours и т.д.)
+
+    Returns:
+        list: Результаты get_tweets_with_selenium в порядке accounts
+    """
+    account_queue = queue.Queue()
+    for position, username in enumerate(accounts):
+        account_queue.put((position, username))
+
+    results = [None] * len(accounts)
+    results_lock = threading.Lock()
+
+    threads = []
+    for worker_index, driver in enumerate(drivers):
+        thread = threading.Thread(
+            target=_worker_loop,
+            args=(worker_index, driver, account_queue, results, results_lock, dependencies,
+                  mysql_config, scrape_kwargs),
+            name=f"twitter-worker-{worker_index}",
+            daemon=True
+        )
+        threads.append(thread)
+        thread.start()
+
+    logger.info("Запущено %s воркеров для %s аккаунтов", len(threads), len(accounts))
+
+    for thread in threads:
+        thread.join()
+
+    # Аккаунты, которые не успел обработать ни один воркер (например, все браузеры упали)
+    merged = []
+    for position, user_data in enumerate(results):
+        if user_data is None:
+            logger.warning("Аккаунт @%s не был обработан ни одним воркером", accounts[position])
+            user_data = {"username": accounts[position], "name": accounts[position], "tweets": []}
+        merged.append(user_data)
+    return merged
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для режима stale-while-revalidate: результаты аккаунтов отдаются из кэша лент
+(twitter_timeline_cache) сразу, даже если немного устарели (с отметкой stale), а обновление
+аккаунта ставится в очередь фоновых браузеров. Повторный запрос обновления аккаунта,
+который уже ждет в очереди или обрабатывается, не создает второго обновления.
+Браузер ждут только аккаунты, которых нет в кэше или кэш которых старше max_stale_hours.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+from twitter_timeline_cache import get_cached_timeline
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.refresh')
+
+SWR_MAX_STALE_HOURS = 24  # Кэш старше этого срока не отдается, аккаунт ждет обновления
+
+_STOP = object()
+
+_queue = queue.Queue()
+_threads = []
+_lock = threading.Lock()
+_inflight = {}  # username в нижнем регистре -> Future обновления (в очереди или выполняется)
+_stats = {"scheduled": 0, "deduplicated": 0, "completed": 0, "failed": 0,
+          "served_fresh": 0, "served_stale": 0, "waited": 0}
+
+
+def _update_stats(**values):
+    """Увеличивает счетчики статистики"""
+    with _lock:
+        for key, value in values.items():
+            _stats[key] += value
+
+
+def _refresh_worker_loop(worker_index, driver, dependencies, mysql_config, scrape_kwargs):
+    """Обновляет аккаунты из очереди одним браузером, пока не получит _STOP"""
+    get_tweets_with_selenium = dependencies['get_tweets_with_selenium']
+    initialize_mysql = dependencies.get('initialize_mysql')
+
+    while True:
+        item = _queue.get()
+        if item is _STOP:
+            break
+        username, future = item
+
+        db_connection = None
+        if mysql_config and initialize_mysql:
+            db_connection = initialize_mysql(mysql_config)
+            if not db_connection:
+                logger.warning("Обновление %s: нет подключения к MySQL, данные не будут сохранены в базу", worker_index)
+
+        logger.info("Обновление %s: фоновое обновление @%s", worker_index, username)
+        try:
+            user_data = get_tweets_with_selenium(username, driver, db_connection, dependencies=dependencies,
+                                                 force_refresh=True, **scrape_kwargs)
+            user_data["stale"] = False
+            future.set_result(user_data)
+            _update_stats(completed=1)
+        except Exception as e:
+            logger.error("Обновление %s: ошибка при обновлении @%s: %s", worker_index, username, e)
+            future.set_result({"username": username, "name": username, "tweets": [], "stale": False})
+            _update_stats(failed=1)
+        finally:
+            with _lock:
+                _inflight.pop(username.lower(), None)
+            if db_connection:
+                db_connection.close()
+
+
+def start_refresh_workers(drivers, dependencies, mysql_config=None, **scrape_kwargs):
+    """
+    Запускает фоновые потоки обновления (один на браузер); браузеры должны
+    использоваться только ими, пока потоки не остановлены
+
+    Args:
+        drivers: Список драйверов Selenium
+        dependencies: Словарь с функциями (из initialize_dependencies)
+        mysql_config: Настройки MySQL; на каждое обновление берется соединение из пула
+        **scrape_kwargs: Параметры для get_tweets_with_selenium
+    """
+    with _lock:
+        if _threads:
+            return
+        for worker_index, driver in enumerate(drivers):
+            thread = threading.Thread(
+                target=_refresh_worker_loop,
+                args=(worker_index, driver, dependencies, mysql_config, scrape_kwargs),
+                name=f"twitter-refresh-{worker_index}",
+                daemon=True
+            )
+            thread.start()
+            _threads.append(thread)
+    logger.info("Запущено %s потоков фонового обновления аккаунтов", len(drivers))
+
+
+def schedule_refresh(username):
+    """
+    Ставит обновление аккаунта в очередь (если оно уже ожидается - возвращает существующее)
+
+    Returns:
+        Future: Завершается результатом get_tweets_with_selenium
+    """
+    key = username.lower()
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            _stats["deduplicated"] += 1
+            return future
+        future = Future()
+        _inflight[key] = future
+        _stats["scheduled"] += 1
+    _queue.put((username, future))
+    return future
+
+
+def serve_accounts_stale_while_revalidate(accounts, cache_duration_hours=1, max_stale_hours=SWR_MAX_STALE_HOURS,
+                                          max_tweets=10, time_filter_hours=24):
+    """
+    Возвращает результаты аккаунтов из кэша, не дожидаясь браузера:
+    - кэш моложе cache_duration_hours - отдается как есть;
+    - кэш моложе max_stale_hours - отдается с stale=True и cache_age (сек), обновление ставится в очередь;
+    - иначе обновление ставится в очередь и результат ожидается.
+
+    Args:
+        accounts: Список имен пользователей
+        cache_duration_hours: Срок, в течение которого кэш считается свежим
+        max_stale_hours: Максимальный возраст кэша, который можно отдать без ожидания
+        max_tweets: Максимальное количество твитов на аккаунт
+        time_filter_hours: Окно сбора в часах
+
+    Returns:
+        list: Результаты в порядке accounts (как у process_accounts_parallel)
+    """
+    if not _threads:
+        logger.warning("Потоки фонового обновления не запущены, обновления будут ждать запуска")
+    window_start = time.time() - time_filter_hours * 3600 if time_filter_hours else None
+
+    results = [None] * len(accounts)
+    waiting = []
+    for position, username in enumerate(accounts):
+        cached = get_cached_timeline(username, since=window_start, limit=max_tweets)
+        age = time.time() - cached["updated_at"] if cached else None
+        if cached is not None and age < cache_duration_hours * 3600:
+            _update_stats(served_fresh=1)
+            results[position] = {"username": username, "name": cached["name"] or username,
+                                 "tweets": cached["tweets"], "stale": False, "cache_age": age}
+        elif cached is not None and age < max_stale_hours * 3600:
+            _update_stats(served_stale=1)
+            schedule_refresh(username)
+            results[position] = {"username": username, "name": cached["name"] or username,
+                                 "tweets": cached["tweets"], "stale": True, "cache_age": age}
+            logger.info("@%s: отдан кэш %.0f мин. назад, обновление в фоне", username, age / 60)
+        else:
+            _update_stats(waited=1)
+            waiting.append((position, schedule_refresh(username)))
+
+    for position, future in waiting:
+        results[position] = future.result()
+    return results
+
+
+def get_refresh_stats():
+    """
+    Возвращает статистику фонового обновления
+
+    Returns:
+        dict: scheduled, deduplicated, completed, failed, served_fresh, served_stale, waited и pending
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["pending"] = len(_inflight)
+    return stats
+
+
+def stop_refresh_workers(timeout=60):
+    """Останавливает потоки обновления после текущих задач (ожидающие в очереди отменяются)"""
+    with _lock:
+        threads = list(_threads)
+        _threads.clear()
+    if not threads:
+        return
+    # Невыполненные обновления отменяем, чтобы не занимать браузеры при завершении
+    while True:
+        try:
+            item = _queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _STOP:
+            username, future = item
+            with _lock:
+                _inflight.pop(username.lower(), None)
+            future.cancel()
+    for _ in threads:
+        _queue.put(_STOP)
+    for thread in threads:
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error("Поток %s не завершился за %s сек", thread.name, timeout)
@@ -51,7 +51,7 @@ def extract_retweet_info_enhanced(tweet_element):
                  return result # Не считаем цитату простым ретвитом
 
         except (NoSuchElementException, StaleElementReferenceException): pass
-        except Exception as e: logger.warning(f"Ошибка при проверке на Quote Tweet: {e}")
+        except Exception as e: logger.warning("Ошибка при проверке на Quote Tweet: %s", e)
 
         # --- Если не цитирование, проверяем на ретвит ---
         # МЕТОД 1: SocialContext
@@ -61,7 +61,7 @@ def extract_retweet_info_enhanced(tweet_element):
             retweet_keywords = ["retweeted", "reposted", "ретвитнул", "ретвитнула", "повторно опубликовал"]
 
             if any(keyword in context_text for keyword in retweet_keywords):
-                logger.debug(f"Обнаружен ретвит через socialContext текст: '{context_text}'")
+                logger.debug("Обнаружен ретвит через socialContext текст: '%s'", context_text)
                 result["is_retweet"] = True
 
                 # Ищем ТОЛЬКО URL оригинала в ссылках внутри socialContext
@@ -76,14 +76,14 @@ def extract_retweet_info_enhanced(tweet_element):
                              # Убедимся, что это не ссылка на аналитику и т.п.
                              if not any(part in href for part in ['/analytics', '/likes', '/retweets']):
                                   result["original_tweet_url"] = href.split("?")[0] # Убираем параметры
-                                  logger.debug(f"Найден URL оригинала (socialContext link): {result['original_tweet_url']}")
+                                  logger.debug("Найден URL оригинала (socialContext link): %s", result['original_tweet_url'])
                                   # Не прерываем цикл, вдруг дальше будет ссылка на профиль,
                                   # хотя мы её и не используем сейчас.
                     except StaleElementReferenceException:
                          logger.warning("Ссылка в socialContext устарела во время обработки.")
                          continue
                     except Exception as link_err:
-                         logger.warning(f"Ошибка обработки ссылки в socialContext: {link_err}")
+                         logger.warning("Ошибка обработки ссылки в socialContext: %s", link_err)
 
                 # Если нашли socialContext с текстом ретвита, но не нашли URL, это странно, но возможно
                 if result["is_retweet"] and not result["original_tweet_url"]:
@@ -94,7 +94,7 @@ def extract_retweet_info_enhanced(tweet_element):
         except StaleElementReferenceException:
              logger.warning("Элемент socialContext устарел во время проверки.")
         except Exception as e:
-            logger.error(f"Ошибка при проверке socialContext: {e}")
+            logger.error("Ошибка при проверке socialContext: %s", e)
 
         # МЕТОД 2: Поиск URL оригинала в других местах, если socialContext не дал результата или не найден
         if result["is_retweet"] and not result["original_tweet_url"]:
@@ -122,10 +122,10 @@ def extract_retweet_info_enhanced(tweet_element):
                                 if not is_inside_quote:
                                      potential_url = href.split("?")[0]
                                      result["original_tweet_url"] = potential_url
-                                     logger.debug(f"Найден URL оригинала (по ссылке с time): {result['original_tweet_url']}")
+                                     logger.debug("Найден URL оригинала (по ссылке с time): %s", result['original_tweet_url'])
                                      break # Нашли - выходим
                         except StaleElementReferenceException: continue
-                        except Exception as link_err: logger.warning(f"Ошибка обработки ссылки с time: {link_err}")
+                        except Exception as link_err: logger.warning("Ошибка обработки ссылки с time: %s", link_err)
 
                 # Если все еще не нашли, пробуем найти ЛЮБУЮ ссылку на статус внутри article,
                 # которая не является ссылкой на профиль или аналитику и не внутри цитаты
@@ -144,29 +144,29 @@ def extract_retweet_info_enhanced(tweet_element):
 
                                     if not is_inside_quote:
                                          result["original_tweet_url"] = href.split("?")[0]
-                                         logger.debug(f"Найден URL оригинала (по общей ссылке на статус): {result['original_tweet_url']}")
+                                         logger.debug("Найден URL оригинала (по общей ссылке на статус): %s", result['original_tweet_url'])
                                          break
                           except StaleElementReferenceException: continue
-                          except Exception as link_err: logger.warning(f"Ошибка обработки общей ссылки на статус: {link_err}")
+                          except Exception as link_err: logger.warning("Ошибка обработки общей ссылки на статус: %s", link_err)
 
             except Exception as e:
-                logger.error(f"Ошибка при поиске URL оригинального твита: {e}")
+                logger.error("Ошибка при поиске URL оригинального твита: %s", e)
 
         # Финальная проверка: если определили как ретвит, но нет URL - сбрасываем флаг
         if result["is_retweet"] and not result["original_tweet_url"]:
-             logger.warning(f"Определен как ретвит, но не найден URL оригинала. Сбрасываем флаг is_retweet.")
+             logger.warning("Определен как ретвит, но не найден URL оригинала. Сбрасываем флаг is_retweet.")
              result["is_retweet"] = False
              result["original_tweet_url"] = None
 
 
-        logger.debug(f"Результат определения ретвита: {result}")
+        logger.debug("Результат определения ретвита: %s", result)
         return result
 
     except StaleElementReferenceException:
          logger.warning("Элемент твита устарел во время проверки ретвита.")
          return result # Возвращаем то, что успели собрать
     except Exception as e:
-        logger.error(f"Общая ошибка при определении ретвита: {e}")
+        logger.error("Общая ошибка при определении ретвита: %s", e)
         return result
 
 
@@ -204,7 +204,7 @@ def extract_retweet_info_basic(tweet_element):
         if result["is_retweet"] and not result["original_tweet_url"]:
              result["is_retweet"] = False; result["original_tweet_url"] = None
 
-    except Exception as e: logger.error(f"Ошибка при базовой проверке ретвита: {e}")
+    except Exception as e: logger.error("Ошибка при базовой проверке ретвита: %s", e)
     return result
 
 
@@ -271,7 +271,7 @@ def get_author_info(tweet_element):
             logger.debug("Не удалось найти блок автора User-Name с ссылкой на профиль")
 
     except (NoSuchElementException, StaleElementReferenceException): logger.debug("Ошибка поиска блока автора или ссылки на профиль")
-    except Exception as e: logger.error(f"Ошибка при извлечении информации об авторе: {e}")
+    except Exception as e: logger.error("Ошибка при извлечении информации об авторе: %s", e)
 
     # Если display_name не найден, но есть username, используем username
     if not author_info["display_name"] and author_info["username"]:
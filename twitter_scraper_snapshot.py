@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для офлайн-разбора снимков HTML ленты Twitter (driver.page_source).
+Извлекает все твиты article[data-testid="tweet"] за один проход lxml,
+без отдельных запросов к WebDriver для каждого элемента.
+Работает как с живой страницей, так и с файлами из twitter_html_cache/
+(в том числе сжатыми снимками архива .html.gz / .html.zst).
+"""
+
+import re
+import sys
+import json
+import logging
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer
+
+from twitter_scraper_html_archive import read_snapshot, latest_snapshot, snapshot_username
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.snapshot')
+
+# Базовый адрес для относительных ссылок в page_source
+BASE_URL = "https://x.com"
+
+# Ключевые слова socialContext (те же, что в extract_retweet_info_enhanced)
+RETWEET_KEYWORDS = ["retweeted", "reposted", "ретвитнул", "ретвитнула", "повторно опубликовал"]
+PINNED_KEYWORDS = ["pinned", "закреплено", "закреплённый", "закрепленный"]
+
+# Кнопки статистики; unretweet/unlike появляются, если аккаунт уже отреагировал на твит
+STATS_TEST_IDS = {
+    "reply": "replies",
+    "retweet": "retweets",
+    "unretweet": "retweets",
+    "like": "likes",
+    "unlike": "likes",
+}
+
+STATUS_ID_RE = re.compile(r'/status/(\d+)')
+NUMBER_RE = re.compile(r'\d[\d,.\s ]*')
+
+# Разбираем только статьи твитов, остальная разметка страницы (~600 КБ) пропускается
+TWEET_STRAINER = SoupStrainer('article', attrs={'data-testid': 'tweet'})
+
+
+def extract_tweet_id(url):
+    """Возвращает ID твита из URL вида .../status/<id>[/...] или None"""
+    if not url:
+        return None
+    match = STATUS_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+def _parse_count(label):
+    """Извлекает первое число из aria-label ('1985 отметок «Нравится»', '1,985 Likes')"""
+    if not label:
+        return 0
+    match = NUMBER_RE.search(label)
+    if not match:
+        return 0
+    digits = re.sub(r'\D', '', match.group(0))
+    return int(digits) if digits else 0
+
+
+def _element_text(element):
+    """Текст элемента с эмодзи (img alt), как его видит пользователь"""
+    parts = []
+    for node in element.descendants:
+        if isinstance(node, str):
+            parts.append(node)
+        elif node.name == 'img' and node.get('alt'):
+            parts.append(node['alt'])
+    return "".join(parts).strip()
+
+
+def _social_context(article):
+    """Возвращает текст socialContext в нижнем регистре (или пустую строку)"""
+    context = article.select_one('[data-testid="socialContext"]')
+    return context.get_text(" ", strip=True).lower() if context else ""
+
+
+def is_pinned_article(article):
+    """Проверяет, является ли твит закрепленным (по socialContext)"""
+    context_text = _social_context(article)
+    return any(keyword in context_text for keyword in PINNED_KEYWORDS)
+
+
+def _find_status_link(article, username):
+    """
+    Находит ссылку на сам твит: приоритет у ссылки, обернутой вокруг <time>,
+    затем - у ссылки на статус отслеживаемого пользователя.
+    """
+    time_element = article.find('time')
+    if time_element:
+        link = time_element.find_parent('a', href=True)
+        if link and STATUS_ID_RE.search(link['href']):
+            return link['href']
+
+    fallback = None
+    for link in article.select('a[href*="/status/"]'):
+        href = link.get('href', '')
+        if f"/{username}/status/".lower() in href.lower():
+            return href
+        if fallback is None:
+            fallback = href
+    return fallback
+
+
+def _extract_stats(article):
+    """Статистика твита из aria-label кнопок reply/retweet/like"""
+    stats = {"likes": 0, "retweets": 0, "replies": 0}
+    for test_id, stat_key in STATS_TEST_IDS.items():
+        button = article.select_one(f'[data-testid="{test_id}"]')
+        if button is None:
+            continue
+        value = _parse_count(button.get('aria-label'))
+        if not value:
+            # Резерв: видимый текст счетчика (может быть сокращен, например '1 тыс.')
+            value = _parse_count(button.get_text(" ", strip=True))
+        if value:
+            stats[stat_key] = value
+    return stats
+
+
+def _is_truncated(article, text_element, text):
+    """Признаки обрезанного текста (аналог is_tweet_truncated без WebDriver)"""
+    if article.select_one('[data-testid="tweet-text-show-more-link"]'):
+        return True
+    for button in article.select('[role="button"], span'):
+        button_text = button.get_text(strip=True)
+        if button_text in ("Show more", "Показать ещё", "Показать еще"):
+            return True
+    return bool(text_element is not None and (text.endswith('…') or text.endswith('...')))
+
+
+def _author_handle(article):
+    """Handle автора из блока User-Name (для ретвитов - автор оригинала)"""
+    user_block = article.select_one('[data-testid="User-Name"]')
+    if not user_block:
+        return None
+    for link in user_block.select('a[href]'):
+        href = link['href']
+        if '/status/' not in href:
+            handle = href.strip('/').split('/')[-1].split('?')[0]
+            if re.match(r'^[A-Za-z0-9_]{1,15}$', handle):
+                return handle
+    return None
+
+
+def parse_tweet_article(article, username):
+    """
+    Преобразует один article[data-testid="tweet"] в словарь твита
+    того же формата, что собирает get_tweets_with_selenium.
+
+    Args:
+        article: Тег BeautifulSoup статьи твита
+        username: Имя отслеживаемого пользователя
+
+    Returns:
+        dict: Данные твита или None, если не удалось определить URL/время
+    """
+    href = _find_status_link(article, username)
+    tweet_id = extract_tweet_id(href)
+    if not tweet_id:
+        return None
+
+    time_element = article.find('time')
+    created_at = time_element.get('datetime', "") if time_element else ""
+    if not created_at:
+        logger.warning("Не удалось найти время для твита %s в снимке HTML", tweet_id)
+        return None
+
+    text_element = article.select_one('div[data-testid="tweetText"]')
+    if text_element is None:
+        text_element = article.select_one('[lang][dir="auto"]')
+    tweet_text = _element_text(text_element) if text_element is not None else ""
+
+    return build_tweet_record(
+        tweet_id, href, tweet_text, created_at,
+        stats=_extract_stats(article),
+        social_context=_social_context(article),
+        author=_author_handle(article),
+        is_truncated=_is_truncated(article, text_element, tweet_text),
+    )
+
+
+def build_tweet_record(tweet_id, href, text, created_at, stats, social_context="", author=None,
+                       is_truncated=False):
+    """
+    Собирает словарь твита в формате get_tweets_with_selenium из уже извлеченных полей.
+    Используется разбором снимка HTML и JavaScript-извлечением.
+
+    Args:
+        tweet_id: ID твита
+        href: Ссылка на твит (относительная или абсолютная)
+        text: Текст твита
+        created_at: Значение time[datetime]
+        stats: Словарь {"likes", "retweets", "replies"}
+        social_context: Текст socialContext (закреп, ретвит и т.п.)
+        author: Handle автора из блока User-Name
+        is_truncated: Признак обрезанного текста
+
+    Returns:
+        dict: Данные твита
+    """
+    context_text = (social_context or "").lower()
+    is_retweet = any(keyword in context_text for keyword in RETWEET_KEYWORDS)
+    is_pinned = any(keyword in context_text for keyword in PINNED_KEYWORDS)
+
+    # Канонический URL: https://x.com/<автор>/status/<id> (без /photo/1, /analytics и параметров)
+    status_part = f"/status/{tweet_id}"
+    path = (href or "").split('?')[0]
+    if status_part in path:
+        path = path[:path.index(status_part) + len(status_part)]
+    elif author:
+        path = f"/{author}{status_part}"
+    tweet_url = urljoin(BASE_URL, path)
+
+    return {
+        "text": text,
+        "created_at": created_at,
+        "url": tweet_url,
+        "stats": stats,
+        "is_retweet": is_retweet,
+        "original_author": author if is_retweet else None,
+        "is_truncated": bool(is_truncated),
+        "is_pinned": is_pinned,
+    }
+
+
+def iter_tweet_articles(page_source):
+    """Разбирает HTML и возвращает список тегов article твитов (в порядке на странице)"""
+    soup = BeautifulSoup(page_source, 'lxml', parse_only=TWEET_STRAINER)
+    return soup.find_all('article', attrs={'data-testid': 'tweet'})
+
+
+def parse_timeline_html(page_source, username):
+    """
+    Извлекает все твиты из одного снимка страницы профиля.
+
+    Args:
+        page_source: HTML страницы (driver.page_source или содержимое файла)
+        username: Имя отслеживаемого пользователя
+
+    Returns:
+        list: Список словарей твитов (без дубликатов, в порядке на странице)
+    """
+    tweets = []
+    seen_ids = set()
+    if not page_source:
+        return tweets
+
+    for article in iter_tweet_articles(page_source):
+        try:
+            tweet_data = parse_tweet_article(article, username)
+        except Exception as e:
+            logger.warning("Ошибка при разборе твита из снимка HTML: %s", e)
+            continue
+        if not tweet_data:
+            continue
+        tweet_id = extract_tweet_id(tweet_data["url"])
+        if tweet_id in seen_ids:
+            continue
+        seen_ids.add(tweet_id)
+        tweets.append(tweet_data)
+
+    logger.info("Из снимка HTML извлечено %s твитов для @%s", len(tweets), username)
+    return tweets
+
+
+def parse_timeline_file(html_file, username=None):
+    """
+    Разбирает сохраненный HTML (например, twitter_html_cache/<username>_selenium.html
+    или снимок архива <username>_<время>_<хеш>.html.gz / .html.zst).
+    Если username не указан, он берется из имени файла.
+    """
+    if username is None:
+        base_name = html_file.replace('\\', '/').split('/')[-1]
+        username = snapshot_username(base_name) or base_name.split('_selenium')[0].split('.html')[0]
+    return parse_timeline_html(read_snapshot(html_file), username)
+
+
+def parse_latest_snapshot(username, archive_dir="twitter_html_cache"):
+    """
+    Разбирает последний снимок аккаунта из архива HTML
+
+    Returns:
+        list: Список словарей твитов или None, если снимков аккаунта нет
+    """
+    path = latest_snapshot(archive_dir, username)
+    if path is None:
+        return None
+    logger.info("Разбор последнего снимка @%s: %s", username, path)
+    return parse_timeline_file(path, username)
+
+
+if __name__ == "__main__":
+    # Пример: python twitter_scraper_snapshot.py twitter_html_cache/Cointelegraph_selenium.html
+    #         python twitter_scraper_snapshot.py --latest Cointelegraph [twitter_html_cache]
+    if len(sys.argv) < 2 or (sys.argv[1] == "--latest" and len(sys.argv) < 3):
+        print("Использование: python twitter_scraper_snapshot.py <html_file> [username]\n"
+              "               python twitter_scraper_snapshot.py --latest <username> [archive_dir]")
+        sys.exit(1)
+    if sys.argv[1] == "--latest":
+        parsed = parse_latest_snapshot(sys.argv[2], *sys.argv[3:4])
+        if parsed is None:
+            print(f"В архиве нет снимков @{sys.argv[2]}")
+            sys.exit(1)
+    else:
+        parsed = parse_timeline_file(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(json.dumps(parsed, ensure_ascii=False, indent=2))
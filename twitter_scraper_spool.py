@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для локального журнала записей, которые не удалось записать в MySQL
+(база недоступна или пакет не записан после всех повторов).
+Журнал - сегменты JSONL (одна строка на аккаунт: пользователь и его твиты),
+только дозапись, fsync раз в несколько строк. Когда база снова доступна,
+replay_spool загружает сегменты пакетно и удаляет их; каждая запись журнала
+попадает в tweet_stats_history со своим временем spooled_at.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+from twitter_scraper_snapshot import extract_tweet_id
+from twitter_scraper_utils import save_tweets_to_db
+from twitter_scraper_user_cache import save_user_cached, forget_user
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.spool')
+
+SPOOL_DIR = os.path.join("twitter_cache", "db_spool")
+SPOOL_SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # Размер сегмента, после которого начинается новый
+SPOOL_FSYNC_EVERY = 20  # fsync после каждых N строк (и при закрытии сегмента)
+
+_lock = threading.Lock()
+_segment = None  # Открытый файл текущего сегмента
+_unsynced_lines = 0
+_segment_counter = 0
+
+
+def _open_segment():
+    """Открывает новый сегмент журнала; вызывается под _lock"""
+    global _segment, _unsynced_lines, _segment_counter
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    _segment_counter += 1
+    path = os.path.join(SPOOL_DIR, f"spool_{time.time():.6f}_{os.getpid()}_{_segment_counter}.jsonl")
+    _segment = open(path, 'a', encoding='utf-8')
+    _unsynced_lines = 0
+    logger.info("Открыт сегмент журнала %s", path)
+
+
+def _close_segment():
+    """Сбрасывает на диск и закрывает текущий сегмент; вызывается под _lock"""
+    global _segment, _unsynced_lines
+    if _segment is None:
+        return
+    _segment.flush()
+    os.fsync(_segment.fileno())
+    _segment.close()
+    _segment = None
+    _unsynced_lines = 0
+
+
+def append_to_spool(username, name, tweets):
+    """
+    Дописывает пользователя и его твиты в журнал (сигнатура как у db_writer в get_tweets_with_selenium)
+
+    Args:
+        username: Имя пользователя Twitter
+        name: Отображаемое имя
+        tweets: Список словарей твитов
+
+    Returns:
+        bool: Записано ли в журнал
+    """
+    global _unsynced_lines
+    line = json.dumps({"username": username, "name": name, "tweets": list(tweets), "spooled_at": time.time()},
+                      ensure_ascii=False)
+    try:
+        with _lock:
+            if _segment is None or _segment.tell() >= SPOOL_SEGMENT_MAX_BYTES:
+                _close_segment()
+                _open_segment()
+            _segment.write(line + "\n")
+            _segment.flush()
+            _unsynced_lines += 1
+            if _unsynced_lines >= SPOOL_FSYNC_EVERY:
+                os.fsync(_segment.fileno())
+                _unsynced_lines = 0
+        logger.info("%s твитов @%s записано в локальный журнал", len(tweets), username)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        logger.error("Не удалось записать твиты @%s в локальный журнал: %s", username, e)
+        return False
+
+
+def close_spool():
+    """Сбрасывает журнал на диск (вызывать при завершении работы)"""
+    with _lock:
+        try:
+            _close_segment()
+        except OSError as e:
+            logger.error("Ошибка при закрытии журнала: %s", e)
+
+
+def _list_segments():
+    """Сегменты журнала в порядке создания"""
+    if not os.path.isdir(SPOOL_DIR):
+        return []
+    names = [name for name in os.listdir(SPOOL_DIR) if name.startswith("spool_") and name.endswith(".jsonl")]
+    return [os.path.join(SPOOL_DIR, name) for name in sorted(names, key=lambda n: float(n.split("_")[1]))]
+
+
+def get_spool_size():
+    """Возвращает (количество сегментов, размер журнала в байтах)"""
+    segments = _list_segments()
+    return len(segments), sum(os.path.getsize(path) for path in segments)
+
+
+def _read_segment(path, accounts):
+    """
+    Читает сегмент в accounts: {username: (name, [(spooled_at, tweets), ...])}.
+    Каждая запись журнала - отдельное наблюдение счетчиков; оборванная
+    последняя строка (сбой при записи) пропускается.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning("Пропущена поврежденная строка %d журнала %s", line_number, path)
+                continue
+            username = entry.get("username")
+            if not username:
+                continue
+            _, observations = accounts.get(username, (None, []))
+            tweets = [tweet for tweet in entry.get("tweets", []) if extract_tweet_id(tweet.get("url"))]
+            if tweets:
+                observations.append((entry.get("spooled_at") or os.path.getmtime(path), tweets))
+            accounts[username] = (entry.get("name") or username, observations)
+
+
+def replay_spool(connection):
+    """
+    Загружает журнал в MySQL: все сегменты (текущий закрывается) читаются
+    и пишутся пакетно одной транзакцией. Наблюдения применяются по порядку
+    spooled_at (в tweets остаются последние счетчики), и каждое добавляет
+    строку в tweet_stats_history со своим временем. После успешной записи
+    сегменты удаляются.
+
+    Args:
+        connection: Соединение с MySQL
+
+    Returns:
+        int: Количество загруженных твитов (без повторов) или None при ошибке (журнал сохраняется)
+    """
+    with _lock:
+        try:
+            _close_segment()
+        except OSError as e:
+            logger.error("Ошибка при закрытии журнала: %s", e)
+        segments = _list_segments()
+        if not segments:
+            return 0
+
+        accounts = {}
+        for path in segments:
+            try:
+                _read_segment(path, accounts)
+            except OSError as e:
+                logger.error("Не удалось прочитать журнал %s: %s", path, e)
+                return None
+
+        loaded = 0
+        try:
+            for username, (name, observations) in accounts.items():
+                user_id = save_user_cached(connection, username, name, commit=False)
+                if not user_id:
+                    raise RuntimeError(f"не удалось сохранить пользователя {username}")
+                tweet_ids = set()
+                for spooled_at, tweets in sorted(observations, key=lambda observation: observation[0]):
+                    saved = save_tweets_to_db(connection, user_id, tweets, commit=False, observed_at=spooled_at)
+                    if saved is None:
+                        raise RuntimeError(f"не удалось сохранить твиты @{username}")
+                    tweet_ids.update(extract_tweet_id(tweet.get("url")) for tweet in tweets)
+                loaded += len(tweet_ids)
+            connection.commit()
+        except Exception as e:
+            logger.error("Ошибка загрузки журнала в MySQL, журнал сохранен: %s", e)
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            for username in accounts:
+                forget_user(username)
+            return None
+
+        for path in segments:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Не удалось удалить загруженный сегмент журнала %s: %s", path, e)
+
+    logger.info("Из журнала загружено %s твитов (%s аккаунтов, %s сегментов)", loaded, len(accounts), len(segments))
+    return loaded
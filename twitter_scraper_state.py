@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для хранения состояния инкрементального сбора между циклами:
+для каждого аккаунта запоминается ID самого нового обработанного твита
+(high-water mark). Следующий цикл прекращает скроллинг, как только доходит
+до твита с ID не больше этой отметки.
+"""
+
+import os
+import json
+import logging
+import threading
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.state')
+
+CACHE_DIR = "twitter_cache"
+HIGH_WATER_MARK_FILE = os.path.join(CACHE_DIR, "high_water_marks.json")
+
+_lock = threading.Lock()
+_marks = None
+
+
+def _load_marks():
+    """Загружает отметки из файла (один раз); вызывается под _lock"""
+    global _marks
+    if _marks is None:
+        _marks = {}
+        if os.path.exists(HIGH_WATER_MARK_FILE):
+            try:
+                with open(HIGH_WATER_MARK_FILE, 'r', encoding='utf-8') as f:
+                    _marks = {username.lower(): int(tweet_id) for username, tweet_id in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                logger.error("Не удалось прочитать файл отметок %s: %s", HIGH_WATER_MARK_FILE, e)
+    return _marks
+
+
+def get_high_water_mark(username):
+    """
+    Возвращает ID самого нового обработанного твита аккаунта
+
+    Args:
+        username: Имя пользователя Twitter
+
+    Returns:
+        int: ID твита или None, если аккаунт еще не обрабатывался
+    """
+    with _lock:
+        return _load_marks().get(username.lower())
+
+
+def update_high_water_mark(username, tweet_id):
+    """
+    Сохраняет новую отметку, если она больше текущей (атомарная запись файла)
+
+    Args:
+        username: Имя пользователя Twitter
+        tweet_id: ID самого нового обработанного твита
+    """
+    if not tweet_id:
+        return
+    tweet_id = int(tweet_id)
+    with _lock:
+        marks = _load_marks()
+        key = username.lower()
+        if marks.get(key, 0) >= tweet_id:
+            return
+        marks[key] = tweet_id
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_file = HIGH_WATER_MARK_FILE + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({name: str(value) for name, value in marks.items()}, f, indent=2)
+            os.replace(tmp_file, HIGH_WATER_MARK_FILE)
+            logger.info("Обновлена отметка последнего твита @%s: %s", username, tweet_id)
+        except OSError as e:
+            logger.error("Не удалось сохранить файл отметок %s: %s", HIGH_WATER_MARK_FILE, e)
+
+
+def counts_for_high_water_mark(record):
+    """
+    Участвует ли твит в сравнении с отметкой.
+    Закрепленный твит стоит вверху вне хронологии, а у ретвита ID оригинала,
+    который может быть старше отметки, хотя сам ретвит новый.
+    """
+    return not record.get("is_pinned") and not record.get("is_retweet")
+
+
+def cut_records_at_mark(records, high_water_mark, tweet_id_getter):
+    """
+    Обрезает записи шага скролла на первом уже обработанном твите
+
+    Args:
+        records: Записи твитов в порядке ленты
+        high_water_mark: ID самого нового твита прошлого цикла (или None)
+        tweet_id_getter: Функция record -> ID твита
+
+    Returns:
+        tuple: (записи до отметки, достигнута ли отметка)
+    """
+    if not high_water_mark:
+        return records, False
+    for position, record in enumerate(records):
+        if not counts_for_high_water_mark(record):
+            continue
+        tweet_id = tweet_id_getter(record)
+        if tweet_id and int(tweet_id) <= high_water_mark:
+            return records[:position], True
+    return records, False
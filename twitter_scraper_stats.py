@@ -6,9 +6,13 @@
 """
 
 import os
+import time
 import logging
+import threading
 from mysql.connector import Error
 
+from twitter_scraper_db import get_pooled_connection
+
 # Настройка логирования
 logger = logging.getLogger('twitter_scraper.stats')
 
@@ -55,21 +59,63 @@ def generate_tweet_statistics(results):
         # Считаем количество обработанных аккаунтов
         stats['total_accounts'] = len(results)
 
-        logger.info(f"Статистика сгенерирована: {total_tweets} твитов, {total_retweets} ретвитов")
+        logger.info("Статистика сгенерирована: %s твитов, %s ретвитов", total_tweets, total_retweets)
 
         return stats
 
     except Exception as e:
-        logger.error(f"Ошибка при генерации статистики: {e}")
+        logger.error("Ошибка при генерации статистики: %s", e)
         return {}
 
 
-def generate_database_statistics(db_connection):
+# Таблицы для статистики базы данных (только users и tweets)
+DB_STATS_TABLES = [
+    {"name": "users", "label": "Пользователей"},
+    {"name": "tweets", "label": "Твитов"},
+    # {"name": "images", "label": "Изображений"}, # Удалено
+    # {"name": "articles", "label": "Статей"}, # Удалено
+    # {"name": "tweet_links", "label": "Ссылок из твитов"}, # Удалено
+    # {"name": "article_links", "label": "Ссылок из статей"} # Удалено
+]
+DB_STATS_SOURCE_LABEL = "Источник данных"
+
+# Результаты последнего точного подсчета (фоновый режим): {таблица: (количество, время подсчета)}
+_exact_counts = {}
+_exact_lock = threading.Lock()
+_exact_thread = None
+_exact_stop = threading.Event()
+
+
+def _read_counters(cursor):
+    """Счетчики строк из table_counters: ({таблица: количество}, время последнего обновления)"""
+    cursor.execute("SELECT table_name, row_count, updated_at FROM table_counters")
+    rows = cursor.fetchall()
+    counts = {name: count for name, count, _ in rows}
+    updated_at = max((updated for _, _, updated in rows if updated), default=None)
+    return counts, updated_at
+
+
+def _read_estimates(cursor):
+    """Оценки количества строк из information_schema (без сканирования таблиц)"""
+    cursor.execute("""
+        SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({})
+        """.format(", ".join(["%s"] * len(DB_STATS_TABLES))),
+        [table["name"] for table in DB_STATS_TABLES])
+    return {name: count for name, count in cursor.fetchall()}
+
+
+def generate_database_statistics(db_connection, source="counters"):
     """
-    Генерирует статистику базы данных (только таблицы users и tweets)
+    Генерирует статистику базы данных (только таблицы users и tweets) без SELECT COUNT(*):
+    значения берутся из счетчиков, которые триггеры обновляют при записи, или из оценок
+    information_schema. Ключ "Источник данных" показывает, точны ли значения и насколько свежи.
 
     Args:
         db_connection: Соединение с базой данных MySQL
+        source: "counters" - счетчики table_counters (точно; без таблицы счетчиков - оценка),
+                "estimate" - оценка information_schema.TABLES.TABLE_ROWS (приблизительно),
+                "exact" - результат последнего фонового точного подсчета (start_exact_statistics)
 
     Returns:
         dict: Словарь со статистическими показателями из базы данных
@@ -83,31 +129,47 @@ def generate_database_statistics(db_connection):
 
     try:
         cursor = db_connection.cursor()
+        counts = None
+        source_description = None
+
+        if source == "exact":
+            with _exact_lock:
+                exact = dict(_exact_counts)
+            if exact:
+                counts = {name: count for name, (count, _) in exact.items()}
+                checked_at = min(checked for _, checked in exact.values())
+                age_minutes = (time.time() - checked_at) / 60
+                source_description = f"точный подсчет {age_minutes:.0f} мин. назад"
+            else:
+                logger.info("Точный подсчет еще не выполнялся, используются счетчики")
+                source = "counters"
 
-        # Список таблиц для проверки (только users и tweets)
-        tables = [
-            {"name": "users", "label": "Пользователей"},
-            {"name": "tweets", "label": "Твитов"},
-            # {"name": "images", "label": "Изображений"}, # Удалено
-            # {"name": "articles", "label": "Статей"}, # Удалено
-            # {"name": "tweet_links", "label": "Ссылок из твитов"}, # Удалено
-            # {"name": "article_links", "label": "Ссылок из статей"} # Удалено
-        ]
-
-        # Подсчет записей в каждой таблице
-        for table in tables:
+        if source == "counters":
             try:
-                cursor.execute(f"SELECT COUNT(*) FROM {table['name']}")
-                count = cursor.fetchone()[0]
-                db_stats[table['label']] = count
-                logger.info(f"В таблице {table['name']} найдено {count} записей")
+                counts, updated_at = _read_counters(cursor)
+                source_description = "счетчики (точно" + (f", обновлены {updated_at}" if updated_at else "") + ")"
             except Error as e:
-                # Логируем ошибку, если таблица не найдена (это нормально, если ее не создавали)
-                if e.errno == 1146: # ER_NO_SUCH_TABLE
-                     logger.warning(f"Таблица {table['name']} не найдена в БД.")
-                else:
-                     logger.error(f"Не удалось получить данные из таблицы {table['name']}: {e}")
+                if e.errno != 1146:  # ER_NO_SUCH_TABLE - схема еще без счетчиков
+                    logger.error("Не удалось прочитать счетчики строк: %s", e)
+                logger.warning("Счетчики строк недоступны, используется оценка information_schema")
+                source = "estimate"
+
+        if source == "estimate":
+            counts = _read_estimates(cursor)
+            source_description = "оценка information_schema (приблизительно)"
+
+        if counts is None:
+            raise ValueError(f"неизвестный источник статистики: {source}")
+
+        for table in DB_STATS_TABLES:
+            count = counts.get(table['name'])
+            if count is None:
+                logger.warning("Нет данных о количестве строк в таблице %s", table['name'])
                 db_stats[table['label']] = "Н/Д"
+            else:
+                db_stats[table['label']] = int(count)
+                logger.info("В таблице %s %s записей (%s)", table['name'], count, source_description)
+        db_stats[DB_STATS_SOURCE_LABEL] = source_description
 
         # --- Удалена детализация по ссылкам и статьям ---
         # try:
@@ -126,10 +188,153 @@ def generate_database_statistics(db_connection):
         return db_stats
 
     except Exception as e:
-        logger.error(f"Ошибка при генерации статистики базы данных: {e}")
+        logger.error("Ошибка при генерации статистики базы данных: %s", e)
         return {}
 
 
+def get_user_tweet_counts(db_connection, limit=20):
+    """
+    Количество твитов по пользователям (из счетчиков user_tweet_counts, без сканирования tweets)
+
+    Args:
+        db_connection: Соединение с базой данных MySQL
+        limit: Максимальное количество пользователей (по убыванию числа твитов)
+
+    Returns:
+        list: Словари username, tweet_count, retweet_count, last_tweet_at
+    """
+    try:
+        cursor = db_connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT u.username, c.tweet_count, c.retweet_count, c.last_tweet_at
+            FROM user_tweet_counts c JOIN users u ON u.id = c.user_id
+            ORDER BY c.tweet_count DESC LIMIT %s
+            """, (limit,))
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    except Error as e:
+        logger.error("Не удалось получить количество твитов по пользователям: %s", e)
+        return []
+
+
+def get_daily_tweet_counts(db_connection, days=7):
+    """
+    Количество твитов по дням публикации (из счетчиков daily_tweet_counts)
+
+    Args:
+        db_connection: Соединение с базой данных MySQL
+        days: За сколько последних дней
+
+    Returns:
+        list: Кортежи (дата, твитов, ретвитов), от новых к старым
+    """
+    try:
+        cursor = db_connection.cursor()
+        cursor.execute("""
+            SELECT day, tweet_count, retweet_count FROM daily_tweet_counts
+            WHERE day >= CURDATE() - INTERVAL %s DAY
+            ORDER BY day DESC
+            """, (days - 1,))
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    except Error as e:
+        logger.error("Не удалось получить количество твитов по дням: %s", e)
+        return []
+
+
+def run_exact_count(connection):
+    """
+    Точный подсчет строк (SELECT COUNT(*)) и сверка со счетчиками table_counters.
+    Подсчет и чтение счетчиков выполняются в одном снимке данных, поэтому найденное
+    расхождение исправляется прибавлением разницы, не мешая параллельной записи.
+
+    Args:
+        connection: Соединение с MySQL
+
+    Returns:
+        dict: {таблица: количество строк}
+    """
+    counts = {}
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction(consistent_snapshot=True)
+        for table in DB_STATS_TABLES:
+            cursor.execute(f"SELECT COUNT(*) FROM {table['name']}")
+            counts[table['name']] = cursor.fetchone()[0]
+        cursor.execute("SELECT table_name, row_count FROM table_counters")
+        counters = dict(cursor.fetchall())
+
+        for name, count in counts.items():
+            drift = count - counters.get(name, 0)
+            if drift:
+                logger.warning("Счетчик строк %s расходится с точным подсчетом на %s, исправляем", name, drift)
+                cursor.execute("""
+                    INSERT INTO table_counters (table_name, row_count) VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE row_count = row_count + %s
+                    """, (name, drift, drift))
+        connection.commit()
+    except Error:
+        try:
+            connection.rollback()
+        except Error:
+            pass
+        raise
+    finally:
+        cursor.close()
+
+    checked_at = time.time()
+    with _exact_lock:
+        for name, count in counts.items():
+            _exact_counts[name] = (count, checked_at)
+    logger.info("Точный подсчет строк: %s", counts)
+    return counts
+
+
+def _exact_statistics_loop(mysql_config, interval_seconds):
+    """Периодически выполняет run_exact_count, пока не установлен _exact_stop"""
+    while not _exact_stop.is_set():
+        connection = get_pooled_connection(mysql_config)
+        if connection is not None:
+            try:
+                run_exact_count(connection)
+            except Error as e:
+                logger.error("Ошибка точного подсчета строк: %s", e)
+            finally:
+                connection.close()
+        _exact_stop.wait(interval_seconds)
+
+
+def start_exact_statistics(mysql_config, interval_hours=24):
+    """
+    Запускает фоновый точный подсчет строк раз в interval_hours часов
+    (результат доступен через generate_database_statistics(..., source="exact"))
+
+    Args:
+        mysql_config: Настройки MySQL (соединение берется из пула twitter_scraper_db)
+        interval_hours: Интервал между подсчетами в часах
+    """
+    global _exact_thread
+    if _exact_thread is not None and _exact_thread.is_alive():
+        return
+    _exact_stop.clear()
+    _exact_thread = threading.Thread(target=_exact_statistics_loop, args=(mysql_config, interval_hours * 3600),
+                                     name="twitter-exact-stats", daemon=True)
+    _exact_thread.start()
+    logger.info("Запущен фоновый точный подсчет строк (раз в %s ч)", interval_hours)
+
+
+def stop_exact_statistics(timeout=10):
+    """Останавливает фоновый точный подсчет строк"""
+    global _exact_thread
+    if _exact_thread is None:
+        return
+    _exact_stop.set()
+    _exact_thread.join(timeout)
+    _exact_thread = None
+
+
 def display_results_summary(results, time_filter_hours, images_dir=None): # images_dir больше не обязателен
     """
     Отображает сводку результатов работы скрапера (без изображений, ссылок, статей)
@@ -169,18 +374,21 @@ def display_results_summary(results, time_filter_hours, images_dir=None): # imag
         # Выводим информацию о каждом пользователе и его твитах
         for user_result in results:
             if not isinstance(user_result, dict):
-                 logger.warning(f"Некорректный формат результата пользователя: {user_result}")
+                 logger.warning("Некорректный формат результата пользователя: %s", user_result)
                  continue
 
             print(f"\n--- {user_result.get('name', 'Unknown')} (@{user_result.get('username', 'unknown')}) ---")
-            logger.info(f"Результаты для пользователя @{user_result.get('username', 'unknown')}")
+            if user_result.get('stale'):
+                # Результат из кэша, обновление выполняется в фоне (режим stale-while-revalidate)
+                print(f"(данные из кэша {user_result.get('cache_age', 0) / 60:.0f} мин. назад, обновляются)")
+            logger.info("Результаты для пользователя @%s", user_result.get('username', 'unknown'))
 
             tweets = user_result.get('tweets', [])
             if tweets:
                 print("\nТвиты:")
                 for tweet in tweets:
                     if not isinstance(tweet, dict):
-                         logger.warning(f"Некорректный формат твита: {tweet}")
+                         logger.warning("Некорректный формат твита: %s", tweet)
                          continue
                     try:
                         time_str = format_time_ago(tweet.get("created_at", ""))
@@ -205,7 +413,7 @@ def display_results_summary(results, time_filter_hours, images_dir=None): # imag
 
                         print("-" * 20) # Разделитель между твитами
                     except Exception as e:
-                        logger.error(f"Ошибка при выводе информации о твите {tweet.get('url', '')}: {e}")
+                        logger.error("Ошибка при выводе информации о твите %s: %s", tweet.get('url', ''), e)
             else:
                  print("Нет свежих твитов для отображения.")
 
@@ -229,6 +437,6 @@ def display_results_summary(results, time_filter_hours, images_dir=None): # imag
         logger.info("Сводка результатов отображена успешно")
 
     except Exception as e:
-        logger.error(f"Ошибка при отображении сводки результатов: {e}")
+        logger.error("Ошибка при отображении сводки результатов: %s", e)
         print(f"Ошибка при отображении результатов: {e}")
 
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для обслуживания таблицы tweet_stats_history (снимки счетчиков твитов):
+добавление месячных секций и прореживание старых снимков - последние
+STATS_FULL_RESOLUTION_HOURS часов хранятся полностью, более старые - по одному
+снимку (последнему) на твит за час. Прореживание запоминает последний
+обработанный час и запускается не чаще STATS_MAINTENANCE_INTERVAL_SECONDS,
+поэтому уже прореженные часы повторно не просматриваются.
+"""
+
+import time
+import logging
+import datetime
+import threading
+
+from mysql.connector import Error
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.stats_history')
+
+STATS_HISTORY_TABLE = "tweet_stats_history"
+STATS_FULL_RESOLUTION_HOURS = 48  # Снимки моложе этого срока не прореживаются
+STATS_COMPACTION_LOOKBACK_HOURS = 7 * 24  # Насколько далеко назад от границы проверять при первом запуске
+STATS_MAINTENANCE_INTERVAL_SECONDS = 3600  # Как часто maintain_stats_history выполняет обслуживание
+STATS_PARTITION_MONTHS_AHEAD = 2  # Сколько будущих месячных секций держать готовыми
+
+# Удаляет все снимки часа, кроме последнего, для твитов с несколькими снимками в этом часе
+COMPACT_HOUR_SQL = f"""
+    DELETE h FROM {STATS_HISTORY_TABLE} h
+    JOIN (
+        SELECT tweet_id, MAX(observed_at) AS keep_at
+        FROM {STATS_HISTORY_TABLE}
+        WHERE observed_at >= %s AND observed_at < %s
+        GROUP BY tweet_id
+        HAVING COUNT(*) > 1
+    ) k ON h.tweet_id = k.tweet_id
+    WHERE h.observed_at >= %s AND h.observed_at < k.keep_at
+"""
+
+_lock = threading.Lock()
+_compacted_until = None  # Граница (начало часа, UTC), до которой снимки уже прорежены
+_last_maintenance = None  # Время (monotonic) последнего обслуживания
+
+
+def _month_start(dt, months_ahead=0):
+    """Первое число месяца через months_ahead месяцев после dt"""
+    month_index = dt.year * 12 + dt.month - 1 + months_ahead
+    return datetime.datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def ensure_stats_history_partitions(connection, months_ahead=STATS_PARTITION_MONTHS_AHEAD):
+    """
+    Выделяет из секции p_future месячные секции до текущего месяца + months_ahead
+
+    Args:
+        connection: Соединение с MySQL
+        months_ahead: Количество будущих месяцев
+
+    Returns:
+        int: Количество добавленных секций
+    """
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            """, (STATS_HISTORY_TABLE,))
+        existing = {row[0] for row in cursor.fetchall()}
+        if "p_future" not in existing:
+            logger.warning("Таблица %s не секционирована, секции не добавляются", STATS_HISTORY_TABLE)
+            return 0
+
+        monthly = sorted(name for name in existing if name.startswith("p_") and name[2:].isdigit())
+        now = datetime.datetime.now(datetime.timezone.utc)
+        added = 0
+        for months in range(0, months_ahead + 1):
+            month = _month_start(now, months)
+            name = f"p_{month:%Y%m}"
+            # Новая секция может идти только после последней существующей
+            if name in existing or (monthly and name <= monthly[-1]):
+                continue
+            upper_bound = _month_start(month, 1)
+            cursor.execute(f"""
+                ALTER TABLE {STATS_HISTORY_TABLE} REORGANIZE PARTITION p_future INTO (
+                    PARTITION {name} VALUES LESS THAN ('{upper_bound:%Y-%m-%d %H:%M:%S}'),
+                    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+                )
+            """)
+            existing.add(name)
+            monthly.append(name)
+            added += 1
+            logger.info("Добавлена секция %s таблицы %s", name, STATS_HISTORY_TABLE)
+        return added
+
+    except Error as e:
+        logger.error("Ошибка при добавлении секций %s: %s", STATS_HISTORY_TABLE, e)
+        return 0
+
+
+def compact_stats_history(connection, full_resolution_hours=STATS_FULL_RESOLUTION_HOURS,
+                          lookback_hours=STATS_COMPACTION_LOOKBACK_HOURS):
+    """
+    Прореживает снимки старше full_resolution_hours до одного в час на твит.
+    Обрабатывает по одному часу за транзакцию (короткие блокировки), начиная
+    с часа, на котором остановился прошлый запуск.
+
+    Args:
+        connection: Соединение с MySQL
+        full_resolution_hours: Сколько последних часов хранить без прореживания
+        lookback_hours: Сколько часов до границы обрабатывать при первом запуске
+
+    Returns:
+        int: Количество удаленных снимков
+    """
+    # observed_at хранится в UTC без часового пояса
+    boundary = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0, tzinfo=None) \
+        - datetime.timedelta(hours=full_resolution_hours)
+    global _compacted_until
+    hour_start = boundary - datetime.timedelta(hours=lookback_hours)
+    if _compacted_until is not None and _compacted_until > hour_start:
+        hour_start = _compacted_until
+    deleted = 0
+    try:
+        cursor = connection.cursor()
+        while hour_start < boundary:
+            hour_end = hour_start + datetime.timedelta(hours=1)
+            cursor.execute(COMPACT_HOUR_SQL, (hour_start, hour_end, hour_start))
+            deleted += cursor.rowcount
+            connection.commit()
+            hour_start = hour_end
+            _compacted_until = hour_start
+    except Error as e:
+        logger.error("Ошибка при прореживании %s: %s", STATS_HISTORY_TABLE, e)
+        try:
+            connection.rollback()
+        except Error:
+            pass
+
+    if deleted:
+        logger.info("Из %s удалено %s промежуточных снимков", STATS_HISTORY_TABLE, deleted)
+    return deleted
+
+
+def maintain_stats_history(connection, interval_seconds=STATS_MAINTENANCE_INTERVAL_SECONDS):
+    """
+    Обслуживание истории счетчиков: секции на будущие месяцы и прореживание.
+    Можно вызывать каждый цикл - обслуживание выполняется не чаще interval_seconds.
+
+    Args:
+        connection: Соединение с MySQL
+        interval_seconds: Минимальный интервал между обслуживаниями
+
+    Returns:
+        dict: added_partitions и deleted_snapshots или None, если время еще не пришло
+    """
+    global _last_maintenance
+    with _lock:
+        now = time.monotonic()
+        if _last_maintenance is not None and now - _last_maintenance < interval_seconds:
+            return None
+        _last_maintenance = now
+        return {
+            "added_partitions": ensure_stats_history_partitions(connection),
+            "deleted_snapshots": compact_stats_history(connection),
+        }
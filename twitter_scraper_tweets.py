@@ -8,32 +8,45 @@
 """
 
 import os
-import json
+import re
 import time
+import datetime
+import threading
 import logging
-import re
 # requests больше не нужен напрямую здесь
 # import requests
-from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
-from selenium.webdriver.common.action_chains import ActionChains
 
 # Импорты для резервного метода и утилит
 # extract_images_from_tweet удален
-from twitter_scraper_utils import extract_tweet_stats
+from twitter_scraper_utils import (
+    extract_tweet_stats, snowflake_to_datetime, snowflake_to_iso, get_tweet_time
+)
 # ИЗМЕНЕНО: Импортируем функцию из retweet_utils, которая больше не возвращает original_author
 from twitter_scraper_retweet_utils import extract_retweet_info_enhanced
 # extract_all_links_from_tweet удален
 from twitter_scraper_links_utils import (
     is_tweet_truncated,
-    get_full_tweet_text,
-    extract_full_tweet_text_from_html
+    resolve_truncated_tweets
 )
 # Импорт API клиента
-from twitter_api_client import get_tweet_by_id, process_api_tweet_data
+from twitter_api_client import get_tweet_by_id, process_api_tweet_data, submit_tweet_fetch, get_cached_tweet_content
+# Офлайн-разбор снимков страницы (режим extraction_mode="snapshot")
+from twitter_scraper_snapshot import parse_timeline_html, extract_tweet_id, build_tweet_record
+# Перехват ответов GraphQL UserTweets (режим extraction_mode="graphql")
+from twitter_scraper_graphql import collect_timeline_tweets, drain_network_log
+# Отметка последнего обработанного твита (инкрементальный сбор)
+from twitter_scraper_user_cache import get_cached_user, save_user_cached, forget_user
+from twitter_scraper_known_tweets import load_known_tweet_ids, make_known_tweet_predicate
+from twitter_timeline_cache import get_cached_timeline, store_timeline
+from twitter_scraper_html_archive import archive_page_source
+
+from twitter_scraper_state import (
+    get_high_water_mark, update_high_water_mark, counts_for_high_water_mark, cut_records_at_mark
+)
 
 # Настройка логирования
 logger = logging.getLogger('twitter_scraper.tweets')
@@ -45,6 +58,38 @@ os.makedirs(CACHE_DIR, exist_ok=True)
 HTML_CACHE_DIR = "twitter_html_cache" # Оставляем для отладки HTML
 os.makedirs(HTML_CACHE_DIR, exist_ok=True)
 
+# Счетчик непрочитанных в начале заголовка вкладки: "(3) Имя (@username) / X"
+_TITLE_UNREAD_PREFIX_RE = re.compile(r"^\(\d+\+?\)\s*")
+
+# Время загрузки профилей и шагов скролла (для сравнения обычного и облегченного режима браузера)
+_page_timing_lock = threading.Lock()
+_page_timing_stats = {"page_loads": 0, "page_load_time": 0.0, "max_page_load_time": 0.0,
+                      "scroll_steps": 0, "scroll_time": 0.0, "max_scroll_time": 0.0}
+
+
+def _record_page_timing(kind, elapsed):
+    """Учитывает время загрузки профиля (kind="page_load") или шага скролла (kind="scroll")"""
+    count_key = "page_loads" if kind == "page_load" else "scroll_steps"
+    with _page_timing_lock:
+        _page_timing_stats[count_key] += 1
+        _page_timing_stats[f"{kind}_time"] += elapsed
+        _page_timing_stats[f"max_{kind}_time"] = max(_page_timing_stats[f"max_{kind}_time"], elapsed)
+
+
+def get_page_timing_stats():
+    """
+    Возвращает статистику времени загрузки страниц профиля и шагов скролла
+
+    Returns:
+        dict: page_loads, avg_page_load_time, max_page_load_time,
+              scroll_steps, avg_scroll_time, max_scroll_time (в секундах)
+    """
+    with _page_timing_lock:
+        stats = dict(_page_timing_stats)
+    stats["avg_page_load_time"] = stats["page_load_time"] / stats["page_loads"] if stats["page_loads"] else 0.0
+    stats["avg_scroll_time"] = stats["scroll_time"] / stats["scroll_steps"] if stats["scroll_steps"] else 0.0
+    return stats
+
 
 def expand_tweet_content(driver, tweet_element, timeout=5):
     """
@@ -73,16 +118,16 @@ def expand_tweet_content(driver, tweet_element, timeout=5):
 
                 if buttons:
                     show_more_buttons.extend(buttons)
-                    logger.info(f"Найдены кнопки раскрытия через селектор: {selector}")
+                    logger.info("Найдены кнопки раскрытия через селектор: %s", selector)
             except Exception as e:
                  if "stale element reference" not in str(e).lower():
-                     logger.warning(f"Ошибка поиска кнопки раскрытия: {e}")
+                     logger.warning("Ошибка поиска кнопки раскрытия: %s", e)
                  continue
 
         show_more_buttons = list(dict.fromkeys(show_more_buttons))
 
         if show_more_buttons:
-            logger.info(f"Найдено {len(show_more_buttons)} кнопок раскрытия")
+            logger.info("Найдено %s кнопок раскрытия", len(show_more_buttons))
             for button in show_more_buttons:
                 try:
                     # Прокручиваем к кнопке
@@ -95,16 +140,16 @@ def expand_tweet_content(driver, tweet_element, timeout=5):
                         button.click()
                         clicked_button = button # Сохраняем кнопку
                     except Exception as click_err:
-                        logger.warning(f"Стандартный клик не удался ({click_err}), пробуем JavaScript клик.")
+                        logger.warning("Стандартный клик не удался (%s), пробуем JavaScript клик.", click_err)
                         driver.execute_script("arguments[0].click();", button)
                         clicked_button = button # Сохраняем кнопку
 
                     # ЗАМЕНА: Ждем, пока кнопка не исчезнет (станет устаревшей)
                     try:
                         WebDriverWait(driver, timeout).until(EC.staleness_of(clicked_button))
-                        logger.info(f"Кнопка раскрытия стала устаревшей после клика (ожидание {timeout} сек).")
+                        logger.info("Кнопка раскрытия стала устаревшей после клика (ожидание %s сек).", timeout)
                     except TimeoutException:
-                        logger.warning(f"Кнопка раскрытия НЕ стала устаревшей за {timeout} сек. Возможно, контент раскрылся иначе.")
+                        logger.warning("Кнопка раскрытия НЕ стала устаревшей за %s сек. Возможно, контент раскрылся иначе.", timeout)
                     # time.sleep(2) # Заменено на WebDriverWait
 
                     logger.info("Контент успешно раскрыт (или попытка раскрытия выполнена)")
@@ -114,7 +159,7 @@ def expand_tweet_content(driver, tweet_element, timeout=5):
                      logger.warning("Кнопка раскрытия устарела перед кликом.")
                      continue # Попробуем следующую кнопку, если есть
                 except Exception as e:
-                    logger.warning(f"Ошибка при попытке раскрытия: {e}")
+                    logger.warning("Ошибка при попытке раскрытия: %s", e)
 
         # Проверка на многоточие (если клик не удался или не было кнопки)
         if not expanded:
@@ -131,7 +176,7 @@ def expand_tweet_content(driver, tweet_element, timeout=5):
 
     except Exception as e:
         if "stale element reference" not in str(e).lower():
-            logger.error(f"Ошибка при раскрытии твита: {e}")
+            logger.error("Ошибка при раскрытии твита: %s", e)
         return False
 
 
@@ -155,9 +200,9 @@ def find_all_tweets(driver):
                         processed_elements.add(tweet.id)
                 except StaleElementReferenceException:
                     continue # Пропускаем устаревший элемент
-            logger.info(f"Найдено {len(standard_tweets)} видимых твитов по стандартному селектору")
+            logger.info("Найдено %s видимых твитов по стандартному селектору", len(standard_tweets))
     except Exception as e:
-         logger.warning(f"Ошибка поиска по стандартному селектору: {e}")
+         logger.warning("Ошибка поиска по стандартному селектору: %s", e)
 
 
     # Стратегия 2: Расширенный селектор (если нашли мало)
@@ -175,12 +220,12 @@ def find_all_tweets(driver):
                  except StaleElementReferenceException:
                      continue # Пропускаем устаревший элемент
             if new_tweets_count > 0:
-                 logger.info(f"Найдено дополнительно {new_tweets_count} видимых твитов по расширенному селектору")
+                 logger.info("Найдено дополнительно %s видимых твитов по расширенному селектору", new_tweets_count)
         except Exception as e:
-             logger.warning(f"Ошибка поиска по расширенному селектору: {e}")
+             logger.warning("Ошибка поиска по расширенному селектору: %s", e)
 
 
-    logger.info(f"Всего найдено уникальных видимых твитов на странице: {len(tweets)}")
+    logger.info("Всего найдено уникальных видимых твитов на странице: %s", len(tweets))
     return tweets
 
 
@@ -201,7 +246,7 @@ def expand_tweet_content_improved(driver, tweet_element, timeout=5):
             logger.warning("Таймаут ожидания видимости элемента для раскрытия.")
             return False
         except Exception as scroll_err:
-            logger.warning(f"Ошибка при прокрутке/ожидании видимости элемента для раскрытия: {scroll_err}")
+            logger.warning("Ошибка при прокрутке/ожидании видимости элемента для раскрытия: %s", scroll_err)
             return False
 
 
@@ -225,9 +270,9 @@ def expand_tweet_content_improved(driver, tweet_element, timeout=5):
                             # Ждем, пока элемент не станет устаревшим
                             try:
                                 WebDriverWait(driver, timeout).until(EC.staleness_of(clicked_element))
-                                logger.info(f"Элемент раскрытия ({selector}) стал устаревшим после клика.")
+                                logger.info("Элемент раскрытия (%s) стал устаревшим после клика.", selector)
                             except TimeoutException:
-                                logger.warning(f"Элемент раскрытия ({selector}) НЕ стал устаревшим за {timeout} сек.")
+                                logger.warning("Элемент раскрытия (%s) НЕ стал устаревшим за %s сек.", selector, timeout)
                             # time.sleep(2) # Заменено
 
                             expanded = True
@@ -237,22 +282,289 @@ def expand_tweet_content_improved(driver, tweet_element, timeout=5):
                             logger.warning("Кнопка/элемент раскрытия устарел(а) перед/во время клика.")
                             continue
                         except Exception as e:
-                            logger.warning(f"Ошибка при клике на кнопку раскрытия ({selector}): {e}")
+                            logger.warning("Ошибка при клике на кнопку раскрытия (%s): %s", selector, e)
                     if expanded:
                         break
             except StaleElementReferenceException:
-                 logger.warning(f"Элемент твита устарел при поиске кнопки раскрытия ({selector}).")
+                 logger.warning("Элемент твита устарел при поиске кнопки раскрытия (%s).", selector)
                  continue # Пробуем следующий селектор
             except Exception as e:
                  if "stale element reference" not in str(e).lower():
-                     logger.warning(f"Ошибка поиска кнопки раскрытия (improved) ({selector}): {e}")
+                     logger.warning("Ошибка поиска кнопки раскрытия (improved) (%s): %s", selector, e)
 
         return expanded
     except Exception as e:
         if "stale element reference" not in str(e).lower():
-            logger.error(f"Ошибка при раскрытии твита (improved): {e}")
+            logger.error("Ошибка при раскрытии твита (improved): %s", e)
         return False
 
+def count_rendered_tweets(driver):
+    """
+    Считает твиты в DOM одним вызовом execute_script
+    (вместо find_all_tweets с is_displayed() для каждого элемента).
+    """
+    try:
+        return driver.execute_script(
+            "return document.querySelectorAll('article[data-testid=\"tweet\"]').length;") or 0
+    except Exception as e:
+        logger.warning("Ошибка подсчета твитов через JavaScript: %s", e)
+        return len(find_all_tweets(driver))
+
+
+# Скрипт массового извлечения: обходит DOM один раз и возвращает все отрисованные твиты
+EXTRACT_TWEETS_JS = r"""
+const username = (arguments[0] || '').toLowerCase();
+const parseCount = (el) => {
+    if (!el) return 0;
+    const label = el.getAttribute('aria-label') || el.innerText || '';
+    const match = label.match(/\d[\d,.\s\u00a0]*/);
+    if (!match) return 0;
+    const digits = match[0].replace(/\D/g, '');
+    return digits ? parseInt(digits, 10) : 0;
+};
+const showMoreTexts = ['Show more', 'Показать ещё', 'Показать еще'];
+const results = [];
+for (const article of document.querySelectorAll('article[data-testid="tweet"]')) {
+    const time = article.querySelector('time');
+    let href = null;
+    const timeLink = time ? time.closest('a[href*="/status/"]') : null;
+    if (timeLink) href = timeLink.getAttribute('href');
+    if (!href) {
+        for (const link of article.querySelectorAll('a[href*="/status/"]')) {
+            const linkHref = link.getAttribute('href') || '';
+            if (!href) href = linkHref;
+            if (linkHref.toLowerCase().includes('/' + username + '/status/')) { href = linkHref; break; }
+        }
+    }
+    const idMatch = href ? href.match(/\/status\/(\d+)/) : null;
+    if (!idMatch) continue;
+
+    const textEl = article.querySelector('div[data-testid="tweetText"]') || article.querySelector('[lang][dir="auto"]');
+    const text = textEl ? textEl.innerText.trim() : '';
+    const context = article.querySelector('[data-testid="socialContext"]');
+    let author = null;
+    for (const link of article.querySelectorAll('[data-testid="User-Name"] a[href]')) {
+        const linkHref = link.getAttribute('href') || '';
+        if (!linkHref.includes('/status/')) { author = linkHref.replace(/^\/+|\/+$/g, '').split('/').pop().split('?')[0]; break; }
+    }
+    const truncated = !!article.querySelector('[data-testid="tweet-text-show-more-link"]')
+        || Array.from(article.querySelectorAll('[role="button"], span')).some(el => showMoreTexts.includes(el.textContent.trim()))
+        || (!!textEl && (text.endsWith('…') || text.endsWith('...')));
+
+    results.push({
+        id: idMatch[1],
+        href: href,
+        text: text,
+        datetime: time ? time.getAttribute('datetime') : '',
+        replies: parseCount(article.querySelector('[data-testid="reply"]')),
+        retweets: parseCount(article.querySelector('[data-testid="retweet"], [data-testid="unretweet"]')),
+        likes: parseCount(article.querySelector('[data-testid="like"], [data-testid="unlike"]')),
+        social_context: context ? context.innerText.trim() : '',
+        author: author,
+        truncated: truncated
+    });
+}
+return results;
+"""
+
+
+def extract_tweets_with_js(driver, username):
+    """
+    Извлекает все отрисованные твиты одним вызовом execute_script.
+    Заменяет N×M запросов к WebDriver (find_all_tweets, extract_tweet_stats и т.д.) на один.
+
+    Args:
+        driver: Экземпляр Selenium WebDriver
+        username: Имя отслеживаемого пользователя
+
+    Returns:
+        list: Список словарей твитов или None, если скрипт не удалось выполнить
+              (в этом случае используется поэлементный путь через Selenium)
+    """
+    try:
+        raw_tweets = driver.execute_script(EXTRACT_TWEETS_JS, username)
+    except Exception as e:
+        logger.warning("Ошибка JavaScript-извлечения твитов: %s", e)
+        return None
+
+    if not isinstance(raw_tweets, list):
+        logger.warning("JavaScript-извлечение вернуло некорректный результат")
+        return None
+
+    records = []
+    for raw in raw_tweets:
+        # Без time[datetime] время берется из ID твита
+        created_at = raw.get("datetime") or snowflake_to_iso(raw.get("id"))
+        if not created_at:
+            logger.warning("Не удалось найти время для твита %s", raw.get('id'))
+            continue
+        records.append(build_tweet_record(
+            raw["id"], raw.get("href"), raw.get("text", ""), created_at,
+            stats={
+                "likes": raw.get("likes", 0) or 0,
+                "retweets": raw.get("retweets", 0) or 0,
+                "replies": raw.get("replies", 0) or 0,
+            },
+            social_context=raw.get("social_context", ""),
+            author=raw.get("author"),
+            is_truncated=raw.get("truncated", False),
+        ))
+
+    logger.info("JavaScript-извлечением получено %s твитов для @%s", len(records), username)
+    return records
+
+
+def name_from_title(title):
+    """
+    Отображаемое имя из заголовка страницы профиля ("Имя (@username) / X").
+    Отделяется по последнему " (@", поэтому скобки в самом имени сохраняются
+
+    Args:
+        title: Заголовок страницы (driver.title)
+
+    Returns:
+        str: Имя или "", если заголовок не страницы профиля
+    """
+    title = _TITLE_UNREAD_PREFIX_RE.sub("", title or "")
+    if " (@" not in title:
+        return ""
+    return title.rsplit(" (@", 1)[0].strip()
+
+
+def merge_known_tweet(record, stored=None):
+    """
+    Запись для твита, сохраненного в прошлых циклах: текст, дата и is_truncated - из
+    сохраненной записи (полный текст не заменяется обрезанным со страницы), счетчики - со страницы
+
+    Args:
+        record: Словарь твита со страницы
+        stored: Сохраненный словарь твита (кэш ленты) или None
+
+    Returns:
+        dict: Новый словарь твита
+    """
+    if stored is None:
+        return dict(record)
+    return dict(stored, stats=record.get("stats") or stored.get("stats"))
+
+
+def start_tweet_batch(records, processed_tweet_ids, use_api=True, is_known=None, known_tweets=None):
+    """
+    Отбирает новые твиты шага скролла и сразу запускает их параллельную загрузку через API.
+    Результаты забираются позже в finish_tweet_batch, поэтому задержка API
+    совпадает по времени со следующим скроллом, а не добавляется к нему.
+
+    Args:
+        records: Список словарей твитов в формате get_tweets_with_selenium
+        processed_tweet_ids: Множество уже обработанных ID (обновляется)
+        use_api: Запрашивать ли твит через API (не нужно, если записи уже полные, как из GraphQL)
+        is_known: Функция tweet_id -> bool для твитов, уже сохраненных ранее; для них
+                  обновляются только счетчики (без API и полного текста)
+        known_tweets: Сохраненные записи {tweet_id: твит} (кэш ленты) для merge_known_tweet
+
+    Returns:
+        list: Пакет [(tweet_id, record, future или None), ...] в порядке на странице
+    """
+    batch = []
+    for record in records:
+        tweet_id = extract_tweet_id(record.get("url", ""))
+        if not tweet_id or tweet_id in processed_tweet_ids:
+            continue
+        processed_tweet_ids.add(tweet_id)
+        if is_known is not None and is_known(tweet_id):
+            # Записи GraphQL полные, остальные дополняются сохраненным текстом
+            stored = known_tweets.get(tweet_id) if use_api and known_tweets else None
+            batch.append((tweet_id, merge_known_tweet(record, stored), None))
+            continue
+        future = None
+        if use_api:
+            # Твит есть в кэше API: текст и дата оттуда, устаревшие счетчики - со страницы, без запроса
+            cached_tweet = get_cached_tweet_content(tweet_id, record.get("url", ""), record.get("stats"))
+            if cached_tweet is not None:
+                batch.append((tweet_id, cached_tweet, None))
+                continue
+            future = submit_tweet_fetch(tweet_id, cache_checked=True)
+        batch.append((tweet_id, record, future))
+
+    requests_started = sum(1 for _, _, future in batch if future is not None)
+    if requests_started:
+        logger.info("Запущено %s параллельных запросов к API", requests_started)
+    return batch
+
+
+def finish_tweet_batch(batch, tweets_data):
+    """
+    Забирает результаты API для пакета (в исходном порядке) и добавляет твиты в tweets_data
+    (в базу они записываются одним пакетом после скроллинга).
+    Если API не вернул данных, используется запись, извлеченная со страницы
+    (обрезанный текст дополняется позже, в resolve_truncated_tweets).
+
+    Args:
+        batch: Пакет из start_tweet_batch
+        tweets_data: Список собранных твитов (дополняется)
+
+    Returns:
+        int: Количество твитов, добавленных в tweets_data
+    """
+    new_tweets = 0
+    for tweet_id, record, future in batch:
+        tweet_url = record.get("url", "")
+        logger.debug("Обработка твита ID: %s", tweet_id)
+
+        try:
+            tweet_data = None
+            api_tweet_data_raw = future.result() if future is not None else None
+            if api_tweet_data_raw:
+                api_tweet_data = process_api_tweet_data(api_tweet_data_raw, tweet_url)
+                if api_tweet_data and api_tweet_data.get("text"):
+                    logger.debug("Твит %s успешно получен через API", tweet_id)
+                    tweet_data = api_tweet_data
+
+            if tweet_data is None:
+                if future is not None:
+                    logger.debug("API не вернул данные для %s, используем данные со страницы", tweet_id)
+                tweet_data = dict(record)
+
+            tweets_data.append(tweet_data)
+            new_tweets += 1
+            logger.debug("Добавлен твит ID: %s", tweet_id)
+        except Exception as e:
+            logger.error("Ошибка при обработке твита %s: %s", tweet_id, e)
+
+    return new_tweets
+
+
+def drop_records_outside_window(records, cutoff_time, processed_tweet_ids, old_streak=0):
+    """
+    Отбрасывает твиты шага скролла, опубликованные раньше cutoff_time, до запросов к API и записи в базу.
+    Считает подряд идущие старые твиты ленты (закрепленные и ретвиты не учитываются:
+    их дата не соответствует положению в ленте).
+
+    Args:
+        records: Список словарей твитов в порядке ленты
+        cutoff_time: Граница окна (datetime с часовым поясом)
+        processed_tweet_ids: Множество уже обработанных ID (старые твиты добавляются, чтобы не учитывать их повторно)
+        old_streak: Длина серии старых твитов на предыдущих шагах
+
+    Returns:
+        tuple: (твиты в пределах окна, новая длина серии старых твитов)
+    """
+    recent_records = []
+    for record in records:
+        tweet_id = extract_tweet_id(record.get("url", ""))
+        if not tweet_id or tweet_id in processed_tweet_ids:
+            continue
+        tweet_time = get_tweet_time(record)
+        is_old = tweet_time is not None and tweet_time < cutoff_time
+        if counts_for_high_water_mark(record):
+            old_streak = old_streak + 1 if is_old else 0
+        if is_old:
+            processed_tweet_ids.add(tweet_id)
+        else:
+            recent_records.append(record)
+    return recent_records, old_streak
+
+
 # --- Функция process_tweet_fallback удалена ---
 
 # get_tweet_from_api остается в twitter_api_client.py
@@ -261,7 +573,9 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                              cache_duration_hours=1, time_filter_hours=24, force_refresh=False,
                              extract_full_tweets=True,
                              dependencies=None, html_cache_dir="twitter_html_cache",
-                             scroll_timeout=10, page_load_timeout=20):
+                             scroll_timeout=10, page_load_timeout=20, extraction_mode="selenium",
+                             incremental=False, max_old_tweets=3, db_writer=None, stats_only_known=False,
+                             refresh_past_mark=False):
     """
     Получает твиты пользователя с помощью Selenium, используя WebDriverWait.
     (Функционал изображений, ссылок и статей удален)
@@ -277,9 +591,28 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
         force_refresh: Принудительное обновление данных
         extract_full_tweets: Извлекать ли полные версии длинных твитов
         dependencies: Словарь с необходимыми функциями
-        html_cache_dir: Директория для сохранения HTML (для отладки)
+        html_cache_dir: Директория архива сжатых HTML-снимков (для отладки, twitter_scraper_html_archive)
         scroll_timeout: Макс. время ожидания новых твитов после скролла (сек)
         page_load_timeout: Макс. время ожидания загрузки страницы профиля (сек)
+        extraction_mode: Способ извлечения твитов со страницы:
+            "selenium" - поэлементно через WebDriver (прежний способ),
+            "snapshot" - один driver.page_source на шаг скролла с разбором через lxml,
+            "js" - один execute_script на шаг скролла, возвращающий все твиты в JSON,
+            "graphql" - ответы UserTweets, перехваченные через DevTools (нужен
+                        initialize_browser(..., capture_network=True)); без API и раскрытия текста
+        incremental: Останавливать скроллинг на твите, обработанном в прошлом цикле
+                     (отметка хранится в twitter_scraper_state); ранее собранные твиты
+                     за time_filter_hours берутся из кэша
+        max_old_tweets: Сколько подряд твитов старше time_filter_hours (не считая
+                        закрепленных и ретвитов) завершают скроллинг; 0 - не завершать
+        db_writer: Функция (username, name, tweets) для фоновой записи в базу
+                   (twitter_scraper_db_writer.enqueue_account_tweets); если задана,
+                   db_connection не используется
+        stats_only_known: Загрузить из базы ID твитов аккаунта за time_filter_hours и для уже
+                          сохраненных только обновлять счетчики (без API и полного текста)
+        refresh_past_mark: Не останавливаться на отметке incremental, а листать до конца окна
+                           time_filter_hours, обновляя счетчики твитов за отметкой (без API
+                           и полного текста); без окна сбора не действует
 
     Returns:
         dict: Словарь с результатами
@@ -288,55 +621,46 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
         dependencies = {}
 
     # Получаем необходимые функции из зависимостей
-    debug_print = dependencies.get('debug_print', lambda *args, **kwargs: None)
     save_user_to_db = dependencies.get('save_user_to_db', lambda *args, **kwargs: None)
-    save_tweet_to_db = dependencies.get('save_tweet_to_db', lambda *args, **kwargs: None)
+    save_tweets_to_db = dependencies.get('save_tweets_to_db', lambda *args, **kwargs: None)
     filter_recent_tweets = dependencies.get('filter_recent_tweets', lambda *args, **kwargs: [])
     extract_tweet_stats = dependencies.get('extract_tweet_stats', lambda *args, **kwargs: {})
     extract_retweet_info_enhanced = dependencies.get('extract_retweet_info_enhanced', lambda *args, **kwargs: {})
     is_tweet_truncated = dependencies.get('is_tweet_truncated', lambda *args, **kwargs: False)
-    get_full_tweet_text = dependencies.get('get_full_tweet_text', lambda *args, **kwargs: "")
-
-    print(f"Начинаем получение твитов для @{username}...")
-    logger.info(f"Начинаем получение твитов для @{username}...")
-    cache_file = os.path.join(CACHE_DIR, f"{username}_tweets_selenium.json")
 
+    logger.info("Начинаем получение твитов для @%s...", username)
     result = {"username": username, "name": username, "tweets": []}
+    window_start = time.time() - time_filter_hours * 3600 if time_filter_hours else None
 
-    # Проверка кэша (без изменений)
-    if use_cache and os.path.exists(cache_file) and not force_refresh:
+    # Проверка кэша: выборка твитов за окно сбора из локальной базы (twitter_timeline_cache)
+    if use_cache and not force_refresh:
         try:
-            debug_print(f"Проверка кэша для @{username}...")
-            file_modified_time = os.path.getmtime(cache_file)
-            current_time = time.time()
-            if current_time - file_modified_time < cache_duration_hours * 3600:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                debug_print(f"Используем кэшированные данные для @{username}")
-                logger.info(f"Используем кэшированные данные для @{username}")
-
-                result["name"] = cached_data.get("name", username)
-                recent_tweets = filter_recent_tweets(cached_data.get('tweets', []), time_filter_hours)
-                result["tweets"] = recent_tweets[:max_tweets]
+            logger.debug("Проверка кэша для @%s...", username)
+            cached_data = get_cached_timeline(username, since=window_start, limit=max_tweets)
+            if cached_data and time.time() - cached_data["updated_at"] < cache_duration_hours * 3600:
+                logger.info("Используем кэшированные данные для @%s", username)
+
+                result["name"] = cached_data.get("name") or username
+                result["tweets"] = cached_data["tweets"]
 
                 if result["tweets"]:
                     return result
                 else:
-                    debug_print(f"В кэше нет твитов за последние {time_filter_hours} часов, запрашиваем свежие данные")
-                    logger.info(f"В кэше нет твитов за последние {time_filter_hours} часов, запрашиваем свежие данные")
+                    logger.info("В кэше нет твитов за последние %s часов, запрашиваем свежие данные", time_filter_hours)
         except Exception as e:
-            print(f"Ошибка при чтении кэша: {e}")
-            logger.error(f"Ошибка при чтении кэша: {e}")
+            logger.error("Ошибка при чтении кэша: %s", e)
     elif force_refresh:
-        debug_print(f"Принудительное обновление данных для @{username}")
-        logger.info(f"Принудительное обновление данных для @{username}")
+        logger.info("Принудительное обновление данных для @%s", username)
 
     try:
-        debug_print(f"Загружаем страницу профиля @{username}...")
-        logger.info(f"Загружаем страницу профиля @{username}...")
+        logger.info("Загружаем страницу профиля @%s...", username)
 
         profile_url = f"https://twitter.com/{username}"
-        debug_print(f"Переходим по URL: {profile_url}")
+        logger.debug("Переходим по URL: %s", profile_url)
+        if extraction_mode == "graphql":
+            # Отбрасываем сетевые события предыдущих страниц
+            drain_network_log(driver)
+        page_load_started = time.perf_counter()
         driver.get(profile_url)
 
         # Ждем загрузки страницы и появления первого твита
@@ -344,73 +668,69 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
             WebDriverWait(driver, page_load_timeout).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, 'article[data-testid="tweet"]'))
             )
-            debug_print("Страница загружена, твиты найдены")
-            logger.info("Страница загружена, твиты найдены")
+            page_load_time = time.perf_counter() - page_load_started
+            _record_page_timing("page_load", page_load_time)
+            logger.info("Страница загружена, твиты найдены за %.2f сек", page_load_time)
         except TimeoutException:
-            debug_print(f"Таймаут ({page_load_timeout} сек) при ожидании загрузки твитов, пробуем продолжить...")
-            logger.warning(f"Таймаут ({page_load_timeout} сек) при ожидании загрузки твитов, пробуем продолжить...")
+            logger.warning("Таймаут (%s сек) при ожидании загрузки твитов, пробуем продолжить...", page_load_timeout)
             # Убрали time.sleep(10), проверка ниже обработает отсутствие твитов
 
-        # Проверка авторизации и существования аккаунта (без изменений)
+        # Проверка авторизации и существования аккаунта; этот же снимок идет в архив HTML
         page_source = driver.page_source
-        debug_print(f"Длина исходного кода страницы: {len(page_source)} символов")
+        logger.debug("Длина исходного кода страницы: %s символов", len(page_source))
         if "Log in" in page_source and "Sign up" in page_source and "The timeline is empty" not in page_source:
-            print("ВНИМАНИЕ: Признаки авторизации не обнаружены. Возможно, сессия истекла.")
             logger.warning("Признаки авторизации не обнаружены. Возможно, сессия истекла.")
         if "This account doesn't exist" in page_source or "Hmm...this page doesn't exist" in page_source:
-            print(f"Ошибка: Аккаунт @{username} не существует или недоступен")
-            logger.error(f"Аккаунт @{username} не существует или недоступен")
+            logger.error("Аккаунт @%s не существует или недоступен", username)
             return result
 
-        # Сохраняем HTML для анализа (без изменений)
-        if html_cache_dir:
-             html_file = os.path.join(html_cache_dir, f"{username}_selenium.html")
-             debug_print(f"Сохраняем HTML страницы в файл: {html_file}")
-             try:
-                 with open(html_file, "w", encoding="utf-8") as f:
-                     f.write(driver.page_source)
-                 logger.info(f"HTML-страница сохранена в файл {html_file}")
-             except Exception as e:
-                 logger.error(f"Не удалось сохранить HTML: {e}")
-
-
-        # Извлекаем имя пользователя (без изменений)
-        try:
-            name_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'h2[aria-level="2"][role="heading"] span span'))
-            )
-            result["name"] = name_element.text.strip()
-            # Резервный метод через title, если первый не сработал
-            if not result["name"]:
-                 title = driver.title
-                 if "(" in title:
-                     result["name"] = title.split("(")[0].strip()
-            debug_print(f"Извлечено имя пользователя: {result['name']}")
-            logger.info(f"Извлечено имя пользователя: {result['name']}")
-        except TimeoutException:
-            logger.error("Не удалось найти элемент с именем пользователя.")
-            # Попробуем извлечь из title как резерв
-            title = driver.title
-            if "(" in title:
-                result["name"] = title.split("(")[0].strip()
-                logger.info(f"Извлечено имя пользователя из title: {result['name']}")
-            else:
-                 logger.error("Не удалось извлечь имя пользователя и из title.")
-        except Exception as e:
-            debug_print(f"Ошибка при извлечении имени: {e}")
-            logger.error(f"Ошибка при извлечении имени: {e}")
+        # Сохраняем HTML для анализа (сжатие и запись - в фоновом потоке)
+        if html_cache_dir and archive_page_source(username, page_source, html_cache_dir):
+            logger.debug("HTML страницы передан в архив: %s", html_cache_dir)
+
+
+        # Имя пользователя: если оно есть в кэше и запись свежая, заголовок с именем не ждем -
+        # сверяемся только с title страницы (доступен сразу) и при расхождении перезаписываем пользователя
+        cached_user = get_cached_user(username)
+        if cached_user is not None:
+            title_name = name_from_title(driver.title)
+            result["name"] = title_name or cached_user[1]
+            if title_name and title_name != cached_user[1]:
+                logger.info("Имя @%s изменилось: %s -> %s", username, cached_user[1], title_name)
+            logger.debug("Имя пользователя из кэша: %s", result['name'])
+        else:
+            try:
+                name_element = WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, 'h2[aria-level="2"][role="heading"] span span'))
+                )
+                result["name"] = name_element.text.strip()
+                # Резервный метод через title, если первый не сработал
+                if not result["name"]:
+                     result["name"] = name_from_title(driver.title) or username
+                logger.info("Извлечено имя пользователя: %s", result['name'])
+            except TimeoutException:
+                logger.error("Не удалось найти элемент с именем пользователя.")
+                # Попробуем извлечь из title как резерв
+                title_name = name_from_title(driver.title)
+                if title_name:
+                    result["name"] = title_name
+                    logger.info("Извлечено имя пользователя из title: %s", result['name'])
+                else:
+                     logger.error("Не удалось извлечь имя пользователя и из title.")
+            except Exception as e:
+                logger.error("Ошибка при извлечении имени: %s", e)
 
-        # Сохраняем пользователя в базу данных (без изменений)
+        # Сохраняем пользователя в базу данных (запрос выполняется, только если его нет в кэше,
+        # запись кэша устарела или имя изменилось)
         user_id = None
-        if db_connection and save_user_to_db:
-            debug_print(f"Сохранение информации о пользователе @{username} в базу данных...")
-            user_id = save_user_to_db(db_connection, username, result["name"])
+        if db_connection and save_user_to_db and not db_writer:
+            logger.debug("Сохранение информации о пользователе @%s в базу данных...", username)
+            # Фиксируется вместе с твитами аккаунта (одна транзакция)
+            user_id = save_user_cached(db_connection, username, result["name"], commit=False)
             if not user_id:
-                print(f"Ошибка при сохранении пользователя {username} в базу данных")
-                logger.error(f"Ошибка при сохранении пользователя {username} в базу данных")
+                logger.error("Ошибка при сохранении пользователя %s в базу данных", username)
             else:
-                debug_print(f"Пользователь сохранен в БД с ID: {user_id}")
-                logger.info(f"Пользователь сохранен в БД с ID: {user_id}")
+                logger.info("Пользователь сохранен в БД с ID: %s", user_id)
 
         processed_tweet_ids = set()
         tweets_data = []
@@ -421,34 +741,78 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
         no_new_tweets_count = 0
         max_no_new_tweets = 5
         scroll_step = 1000 # Пиксели для прокрутки
+        if extraction_mode in ("snapshot", "js", "graphql"):
+            count_tweets = count_rendered_tweets
+        else:
+            count_tweets = lambda d: len(find_all_tweets(d))
         last_height = driver.execute_script("return document.body.scrollHeight")
 
-        debug_print("Начинаем пошаговый скроллинг для загрузки твитов...")
         logger.info("Начинаем пошаговый скроллинг для загрузки твитов...")
 
-        while scroll_attempts < max_scroll_attempts and no_new_tweets_count < max_no_new_tweets and len(tweets_data) < max_tweets:
+        # Инкрементальный сбор: ID самого нового твита прошлого цикла
+        high_water_mark = get_high_water_mark(username) if incremental else None
+        newest_seen_id = None
+        reached_mark = False
+        # Со включенным refresh_past_mark отметка отменяет только API и полный текст
+        scroll_past_mark = refresh_past_mark and bool(time_filter_hours)
+        if high_water_mark:
+            logger.info("Инкрементальный сбор для @%s: отметка %s", username, high_water_mark)
+
+        # Твиты старше окна пропускаем без API и записи в базу; серия таких твитов завершает скроллинг
+        cutoff_time = None
+        if time_filter_hours:
+            cutoff_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=time_filter_hours)
+        old_tweets_streak = 0
+
+        # Твиты, уже сохраненные в базе за окно сбора (один запрос): только обновление счетчиков
+        is_saved_tweet = None
+        if stats_only_known:
+            is_saved_tweet, known_count = load_known_tweet_ids(username, time_filter_hours, db_connection)
+            logger.debug("Сохраненных в базе твитов за окно сбора: %s", known_count)
+
+        # Твиты прошлых циклов: полный текст для известных твитов и дополнение ленты после скроллинга
+        previous_tweets = {}
+        if incremental or stats_only_known:
+            previous = get_cached_timeline(username, since=window_start)
+            if previous:
+                for tweet in previous["tweets"]:
+                    previous_id = extract_tweet_id(tweet.get("url"))
+                    if previous_id:
+                        previous_tweets[previous_id] = tweet
+
+        # Известный твит (не новее отметки или уже в базе) идет по пути обновления счетчиков
+        is_known_tweet = make_known_tweet_predicate(high_water_mark, is_saved_tweet)
+
+        # Пакет твитов, для которых запросы к API еще выполняются (режимы snapshot/js/graphql)
+        pending_batch = []
+        # Получен ли хотя бы один ответ UserTweets (режим graphql)
+        graphql_captured = False
+
+        while scroll_attempts < max_scroll_attempts and no_new_tweets_count < max_no_new_tweets and len(tweets_data) + len(pending_batch) < max_tweets:
             scroll_attempts += 1
-            debug_print(f"Попытка скроллинга #{scroll_attempts}...")
-            logger.info(f"Попытка скроллинга #{scroll_attempts}...")
+            logger.info("Попытка скроллинга #%s...", scroll_attempts)
 
-            initial_tweet_elements = find_all_tweets(driver)
-            initial_tweet_count = len(initial_tweet_elements)
-            debug_print(f"Твитов на странице до скролла: {initial_tweet_count}")
+            initial_tweet_count = count_tweets(driver)
+            logger.debug("Твитов на странице до скролла: %s", initial_tweet_count)
 
             # Прокручиваем
+            scroll_started = time.perf_counter()
             driver.execute_script(f"window.scrollBy(0, {scroll_step});")
 
             # ЗАМЕНА: Ждем появления новых твитов или изменения высоты страницы
             try:
                 WebDriverWait(driver, scroll_timeout).until(
-                    lambda d: len(find_all_tweets(d)) > initial_tweet_count or d.execute_script("return document.body.scrollHeight") > last_height + 100 # Ждем существенного увеличения высоты
+                    lambda d: count_tweets(d) > initial_tweet_count or d.execute_script("return document.body.scrollHeight") > last_height + 100 # Ждем существенного увеличения высоты
                 )
+                _record_page_timing("scroll", time.perf_counter() - scroll_started)
                 new_height = driver.execute_script("return document.body.scrollHeight")
-                debug_print(f"Скролл успешен. Новая высота: {new_height} (была {last_height}). Твитов стало: {len(find_all_tweets(driver))}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    # Подсчет твитов - лишний запрос к браузеру, только при включенной отладке
+                    logger.debug("Скролл успешен. Новая высота: %s (была %s). Твитов стало: %s",
+                                 new_height, last_height, count_tweets(driver))
                 last_height = new_height
             except TimeoutException:
-                debug_print(f"Таймаут ({scroll_timeout} сек) ожидания новых твитов или изменения высоты после скролла.")
-                logger.warning(f"Таймаут ({scroll_timeout} сек) ожидания новых твитов/изменения высоты после скролла.")
+                logger.warning("Таймаут (%s сек) ожидания новых твитов/изменения высоты после скролла.", scroll_timeout)
                 # Проверяем, достигли ли мы конца страницы
                 if driver.execute_script("return window.innerHeight + window.scrollY") >= driver.execute_script("return document.body.scrollHeight") - 10: # Небольшой допуск
                      logger.info("Похоже, достигнут конец страницы (по позиции скролла).")
@@ -457,11 +821,57 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
 
             # time.sleep(3) # Заменено на WebDriverWait
 
-            tweet_elements = find_all_tweets(driver)
-            debug_print(f"Найдено {len(tweet_elements)} твитов на странице после скролла/ожидания")
-
             new_tweets_this_iteration = 0
 
+            records = None
+            records_complete = False
+            if extraction_mode == "graphql":
+                # Ответы UserTweets уже содержат полный текст и точные счетчики
+                records = collect_timeline_tweets(driver)
+                records_complete = True
+                if records:
+                    graphql_captured = True
+                elif records is None or not graphql_captured:
+                    # Перехват недоступен или ответы еще ни разу не получены - разбираем снимок.
+                    # Пустой шаг после полученных ответов - просто новых ответов пока нет
+                    logger.warning("Ответы GraphQL не получены, используем снимок страницы")
+                    records = parse_timeline_html(driver.page_source, username)
+                    records_complete = False
+            elif extraction_mode == "snapshot":
+                # Один снимок страницы на шаг скролла вместо запросов к каждому элементу
+                records = parse_timeline_html(driver.page_source, username)
+            elif extraction_mode == "js":
+                # Один вызов execute_script на шаг скролла; при ошибке - поэлементный путь
+                records = extract_tweets_with_js(driver, username)
+                if records is None:
+                    logger.warning("JavaScript-извлечение недоступно, используем поэлементный путь Selenium")
+
+            if records is not None:
+                logger.debug("Найдено %s твитов на странице после скролла/ожидания", len(records))
+                if incremental:
+                    new_records, reached_mark = cut_records_at_mark(
+                        records, high_water_mark, lambda record: extract_tweet_id(record.get("url")))
+                    if not scroll_past_mark:
+                        records = new_records
+                    for record in new_records:
+                        record_id = extract_tweet_id(record.get("url"))
+                        if record_id and counts_for_high_water_mark(record):
+                            newest_seen_id = max(newest_seen_id or 0, int(record_id))
+                if cutoff_time is not None:
+                    records, old_tweets_streak = drop_records_outside_window(
+                        records, cutoff_time, processed_tweet_ids, old_tweets_streak)
+                # Запросы к API нового пакета идут в фоне; результаты предыдущего пакета
+                # успели загрузиться, пока выполнялся этот скролл
+                batch = start_tweet_batch(records, processed_tweet_ids, use_api=not records_complete,
+                                          is_known=is_known_tweet, known_tweets=previous_tweets)
+                new_tweets_this_iteration += len(batch)
+                finish_tweet_batch(pending_batch, tweets_data)
+                pending_batch = batch
+                tweet_elements = []
+            else:
+                tweet_elements = find_all_tweets(driver)
+                logger.debug("Найдено %s твитов на странице после скролла/ожидания", len(tweet_elements))
+
             for tweet_element in tweet_elements:
                 tweet_url = ""
                 tweet_id = ""
@@ -479,9 +889,53 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                     if not tweet_id or tweet_id in processed_tweet_ids:
                         continue
 
+                    # Твит без socialContext (не закреплен и не ретвит) идет в ленте по времени
+                    in_timeline_order = not tweet_element.find_elements(By.CSS_SELECTOR, '[data-testid="socialContext"]')
+                    if incremental and tweet_id.isdigit() and in_timeline_order:
+                        if high_water_mark and int(tweet_id) <= high_water_mark:
+                            reached_mark = True
+                            if not scroll_past_mark:
+                                break
+                        else:
+                            newest_seen_id = max(newest_seen_id or 0, int(tweet_id))
+
+                    # Твит старше окна пропускаем до запроса к API и раскрытия текста (время - из ID)
+                    if cutoff_time is not None:
+                        tweet_time = snowflake_to_datetime(tweet_id)
+                        is_old = tweet_time is not None and tweet_time < cutoff_time
+                        if in_timeline_order:
+                            old_tweets_streak = old_tweets_streak + 1 if is_old else 0
+                        if is_old:
+                            processed_tweet_ids.add(tweet_id)
+                            logger.debug("Твит %s старше %s ч, пропускаем", tweet_id, time_filter_hours)
+                            if max_old_tweets and old_tweets_streak >= max_old_tweets:
+                                break
+                            continue
+
                     processed_tweet_ids.add(tweet_id)
-                    debug_print(f"Обработка твита ID: {tweet_id}")
-                    logger.info(f"Обработка твита ID: {tweet_id}")
+                    logger.debug("Обработка твита ID: %s", tweet_id)
+
+                    # Твит уже сохранен: только свежие счетчики, без API, раскрытия и ожиданий
+                    if is_known_tweet is not None and is_known_tweet(tweet_id):
+                        stats = extract_tweet_stats(tweet_element)
+                        if tweet_id in previous_tweets:
+                            tweets_data.append(merge_known_tweet({"stats": stats}, previous_tweets[tweet_id]))
+                        else:
+                            text_elements = tweet_element.find_elements(By.CSS_SELECTOR, 'div[data-testid="tweetText"]')
+                            retweet_info = extract_retweet_info_enhanced(tweet_element)
+                            tweets_data.append({
+                                "text": text_elements[0].text if text_elements else "",
+                                "created_at": snowflake_to_iso(tweet_id) or "",
+                                "url": tweet_url,
+                                "stats": stats,
+                                "is_retweet": retweet_info["is_retweet"],
+                                "original_author": retweet_info.get("original_author", None),
+                                # В базе текст не заменяется более коротким (UPSERT_TWEET_SQL)
+                                "is_truncated": bool(text_elements) and is_tweet_truncated(tweet_element)
+                            })
+                        new_tweets_this_iteration += 1
+                        logger.debug("Твит %s уже сохранен, обновляем только счетчики", tweet_id)
+                        continue
 
                     # Сначала пробуем получить данные через API (без изменений)
                     api_tweet_data_raw = get_tweet_by_id(tweet_id)
@@ -490,16 +944,13 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                          api_tweet_data = process_api_tweet_data(api_tweet_data_raw, tweet_url)
 
                     if api_tweet_data and api_tweet_data.get("text"):
-                        debug_print(f"Твит {tweet_id} успешно получен через API")
-                        logger.info(f"Твит {tweet_id} успешно получен через API")
+                        logger.debug("Твит %s успешно получен через API", tweet_id)
                         tweets_data.append(api_tweet_data)
                         new_tweets_this_iteration += 1
-                        if db_connection and user_id and save_tweet_to_db:
-                            save_tweet_to_db(db_connection, user_id, api_tweet_data)
                         continue
 
                     # Если API не сработал, используем Selenium
-                    debug_print(f"API не вернул данные для {tweet_id}, используем Selenium")
+                    logger.debug("API не вернул данные для %s, используем Selenium", tweet_id)
 
                     # Скроллируем к элементу и ждем видимости перед раскрытием
                     try:
@@ -508,18 +959,16 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                         # time.sleep(1) # Заменено
                         was_expanded = expand_tweet_content_improved(driver, tweet_element) # Эта функция теперь тоже содержит ожидания
                         if was_expanded:
-                            debug_print("Попытка раскрытия твита выполнена")
                             logger.info("Попытка раскрытия твита выполнена")
                             # time.sleep(2) # Убрано, т.к. expand_tweet_content_improved уже ждет
                     except TimeoutException:
-                        logger.warning(f"Таймаут ожидания видимости твита {tweet_id} перед раскрытием.")
+                        logger.warning("Таймаут ожидания видимости твита %s перед раскрытием.", tweet_id)
                     except StaleElementReferenceException:
-                         logger.warning(f"Твит {tweet_id} устарел перед попыткой раскрытия.")
+                         logger.warning("Твит %s устарел перед попыткой раскрытия.", tweet_id)
                          continue # Пропускаем этот устаревший твит
                     except Exception as e:
                          if "stale element reference" not in str(e).lower():
-                            debug_print(f"Не удалось прокрутить/раскрыть твит {tweet_id}: {e}")
-                            logger.warning(f"Не удалось прокрутить/раскрыть твит {tweet_id}: {e}")
+                            logger.warning("Не удалось прокрутить/раскрыть твит %s: %s", tweet_id, e)
 
                     # Извлекаем текст твита (без изменений)
                     tweet_text = ""
@@ -531,9 +980,9 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                         # tweet_text_element = tweet_element.find_element(By.CSS_SELECTOR, 'div[data-testid="tweetText"]')
                         tweet_text = tweet_text_element.text
                     except TimeoutException:
-                         logger.warning(f"Таймаут ожидания текста твита {tweet_id}")
+                         logger.warning("Таймаут ожидания текста твита %s", tweet_id)
                     except NoSuchElementException:
-                        debug_print("Текст твита не найден стандартным селектором")
+                        logger.debug("Текст твита не найден стандартным селектором")
                         try:
                             lang_elements = tweet_element.find_elements(By.CSS_SELECTOR, '[lang][dir="auto"]')
                             if lang_elements:
@@ -541,19 +990,11 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                         except:
                              pass
 
-                    # Проверяем, нужно ли получить полный текст (без изменений)
+                    # Обрезанный твит помечаем; полный текст получим после прохода по ленте
                     need_full_text = False
                     if extract_full_tweets and tweet_text and is_tweet_truncated(tweet_element):
                          need_full_text = True
-
-                    if need_full_text and get_full_tweet_text:
-                        debug_print(f"Твит обрезан, получаем полную версию через отдельное открытие...")
-                        logger.info(f"Твит обрезан, получаем полную версию через отдельное открытие...")
-                        full_text = get_full_tweet_text(driver, tweet_url, max_attempts=3) # get_full_tweet_text тоже использует ожидания
-                        if full_text and len(full_text) > len(tweet_text):
-                            debug_print(f"Получен полный текст твита ({len(full_text)} символов)")
-                            logger.info(f"Получен полный текст твита ({len(full_text)} символов)")
-                            tweet_text = full_text
+                         logger.debug("Твит обрезан, полный текст будет получен после скроллинга")
 
                     # Извлекаем время публикации (без изменений)
                     created_at = ""
@@ -561,15 +1002,16 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                         time_element = tweet_element.find_element(By.TAG_NAME, 'time')
                         created_at = time_element.get_attribute('datetime')
                     except NoSuchElementException:
-                        logger.warning(f"Не удалось найти время для твита {tweet_id}")
-                        continue
+                        created_at = snowflake_to_iso(tweet_id)
+                        if not created_at:
+                            logger.warning("Не удалось найти время для твита %s", tweet_id)
+                            continue
 
                     # Извлекаем статистику (без изменений)
                     stats = extract_tweet_stats(tweet_element)
-                    debug_print(f"Извлеченная статистика твита: {stats}")
+                    logger.debug("Извлеченная статистика твита: %s", stats)
                     if stats['likes'] == 0 and stats['retweets'] == 0 and stats['replies'] == 0:
-                        debug_print("ВНИМАНИЕ: Не удалось извлечь статистику!")
-                        logger.warning(f"Не удалось извлечь статистику для твита {tweet_id}")
+                        logger.warning("Не удалось извлечь статистику для твита %s", tweet_id)
 
                     # Определяем ретвит (без изменений)
                     retweet_info = extract_retweet_info_enhanced(tweet_element)
@@ -589,49 +1031,47 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                     tweets_data.append(tweet_data)
                     new_tweets_this_iteration += 1
 
-                    # Сохраняем твит в базу данных (без изменений)
-                    if db_connection and user_id and save_tweet_to_db:
-                        tweet_db_id = save_tweet_to_db(db_connection, user_id, tweet_data)
-
-                    debug_print(f"Добавлен твит: {created_at} | {tweet_text[:50]}...")
-                    logger.info(f"Добавлен твит ID: {tweet_id}")
+                    logger.debug("Добавлен твит ID: %s", tweet_id)
 
                 except StaleElementReferenceException:
-                    logger.warning(f"Элемент твита устарел, пропускаем: {tweet_id}")
+                    logger.warning("Элемент твита устарел, пропускаем: %s", tweet_id)
                     if tweet_id and tweet_id in processed_tweet_ids:
                          processed_tweet_ids.remove(tweet_id)
                 except KeyError as e:
-                     logger.error(f"Ошибка KeyError при обработке твита {tweet_id}: {e}. Ключ '{e}' отсутствует в retweet_info: {retweet_info}")
+                     logger.error("Ошибка KeyError при обработке твита %s: %s. Ключ '%s' отсутствует в retweet_info: %s", tweet_id, e, e, retweet_info)
                      continue
                 except Exception as e:
-                    print(f"Ошибка при обработке твита {tweet_id}: {e}")
-                    logger.error(f"Ошибка при обработке твита {tweet_id}: {e}")
+                    logger.error("Ошибка при обработке твита %s: %s", tweet_id, e)
                     import traceback
                     logger.error(traceback.format_exc()) # Логируем полный traceback
                     # traceback.print_exc() # Печатаем traceback для детальной отладки
 
+            if reached_mark and not scroll_past_mark:
+                logger.info("Достигнута отметка %s для @%s, завершаем скроллинг", high_water_mark, username)
+                break
+
+            if max_old_tweets and old_tweets_streak >= max_old_tweets:
+                logger.info("%s твитов подряд старше %s ч для @%s, завершаем скроллинг", old_tweets_streak, time_filter_hours, username)
+                break
+
             # Обновляем счетчик попыток без новых твитов
             if new_tweets_this_iteration == 0:
                 no_new_tweets_count += 1
-                debug_print(f"Не найдено новых твитов в этой итерации скролла. Счетчик: {no_new_tweets_count}/{max_no_new_tweets}")
-                logger.info(f"Не найдено новых твитов в этой итерации скролла. Счетчик: {no_new_tweets_count}/{max_no_new_tweets}")
+                logger.info("Не найдено новых твитов в этой итерации скролла. Счетчик: %s/%s", no_new_tweets_count, max_no_new_tweets)
             else:
                 no_new_tweets_count = 0 # Сбрасываем счетчик, если нашли новые твиты
-                debug_print(f"Добавлено {new_tweets_this_iteration} новых твитов в этой итерации")
-                logger.info(f"Добавлено {new_tweets_this_iteration} новых твитов в этой итерации")
+                logger.info("Добавлено %s новых твитов в этой итерации", new_tweets_this_iteration)
 
             # Проверка достижения конца страницы (улучшенная)
             try:
                 current_height = driver.execute_script("return document.body.scrollHeight")
                 # Если высота перестала значительно увеличиваться после скролла и ожидания
                 if abs(current_height - last_height) < 50 and no_new_tweets_count > 0:
-                    debug_print(f"Высота страницы почти не изменилась ({last_height} -> {current_height}) и нет новых твитов. Возможно, достигнут конец.")
-                    logger.info(f"Высота страницы почти не изменилась ({last_height} -> {current_height}) и нет новых твитов. Возможно, достигнут конец.")
+                    logger.info("Высота страницы почти не изменилась (%s -> %s) и нет новых твитов. Возможно, достигнут конец.", last_height, current_height)
                     # Добавим еще одну проверку через пару секунд на всякий случай
                     time.sleep(2) # Короткая пауза перед финальной проверкой высоты
                     final_height = driver.execute_script("return document.body.scrollHeight")
                     if abs(final_height - current_height) < 50:
-                         debug_print("Финальная проверка высоты подтверждает конец страницы. Завершаем скроллинг.")
                          logger.info("Финальная проверка высоты подтверждает конец страницы. Завершаем скроллинг.")
                          break
                     else:
@@ -640,52 +1080,70 @@ def get_tweets_with_selenium(username, driver, db_connection=None, max_tweets=10
                 #      last_height = current_height # Обновляем высоту для следующей итерации (перенесено выше в блок try ожидания)
 
             except Exception as e:
-                 logger.warning(f"Ошибка при проверке конца страницы: {e}")
-
+                 logger.warning("Ошибка при проверке конца страницы: %s", e)
+
+
+        # Дожидаемся последнего пакета запросов к API
+        finish_tweet_batch(pending_batch, tweets_data)
+
+        # Полный текст обрезанных твитов: API, затем одна отдельная вкладка (кроме уже сохраненных)
+        if extract_full_tweets:
+            resolve_truncated_tweets(driver, [
+                tweet for tweet in tweets_data
+                if is_known_tweet is None or not is_known_tweet(extract_tweet_id(tweet.get("url")))])
+
+        # Все твиты аккаунта (уже с полным текстом) - одним пакетом и одной транзакцией.
+        # Отметка инкрементального сбора сдвигается, только если твиты записаны или поставлены в очередь
+        tweets_persisted = True
+        if db_writer:
+            # Запись в фоновом потоке; браузер сразу переходит к следующему аккаунту
+            tweets_persisted = bool(db_writer(username, result["name"], tweets_data))
+            logger.info("%s твитов @%s поставлено в очередь записи", len(tweets_data), username)
+        elif db_connection and save_tweets_to_db:
+            saved_count = save_tweets_to_db(db_connection, user_id, tweets_data) if user_id else None
+            if saved_count is None:
+                # Транзакция с записью пользователя откатена
+                forget_user(username)
+                tweets_persisted = False
+            logger.info("Сохранено в базу данных %s твитов @%s", saved_count, username)
+
+        if incremental:
+            # Твиты окна, не встреченные на странице, берем из прошлых циклов (кэш)
+            if previous_tweets:
+                seen_ids = {extract_tweet_id(tweet.get("url")) for tweet in tweets_data}
+                carried = [tweet for tweet_id, tweet in previous_tweets.items() if tweet_id not in seen_ids]
+                tweets_data.extend(carried)
+                logger.info("Из прошлых циклов добавлено %s твитов для @%s", len(carried), username)
+            if tweets_persisted:
+                update_high_water_mark(username, newest_seen_id)
+            else:
+                logger.warning("Твиты @%s не записаны в базу, отметка %s не сдвигается", username, high_water_mark)
 
-        debug_print(f"Завершен скроллинг после {scroll_attempts} попыток")
-        logger.info(f"Завершен скроллинг после {scroll_attempts} попыток")
-        debug_print(f"Всего уникальных твитов обнаружено: {len(processed_tweet_ids)}")
-        logger.info(f"Всего уникальных твитов обнаружено: {len(processed_tweet_ids)}")
-        debug_print(f"Всего твитов собрано до фильтрации: {len(tweets_data)}")
-        logger.info(f"Всего твитов собрано до фильтрации: {len(tweets_data)}")
+        logger.info("Завершен скроллинг после %s попыток", scroll_attempts)
+        logger.info("Всего уникальных твитов обнаружено: %s", len(processed_tweet_ids))
+        logger.info("Всего твитов собрано до фильтрации: %s", len(tweets_data))
 
         # Фильтруем твиты по времени (без изменений)
-        debug_print(f"Фильтрация твитов за последние {time_filter_hours} часов...")
-        logger.info(f"Фильтрация твитов за последние {time_filter_hours} часов...")
+        logger.info("Фильтрация твитов за последние %s часов...", time_filter_hours)
         recent_tweets = filter_recent_tweets(tweets_data, time_filter_hours)
-        debug_print(f"Из них свежих твитов: {len(recent_tweets)}")
-        logger.info(f"Из них свежих твитов: {len(recent_tweets)}")
-
-        # Сохраняем все собранные твиты в кэш (без изменений)
-        cached_result = {
-            "username": username,
-            "name": result["name"],
-            "tweets": tweets_data,
-        }
+        logger.info("Из них свежих твитов: %s", len(recent_tweets))
 
-        if use_cache:
-            try:
-                debug_print(f"Сохранение {len(tweets_data)} твитов в кэш: {cache_file}")
-                logger.info(f"Сохранение {len(tweets_data)} твитов в кэш: {cache_file}")
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(cached_result, f, ensure_ascii=False, indent=2)
-                debug_print(f"Кэш успешно сохранен")
-                logger.info(f"Кэш успешно сохранен")
-            except Exception as e:
-                print(f"Ошибка при сохранении кэша: {e}")
-                logger.error(f"Ошибка при сохранении кэша: {e}")
+        # Сохраняем собранные твиты в кэш (одна транзакция; твиты прошлых циклов уже в нем)
+        if use_cache or incremental:
+            logger.info("Сохранение %s твитов @%s в кэш", len(tweets_data), username)
+            if store_timeline(username, result["name"], tweets_data):
+                logger.info("Кэш успешно сохранен")
+            else:
+                logger.error("Ошибка при сохранении кэша для @%s", username)
 
         # Возвращаем только свежие твиты, ограниченные max_tweets (без изменений)
         result["tweets"] = recent_tweets[:max_tweets]
-        print(f"Возвращаем {len(result['tweets'])} свежих твитов для @{username}")
-        logger.info(f"Возвращаем {len(result['tweets'])} свежих твитов для @{username}")
+        logger.info("Возвращаем %s свежих твитов для @%s", len(result['tweets']), username)
 
         return result
 
     except Exception as e:
-        print(f"Критическая ошибка при получении твитов для @{username} через Selenium: {e}")
-        logger.critical(f"Критическая ошибка при получении твитов для @{username} через Selenium: {e}")
+        logger.critical("Критическая ошибка при получении твитов для @%s через Selenium: %s", username, e)
         import traceback
         logger.error(traceback.format_exc()) # Логируем полный traceback
         # traceback.print_exc()
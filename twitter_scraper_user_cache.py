@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для кэша пользователей в памяти процесса: username -> (user_id, name, fetched_at).
+Кэш заполняется из базы при запуске; пока запись не старше USER_CACHE_TTL_HOURS
+и имя не изменилось, скрапер не ждет заголовок с именем на странице профиля
+и не пишет пользователя в базу.
+"""
+
+import time
+import logging
+import threading
+
+from mysql.connector import Error
+
+from twitter_scraper_utils import save_user_to_db
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.user_cache')
+
+USER_CACHE_TTL_HOURS = 24  # Через сколько часов имя проверяется на странице и пользователь перезаписывается
+
+_lock = threading.Lock()
+_users = {}  # username в нижнем регистре -> (user_id, name, fetched_at)
+
+
+def warm_user_cache(connection):
+    """
+    Заполняет кэш всеми пользователями из базы
+
+    Args:
+        connection: Соединение с MySQL
+
+    Returns:
+        int: Количество загруженных пользователей
+    """
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT id, username, name FROM users")
+        rows = cursor.fetchall()
+        cursor.close()
+    except Error as e:
+        logger.error("Не удалось загрузить пользователей в кэш: %s", e)
+        return 0
+
+    now = time.time()
+    with _lock:
+        for user_id, username, name in rows:
+            _users[username.lower()] = (user_id, name, now)
+    logger.info("В кэш пользователей загружено %s записей", len(rows))
+    return len(rows)
+
+
+def get_cached_user(username, ttl_hours=USER_CACHE_TTL_HOURS):
+    """
+    Возвращает (user_id, name) из кэша или None, если записи нет или она старше ttl_hours
+    """
+    with _lock:
+        entry = _users.get(username.lower())
+    if entry is None or time.time() - entry[2] > ttl_hours * 3600:
+        return None
+    return entry[0], entry[1]
+
+
+def forget_user(username):
+    """Удаляет пользователя из кэша (после отката транзакции, в которой он был записан)"""
+    with _lock:
+        _users.pop(username.lower(), None)
+
+
+def save_user_cached(connection, username, name, commit=True, ttl_hours=USER_CACHE_TTL_HOURS):
+    """
+    save_user_to_db с кэшем: запрос к базе выполняется, только если пользователя нет
+    в кэше, запись устарела или имя изменилось. Если транзакция с записью пользователя
+    откатывается, вызывающий код должен вызвать forget_user.
+
+    Args:
+        connection: Соединение с MySQL
+        username: Имя пользователя Twitter
+        name: Отображаемое имя
+        commit: False - фиксация вместе с твитами аккаунта
+        ttl_hours: Срок действия записи кэша в часах
+
+    Returns:
+        int: ID пользователя или None при ошибке
+    """
+    cached = get_cached_user(username, ttl_hours)
+    if cached is not None and (not name or name == cached[1]):
+        return cached[0]
+
+    user_id = save_user_to_db(connection, username, name or username, commit=commit)
+    if user_id:
+        with _lock:
+            _users[username.lower()] = (user_id, name or username, time.time())
+    return user_id
@@ -4,25 +4,24 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
-import json
 import os
 import datetime
 import re
+import math
+import logging
+import functools
 # BeautifulSoup и requests больше не нужны для скачивания изображений
 # import requests
 # from bs4 import BeautifulSoup
 # hashlib и urllib.parse больше не нужны для изображений
 # import hashlib
 # import urllib.parse
-import mysql.connector
 from mysql.connector import Error
+from twitter_scraper_snapshot import extract_tweet_id
+from twitter_scraper_db import get_pooled_connection
 
-# Глобальная настройка отладки
-DEBUG = True
+# Настройка логирования (отладочные сообщения включаются через twitter_scraper_logging.set_debug)
+logger = logging.getLogger('twitter_scraper.utils')
 
 # Директории для хранения данных
 CACHE_DIR = "twitter_cache"
@@ -31,209 +30,170 @@ CACHE_DIR = "twitter_cache"
 os.makedirs(CACHE_DIR, exist_ok=True)
 # os.makedirs(IMAGES_DIR, exist_ok=True) # Удалено
 
-
-def debug_print(*args, **kwargs):
-    """Функция для вывода отладочной информации"""
-    if DEBUG:
-        print("[ОТЛАДКА]", *args, **kwargs)
+# Облегченный режим браузера: запросы, блокируемые через DevTools (Network.setBlockedURLs).
+# Изображения, видео и шрифты не нужны для извлечения текста, счетчиков и ссылок
+BLOCKED_URL_PATTERNS = [
+    # Медиа и аватары
+    "*pbs.twimg.com/media/*", "*pbs.twimg.com/profile_images/*", "*pbs.twimg.com/profile_banners/*",
+    "*pbs.twimg.com/card_img/*", "*pbs.twimg.com/ext_tw_video_thumb/*", "*pbs.twimg.com/amplify_video_thumb/*",
+    "*video.twimg.com/*", "*.mp4*", "*.m3u8*", "*.m4s*",
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*",
+    # Шрифты
+    "*.woff*", "*.ttf*", "*.otf*",
+    # Сторонние ресурсы (аналитика и реклама)
+    "*google-analytics.com/*", "*googletagmanager.com/*", "*doubleclick.net/*",
+    "*ads-twitter.com/*", "*ads-api.twitter.com/*", "*analytics.twitter.com/*",
+]
+_lightweight_sessions = set()  # session_id браузеров в облегченном режиме
+
+# ID твитов (snowflake): старшие биты - миллисекунды от эпохи Twitter (4 ноября 2010)
+TWITTER_EPOCH_MS = 1288834974657
+SNOWFLAKE_TIMESTAMP_SHIFT = 22
+SNOWFLAKE_MIN_ID = 29700859247  # Более старые твиты имеют последовательные ID без времени
+PARSE_DATE_CACHE_SIZE = 65536  # Количество разобранных строк дат в памяти (LRU)
+_fromisoformat = datetime.datetime.fromisoformat
+
+
+def debug_print(message, *args):
+    """Отладочное сообщение; аргументы подставляются в message (%s), только если уровень DEBUG включен"""
+    logger.debug(message, *args)
 
 
 def initialize_mysql(config):
-    """Инициализирует подключение к MySQL и создает необходимые таблицы"""
+    """
+    Возвращает соединение из пула MySQL (при первом вызове создает пул
+    и выполняет миграции схемы - см. twitter_scraper_db). close() возвращает соединение в пул.
+    """
+    connection = get_pooled_connection(config)
+    if connection:
+        logger.debug("Получено соединение из пула MySQL")
+    return connection
+
+
+# Размер пакета для executemany (многострочный INSERT)
+DB_BATCH_SIZE = 500
+
+# Новый твит вставляется целиком; для существующего обновляются счетчики,
+# а текст - только если новый длиннее (полная версия ранее обрезанного твита).
+# Схема v2 (twitter_scraper_db): url не хранится, он восстанавливается из автора и tweet_id
+UPSERT_TWEET_SQL = """
+    INSERT INTO tweets
+    (tweet_id, user_id, tweet_text, created_at, likes, retweets, replies, is_retweet, original_author)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        likes = VALUES(likes),
+        retweets = VALUES(retweets),
+        replies = VALUES(replies),
+        tweet_text = IF(CHAR_LENGTH(VALUES(tweet_text)) > CHAR_LENGTH(tweet_text), VALUES(tweet_text), tweet_text)
+"""
+
+
+# Снимок счетчиков на момент наблюдения (история не перезаписывается, см. twitter_scraper_stats_history)
+INSERT_STATS_HISTORY_SQL = """
+    INSERT IGNORE INTO tweet_stats_history (tweet_id, observed_at, likes, retweets, replies)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+def save_user_to_db(connection, username, name, commit=True):
+    """
+    Сохраняет или обновляет пользователя в базе данных одним запросом
+    (LAST_INSERT_ID(id) возвращает ID и для существующей строки)
+    commit: False - фиксация вместе с твитами аккаунта (в save_tweets_to_db)
+    """
     try:
-        connection = mysql.connector.connect(**config)
-
-        if connection.is_connected():
-            cursor = connection.cursor()
-
-            # Создаем таблицу для пользователей
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(255) NOT NULL UNIQUE,
-                name VARCHAR(255),
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
-            """)
-
-            # Создаем таблицу для твитов
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tweets (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                tweet_id VARCHAR(255) UNIQUE,
-                user_id INT,
-                tweet_text TEXT,
-                created_at DATETIME,
-                url VARCHAR(255),
-                likes INT DEFAULT 0,
-                retweets INT DEFAULT 0,
-                replies INT DEFAULT 0,
-                is_retweet BOOLEAN DEFAULT FALSE,
-                original_author VARCHAR(255),
-                inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                INDEX idx_created_at (created_at),
-                INDEX idx_user_id (user_id)
-            ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
-            """)
-
-            # --- Удалено создание таблиц images, articles, tweet_links, article_links ---
-            # # Создаем таблицу для изображений (УДАЛЕНО)
-            # cursor.execute("""
-            # CREATE TABLE IF NOT EXISTS images (
-            #     id INT AUTO_INCREMENT PRIMARY KEY,
-            #     tweet_id INT,
-            #     image_url VARCHAR(1024),
-            #     local_path VARCHAR(1024),
-            #     image_hash VARCHAR(32),
-            #     FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE,
-            #     INDEX idx_tweet_id (tweet_id),
-            #     INDEX idx_image_hash (image_hash)
-            # ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
-            # """)
-            #
-            # # Создаем таблицу для статей (УДАЛЕНО)
-            # cursor.execute("""
-            # CREATE TABLE IF NOT EXISTS articles (
-            #     id INT AUTO_INCREMENT PRIMARY KEY,
-            #     tweet_id INT,
-            #     article_url VARCHAR(1024),
-            #     title TEXT,
-            #     author VARCHAR(255),
-            #     published_date VARCHAR(255),
-            #     source_domain VARCHAR(255),
-            #     content LONGTEXT,
-            #     inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            #     FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE,
-            #     INDEX idx_tweet_id (tweet_id),
-            #     INDEX idx_source_domain (source_domain)
-            # ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
-            # """)
-            #
-            # # Создаем таблицу для ссылок из твитов (УДАЛЕНО)
-            # cursor.execute("""
-            # CREATE TABLE IF NOT EXISTS tweet_links (
-            #     id INT AUTO_INCREMENT PRIMARY KEY,
-            #     tweet_id INT,
-            #     url VARCHAR(1024),
-            #     link_type ENUM('external', 'mention', 'hashtag', 'media'),
-            #     inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            #     FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE,
-            #     INDEX idx_tweet_id (tweet_id),
-            #     INDEX idx_link_type (link_type)
-            # ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
-            # """)
-            #
-            # # Создаем таблицу для ссылок из статей (УДАЛЕНО)
-            # cursor.execute("""
-            # CREATE TABLE IF NOT EXISTS article_links (
-            #     id INT AUTO_INCREMENT PRIMARY KEY,
-            #     article_id INT,
-            #     url VARCHAR(1024),
-            #     inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            #     FOREIGN KEY (article_id) REFERENCES articles(id) ON DELETE CASCADE,
-            #     INDEX idx_article_id (article_id)
-            # ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
-            # """)
+        cursor = connection.cursor()
+        cursor.execute("""
+            INSERT INTO users (username, name) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE name = VALUES(name), id = LAST_INSERT_ID(id)
+            """, (username, name))
+        user_id = cursor.lastrowid
 
+        if commit:
             connection.commit()
-            debug_print("База данных успешно инициализирована (таблицы users, tweets)")
-            return connection
+        return user_id
 
     except Error as e:
-        print(f"Ошибка при подключении к MySQL: {e}")
+        logger.error("Ошибка при сохранении пользователя %s: %s", username, e)
         return None
 
 
-def save_user_to_db(connection, username, name):
-    """Сохраняет или обновляет пользователя в базе данных"""
+def _tweet_row(user_id, tweet_data):
+    """Строка параметров UPSERT_TWEET_SQL для твита (или None, если у твита нет ID)"""
+    tweet_id = extract_tweet_id(tweet_data.get("url"))
+    if not tweet_id:
+        return None
+    # Время из ID надежнее строки со страницы (при неудачном разборе parse_twitter_date вернет текущее время)
+    created_at = get_tweet_time(tweet_data)
+    stats = tweet_data.get("stats", {})
+    return (int(tweet_id),
+            user_id,
+            tweet_data.get("text", ""),
+            created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else None,
+            max(int(stats.get("likes", 0) or 0), 0),
+            max(int(stats.get("retweets", 0) or 0), 0),
+            max(int(stats.get("replies", 0) or 0), 0),
+            bool(tweet_data.get("is_retweet", False)),
+            tweet_data.get("original_author", None))
+
+
+def save_tweets_to_db(connection, user_id, tweets, batch_size=DB_BATCH_SIZE, commit=True, record_history=True,
+                      observed_at=None):
+    """
+    Сохраняет твиты аккаунта пакетно: executemany с INSERT ... ON DUPLICATE KEY UPDATE
+    и одна транзакция на все пакеты (при ошибке изменения откатываются).
+    В той же транзакции счетчики добавляются в tweet_stats_history.
+
+    Args:
+        connection: Соединение с MySQL
+        user_id: ID пользователя в таблице users
+        tweets: Список словарей твитов
+        batch_size: Количество строк в одном многострочном INSERT
+        commit: False - фиксирует вызывающий код (несколько аккаунтов в одной транзакции)
+        record_history: Добавлять ли снимок счетчиков в tweet_stats_history
+        observed_at: Время снимка (unix time или datetime в UTC); None - текущее время
+
+    Returns:
+        int: Количество сохраненных твитов или None при ошибке
+    """
+    rows = []
+    for tweet_data in tweets:
+        row = _tweet_row(user_id, tweet_data)
+        if row is None:
+            logger.warning("Пропускаем твит без идентификатора")
+            continue
+        rows.append(row)
+
     try:
         cursor = connection.cursor()
-
-        # Проверяем, существует ли пользователь
-        cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-        result = cursor.fetchone()
-
-        if result:
-            # Обновляем имя, если пользователь существует
-            user_id = result[0]
-            cursor.execute("UPDATE users SET name = %s WHERE id = %s", (name, user_id))
-        else:
-            # Добавляем нового пользователя
-            cursor.execute("INSERT INTO users (username, name) VALUES (%s, %s)", (username, name))
-            user_id = cursor.lastrowid
-
-        connection.commit()
-        return user_id
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(UPSERT_TWEET_SQL, rows[start:start + batch_size])
+
+        if record_history and rows:
+            if observed_at is None:
+                observed_at = datetime.datetime.now(datetime.timezone.utc)
+            elif not isinstance(observed_at, datetime.datetime):
+                observed_at = datetime.datetime.fromtimestamp(observed_at, tz=datetime.timezone.utc)
+            observed_at = observed_at.strftime('%Y-%m-%d %H:%M:%S')
+            history_rows = [(row[0], observed_at, row[4], row[5], row[6]) for row in rows]
+            for start in range(0, len(history_rows), batch_size):
+                cursor.executemany(INSERT_STATS_HISTORY_SQL, history_rows[start:start + batch_size])
+        if commit:
+            connection.commit()
+        return len(rows)
 
     except Error as e:
-        print(f"Ошибка при сохранении пользователя {username}: {e}")
+        logger.error("Ошибка при пакетном сохранении твитов: %s", e)
+        try:
+            connection.rollback()
+        except Error:
+            pass
         return None
 
 
 def save_tweet_to_db(connection, user_id, tweet_data):
-    """Сохраняет твит в базу данных (без изображений и ссылок)"""
-    try:
-        cursor = connection.cursor()
-
-        # Проверяем, существует ли твит (по URL или ID)
-        tweet_id = tweet_data.get("url", "").split("/")[-1] if tweet_data.get("url") else None
-
-        if not tweet_id:
-            print("Пропускаем твит без идентификатора")
-            return None
-
-        cursor.execute("SELECT id FROM tweets WHERE tweet_id = %s", (tweet_id,))
-        result = cursor.fetchone()
-
-        if result:
-            # Твит уже существует
-            tweet_db_id = result[0]
-            # Обновляем статистику
-            cursor.execute("""
-                UPDATE tweets
-                SET likes = %s, retweets = %s, replies = %s
-                WHERE id = %s
-                """,
-                           (tweet_data.get("stats", {}).get("likes", 0),
-                            tweet_data.get("stats", {}).get("retweets", 0),
-                            tweet_data.get("stats", {}).get("replies", 0),
-                            tweet_db_id))
-        else:
-            # Создаем новый твит
-            created_at = parse_twitter_date(tweet_data.get("created_at", ""))
-            created_at_str = created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else None
-
-            cursor.execute("""
-                INSERT INTO tweets
-                (tweet_id, user_id, tweet_text, created_at, url, likes, retweets, replies, is_retweet, original_author)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                           (tweet_id,
-                            user_id,
-                            tweet_data.get("text", ""),
-                            created_at_str,
-                            tweet_data.get("url", ""),
-                            tweet_data.get("stats", {}).get("likes", 0),
-                            tweet_data.get("stats", {}).get("retweets", 0),
-                            tweet_data.get("stats", {}).get("replies", 0),
-                            tweet_data.get("is_retweet", False),
-                            tweet_data.get("original_author", None)))
-
-            tweet_db_id = cursor.lastrowid
-
-        connection.commit()
-
-        # --- Удалено сохранение изображений ---
-        # # Сохраняем изображения
-        # for image_path in tweet_data.get("images", []):
-        #     save_image_to_db(connection, tweet_db_id, image_path)
-
-        return tweet_db_id
-
-    except Error as e:
-        print(f"Ошибка при сохранении твита: {e}")
-        return None
+    """Сохраняет один твит в базу данных (без изображений и ссылок); для нескольких - save_tweets_to_db"""
+    return save_tweets_to_db(connection, user_id, [tweet_data])
 
 # --- Функция save_image_to_db удалена ---
 # def save_image_to_db(connection, tweet_db_id, image_path, image_url=None):
@@ -241,22 +201,73 @@ def save_tweet_to_db(connection, user_id, tweet_data):
 #     # ... (код функции удален) ...
 
 
-def parse_twitter_date(date_str):
+def snowflake_to_datetime(tweet_id):
     """
-    Парсит дату из различных форматов Twitter
-    Возвращает объект datetime с учетом часового пояса
+    Вычисляет время публикации твита по его ID без обращения к странице или API
+
+    Args:
+        tweet_id: ID твита (строка или число)
+
+    Returns:
+        datetime: Время публикации (UTC) или None для некорректного/старого ID
     """
-    if not date_str:
+    try:
+        tweet_id = int(tweet_id)
+    except (TypeError, ValueError):
+        return None
+    if tweet_id < SNOWFLAKE_MIN_ID:
         return None
+    timestamp_ms = (tweet_id >> SNOWFLAKE_TIMESTAMP_SHIFT) + TWITTER_EPOCH_MS
+    return datetime.datetime.fromtimestamp(timestamp_ms / 1000, tz=datetime.timezone.utc)
+
+
+def snowflake_to_iso(tweet_id):
+    """Время публикации по ID твита в формате time[datetime]: '2025-04-30T20:00:14.123Z' (или '')"""
+    dt = snowflake_to_datetime(tweet_id)
+    if dt is None:
+        return ""
+    return f"{dt:%Y-%m-%dT%H:%M:%S}.{dt.microsecond // 1000:03d}Z"
+
 
+def datetime_to_snowflake(dt):
+    """
+    Наименьший ID твита, опубликованного не раньше dt (для сравнения ID с границей окна)
+
+    Args:
+        dt: datetime с часовым поясом
+
+    Returns:
+        int: ID твита
+    """
+    timestamp_ms = math.ceil(dt.timestamp() * 1000)
+    return max(timestamp_ms - TWITTER_EPOCH_MS, 0) << SNOWFLAKE_TIMESTAMP_SHIFT
+
+
+def get_tweet_time(tweet):
+    """
+    Время публикации твита: по ID из URL (точно и без разбора строки),
+    иначе по полю created_at
+    """
+    tweet_time = snowflake_to_datetime(extract_tweet_id(tweet.get("url")))
+    if tweet_time is None and tweet.get("created_at"):
+        tweet_time = parse_twitter_date(tweet["created_at"])
+    return tweet_time
+
+
+@functools.lru_cache(maxsize=PARSE_DATE_CACHE_SIZE)
+def _parse_twitter_date_cached(date_str):
+    """Разбор строки даты прочих форматов (результат запоминается); None, если формат не распознан"""
     # Пробуем различные форматы даты
     try:
+        # Формат ISO начинается с года (иначе "T" и "+" есть и в 'Thu Oct 15 ... +0000 2026')
+        is_iso = date_str[:4].isdigit()
+
         # Формат ISO с Z (UTC)
-        if "Z" in date_str:
+        if is_iso and "Z" in date_str:
             return datetime.datetime.fromisoformat(date_str.replace("Z", "+00:00"))
 
         # Формат ISO без Z
-        if "T" in date_str and ('+' in date_str or '-' in date_str.split('T')[1]):
+        if is_iso and "T" in date_str and ('+' in date_str or '-' in date_str.split('T')[1]):
             return datetime.datetime.fromisoformat(date_str)
 
         # Стандартный формат Twitter "Wed Apr 23 15:24:13 +0000 2014"
@@ -277,7 +288,7 @@ def parse_twitter_date(date_str):
             except ValueError:
                 continue
     except Exception as e:
-        debug_print(f"Ошибка при парсинге даты '{date_str}': {e}")
+        logger.debug("Ошибка при парсинге даты '%s': %s", date_str, e)
 
     # Если не удалось распарсить дату, пытаемся интерпретировать её вручную
     try:
@@ -292,46 +303,92 @@ def parse_twitter_date(date_str):
         if date_str.isdigit():
             return datetime.datetime.fromtimestamp(int(date_str), tz=datetime.timezone.utc)
     except Exception as e:
-        debug_print(f"Дополнительная ошибка при парсинге даты '{date_str}': {e}")
+        logger.debug("Дополнительная ошибка при парсинге даты '%s': %s", date_str, e)
+
+    return None
 
-    # В случае неудачи, возвращаем текущее время
+
+def parse_twitter_date(date_str):
+    """
+    Парсит дату из различных форматов Twitter
+    Возвращает объект datetime с учетом часового пояса
+    (основной формат разбирается быстрым путем, результаты прочих запоминаются в LRU-кэше)
+    """
+    if not date_str:
+        return None
+
+    # Быстрый путь для основного формата '2024-05-30T12:34:56.000Z': проверка формы строки
+    # и один fromisoformat (дешевле обращения к кэшу)
+    if len(date_str) == 24 and date_str[23] == "Z" and date_str[10] == "T":
+        try:
+            return _fromisoformat(date_str[:23] + "+00:00")
+        except ValueError:
+            pass
+
+    # Прочие форматы (строки API вида 'Wed Apr 23 15:24:13 +0000 2014' и т.п.) - через LRU-кэш
+    dt = _parse_twitter_date_cached(date_str)
+    if dt is not None:
+        return dt
+
+    # В случае неудачи, возвращаем текущее время (не запоминается)
     now = datetime.datetime.now(datetime.timezone.utc)
-    debug_print(f"Не удалось разобрать дату '{date_str}'. Используем текущее время.")
+    logger.debug("Не удалось разобрать дату '%s'. Используем текущее время.", date_str)
     return now
 
 
-def filter_recent_tweets(tweets, hours=24):
-    """Фильтрует твиты, оставляя только опубликованные за последние N часов"""
-    if not tweets:
-        return []
+def filter_tweets_since(tweets, cutoff_time):
+    """
+    Оставляет твиты, опубликованные не раньше cutoff_time. Граница вычисляется один раз
+    в виде ID твита и строки '...T...Z', поэтому для большинства твитов достаточно
+    сравнения чисел или строк без создания datetime; остальные разбираются parse_twitter_date.
 
-    current_time = datetime.datetime.now(datetime.timezone.utc)
-    cutoff_time = current_time - datetime.timedelta(hours=hours)
+    Args:
+        tweets: Список словарей твитов
+        cutoff_time: Граница окна (datetime с часовым поясом)
 
-    recent_tweets = []
+    Returns:
+        list: Твиты в исходном порядке
+    """
+    cutoff_id = datetime_to_snowflake(cutoff_time)
+    cutoff_ms = (cutoff_id >> SNOWFLAKE_TIMESTAMP_SHIFT) + TWITTER_EPOCH_MS
+    cutoff_iso = datetime.datetime.fromtimestamp(cutoff_ms / 1000, tz=datetime.timezone.utc) \
+        .strftime('%Y-%m-%dT%H:%M:%S.') + f"{cutoff_ms % 1000:03d}Z"
 
+    recent_tweets = []
     for tweet in tweets:
-        if not tweet.get("created_at"):
+        tweet_id = extract_tweet_id(tweet.get("url"))
+        if tweet_id:
+            tweet_id = int(tweet_id)
+            if tweet_id >= SNOWFLAKE_MIN_ID:
+                if tweet_id >= cutoff_id:
+                    recent_tweets.append(tweet)
+                continue
+
+        created_at = tweet.get("created_at")
+        if not created_at:
             continue
+        if len(created_at) == 24 and created_at[10] == "T" and created_at[-1] == "Z":
+            # Строки основного формата упорядочены так же, как время
+            if created_at >= cutoff_iso:
+                recent_tweets.append(tweet)
+            continue
+        tweet_time = parse_twitter_date(created_at)
+        if tweet_time and tweet_time >= cutoff_time:
+            recent_tweets.append(tweet)
 
-        try:
-            # Преобразуем строку даты в datetime объект
-            tweet_time = parse_twitter_date(tweet["created_at"])
+    return recent_tweets
 
-            if not tweet_time:
-                continue
 
-            # Проверяем, что твит опубликован в течение указанного периода
-            if tweet_time >= cutoff_time:
-                recent_tweets.append(tweet)
-                debug_print(
-                    f"Свежий твит: {tweet_time.isoformat()}, {(current_time - tweet_time).total_seconds() / 3600:.1f}ч назад")
-            else:
-                debug_print(
-                    f"Старый твит: {tweet_time.isoformat()}, {(current_time - tweet_time).total_seconds() / 3600:.1f}ч назад")
-        except Exception as e:
-            debug_print(f"Ошибка при обработке даты твита: {e}")
+def filter_recent_tweets(tweets, hours=24):
+    """Фильтрует твиты, оставляя только опубликованные за последние N часов"""
+    if not tweets:
+        return []
+
+    current_time = datetime.datetime.now(datetime.timezone.utc)
+    cutoff_time = current_time - datetime.timedelta(hours=hours)
 
+    recent_tweets = filter_tweets_since(tweets, cutoff_time)
+    logger.debug("Свежих твитов: %s из %s (за %s ч)", len(recent_tweets), len(tweets), hours)
     return recent_tweets
 
 
@@ -365,20 +422,50 @@ def format_time_ago(iso_time_str):
         return iso_time_str
 
 
-def initialize_browser(chrome_profile_path=None):
-    """Инициализирует и возвращает браузер Chrome"""
+def apply_resource_blocking(driver):
+    """
+    Блокирует BLOCKED_URL_PATTERNS в текущей вкладке (Network.setBlockedURLs действует
+    только на вкладку, в которой выполнен; новые вкладки нужно настраивать отдельно)
+    """
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {"urls": BLOCKED_URL_PATTERNS})
+
+
+def is_lightweight_browser(driver):
+    """Запущен ли браузер в облегченном режиме (initialize_browser(..., lightweight=True))"""
+    return getattr(driver, "session_id", None) in _lightweight_sessions
+
+
+def initialize_browser(chrome_profile_path=None, capture_network=False, lightweight=False, headless=False):
+    """
+    Инициализирует и возвращает браузер Chrome
+    capture_network: включить журнал производительности (DevTools Network) для перехвата ответов GraphQL
+    lightweight: не загружать изображения, видео, шрифты и сторонние ресурсы (BLOCKED_URL_PATTERNS)
+    headless: запустить без окна (для профиля, в котором уже выполнен вход)
+    """
     # Настройка Selenium
     options = Options()
     options.add_argument("--window-size=1920,1080")
+    if headless:
+        options.add_argument("--headless=new")
+
+    if lightweight:
+        # Изображения отключаем и флагом Blink (настройки профиля не меняются)
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+
+    # Журнал производительности содержит события Network.* для чтения ответов через CDP
+    if capture_network:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     # Если указан путь к профилю Chrome, используем его
     if chrome_profile_path:
         if os.path.exists(chrome_profile_path):
             options.add_argument(f"user-data-dir={chrome_profile_path}")
-            print(f"Используется профиль Chrome: {chrome_profile_path}")
+            logger.info("Используется профиль Chrome: %s", chrome_profile_path)
         else:
-            print(f"ВНИМАНИЕ: Указанный профиль Chrome не найден: {chrome_profile_path}")
-            print("Будет использован временный профиль")
+            logger.warning("ВНИМАНИЕ: Указанный профиль Chrome не найден: %s. Будет использован временный профиль",
+                           chrome_profile_path)
 
     # Дополнительные настройки для стабильности
     options.add_argument("--no-sandbox")
@@ -402,9 +489,14 @@ def initialize_browser(chrome_profile_path=None):
             "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
 
+        # Блокируем медиа, шрифты и сторонние ресурсы на уровне сети
+        if lightweight:
+            apply_resource_blocking(driver)
+            _lightweight_sessions.add(driver.session_id)
+
         return driver
     except Exception as e:
-        print(f"Ошибка при инициализации браузера: {e}")
+        logger.error("Ошибка при инициализации браузера: %s", e)
         return None
 
 
@@ -453,7 +545,7 @@ def extract_retweet_info(tweet_element):
 
     try:
         # Помечаем начало проверки для отладки
-        debug_print("Начало проверки на ретвит...") # Используем debug_print
+        logger.debug("Начало проверки на ретвит...")
 
         # МЕТОД 1: Проверка по специфическим тегам для ретвитов
         retweet_indicators = [
@@ -466,25 +558,25 @@ def extract_retweet_info(tweet_element):
             social_context = tweet_element.find_elements(By.CSS_SELECTOR, '[data-testid="socialContext"]')
             if social_context:
                 context_text = social_context[0].text.lower()
-                debug_print(f"Найден socialContext: '{context_text}'") # Используем debug_print
+                logger.debug("Найден socialContext: '%s'", context_text)
 
                 for indicator in retweet_indicators:
                     if indicator.lower() in context_text:
-                        debug_print(f"Найден индикатор ретвита: '{indicator}'") # Используем debug_print
+                        logger.debug("Найден индикатор ретвита: '%s'", indicator)
                         result["is_retweet"] = True
                         break
         except Exception as e:
-            debug_print(f"Ошибка при проверке socialContext: {e}") # Используем debug_print
+            logger.debug("Ошибка при проверке socialContext: %s", e)
 
         # МЕТОД 2: Поиск иконки ретвита
         if not result["is_retweet"]:
             try:
                 retweet_icon = tweet_element.find_elements(By.CSS_SELECTOR, '[data-testid="socialContext"] svg')
                 if retweet_icon:
-                    debug_print("Найдена иконка в socialContext") # Используем debug_print
+                    logger.debug("Найдена иконка в socialContext")
                     result["is_retweet"] = True
             except Exception as e:
-                debug_print(f"Ошибка при поиске иконки ретвита: {e}") # Используем debug_print
+                logger.debug("Ошибка при поиске иконки ретвита: %s", e)
 
         # МЕТОД 3: Проверка на наличие двух разных имен пользователей в твите
         if not result["is_retweet"]:
@@ -499,12 +591,12 @@ def extract_retweet_info(tweet_element):
                         if username and len(username) > 1:
                             usernames.add(username)
 
-                debug_print(f"Найдено уникальных имен пользователей: {len(usernames)}") # Используем debug_print
+                logger.debug("Найдено уникальных имен пользователей: %s", len(usernames))
                 if len(usernames) >= 2:
-                    debug_print("Обнаружено несколько имен пользователей, возможно это ретвит") # Используем debug_print
+                    logger.debug("Обнаружено несколько имен пользователей, возможно это ретвит")
                     result["is_retweet"] = True
             except Exception as e:
-                debug_print(f"Ошибка при проверке нескольких имен пользователей: {e}") # Используем debug_print
+                logger.debug("Ошибка при проверке нескольких имен пользователей: %s", e)
 
         # Если определили, что это ретвит, ищем оригинального автора
         if result["is_retweet"]:
@@ -516,7 +608,7 @@ def extract_retweet_info(tweet_element):
                         href = link.get_attribute('href')
                         if href and '/status/' not in href:
                             original_author = href.split('/')[-1]
-                            debug_print(f"Найден оригинальный автор через socialContext: {original_author}") # Используем debug_print
+                            logger.debug("Найден оригинальный автор через socialContext: %s", original_author)
                             result["original_author"] = original_author
                             break
 
@@ -528,7 +620,7 @@ def extract_retweet_info(tweet_element):
                         href = user_name_elements[1].get_attribute('href')
                         if href and '/status/' not in href:
                             original_author = href.split('/')[-1]
-                            debug_print(f"Найден оригинальный автор через User-Name: {original_author}") # Используем debug_print
+                            logger.debug("Найден оригинальный автор через User-Name: %s", original_author)
                             result["original_author"] = original_author
 
                 # МЕТОД 3: Поиск имен пользователей в порядке появления
@@ -543,18 +635,18 @@ def extract_retweet_info(tweet_element):
                             if username and len(username) > 1 and username not in usernames:
                                 usernames.append(username)
 
-                    debug_print(f"Найдено имен пользователей в порядке: {usernames}") # Используем debug_print
+                    logger.debug("Найдено имен пользователей в порядке: %s", usernames)
                     if len(usernames) >= 2:
                         result["original_author"] = usernames[1]
-                        debug_print(f"Использовано второе имя как оригинальный автор: {result['original_author']}") # Используем debug_print
+                        logger.debug("Использовано второе имя как оригинальный автор: %s", result['original_author'])
             except Exception as e:
-                debug_print(f"Ошибка при поиске оригинального автора: {e}") # Используем debug_print
+                logger.debug("Ошибка при поиске оригинального автора: %s", e)
 
-        debug_print(f"Результат определения ретвита: {result}") # Используем debug_print
+        logger.debug("Результат определения ретвита: %s", result)
         return result
 
     except Exception as e:
-        debug_print(f"Общая ошибка при определении ретвита: {e}") # Используем debug_print
+        logger.debug("Общая ошибка при определении ретвита: %s", e)
         return result
 
 
@@ -566,36 +658,36 @@ def extract_tweet_stats(tweet_element):
     # МЕТОД 0: "Старая надежная" техника извлечения replies
     try:
         reply_elements = tweet_element.find_elements(By.CSS_SELECTOR, 'div[data-testid="reply"]')
-        debug_print(f"Найдено элементов reply: {len(reply_elements)}") # Используем debug_print
+        logger.debug("Найдено элементов reply: %s", len(reply_elements))
 
         for reply_el in reply_elements:
             all_text = reply_el.text
-            debug_print(f"Текст элемента reply: '{all_text}'") # Используем debug_print
+            logger.debug("Текст элемента reply: '%s'", all_text)
 
             numbers = re.findall(r'\d+', all_text)
             if numbers:
                 stats["replies"] = int(numbers[0])
-                debug_print(f"МЕТОД 0: Извлечено replies: {stats['replies']}") # Используем debug_print
+                logger.debug("МЕТОД 0: Извлечено replies: %s", stats['replies'])
     except Exception as e:
-        debug_print(f"Ошибка в методе 0: {e}") # Используем debug_print
+        logger.debug("Ошибка в методе 0: %s", e)
 
     # МЕТОД 1: Прямой поиск по data-testid
     for stat_type, stat_key in [("reply", "replies"), ("retweet", "retweets"), ("like", "likes")]:
         try:
             selector = f'div[data-testid="{stat_type}"]'
             elements = tweet_element.find_elements(By.CSS_SELECTOR, selector)
-            debug_print(f"Найдено {len(elements)} элементов с селектором '{selector}'") # Используем debug_print
+            logger.debug("Найдено %s элементов с селектором '%s'", len(elements), selector)
 
             for element in elements:
                 full_text = element.text
-                debug_print(f"Текст элемента {stat_type}: '{full_text}'") # Используем debug_print
+                logger.debug("Текст элемента %s: '%s'", stat_type, full_text)
 
                 if full_text:
                     numbers = re.findall(r'(\d+)', full_text)
                     if numbers:
                         value = int(numbers[0])
                         stats[stat_key] = value
-                        debug_print(f"МЕТОД 1: Извлечено {stat_key}: {value}") # Используем debug_print
+                        logger.debug("МЕТОД 1: Извлечено %s: %s", stat_key, value)
                         continue
 
                 spans = element.find_elements(By.TAG_NAME, 'span')
@@ -606,15 +698,15 @@ def extract_tweet_stats(tweet_element):
                         if numbers:
                             value = int(numbers[0])
                             stats[stat_key] = value
-                            debug_print(f"МЕТОД 1 (spans): Извлечено {stat_key}: {value}") # Используем debug_print
+                            logger.debug("МЕТОД 1 (spans): Извлечено %s: %s", stat_key, value)
                             break
         except Exception as e:
-            debug_print(f"Ошибка при извлечении {stat_type}: {e}") # Используем debug_print
+            logger.debug("Ошибка при извлечении %s: %s", stat_type, e)
 
     # МЕТОД 2: Поиск в aria-label
     try:
         buttons = tweet_element.find_elements(By.CSS_SELECTOR, 'div[role="button"][aria-label]')
-        debug_print(f"Найдено {len(buttons)} кнопок с aria-label") # Используем debug_print
+        logger.debug("Найдено %s кнопок с aria-label", len(buttons))
 
         for button in buttons:
             try:
@@ -622,7 +714,7 @@ def extract_tweet_stats(tweet_element):
                 if not aria_label:
                     continue
 
-                debug_print(f"Проверяем aria-label: '{aria_label}'") # Используем debug_print
+                logger.debug("Проверяем aria-label: '%s'", aria_label)
 
                 numbers = re.findall(r'(\d+)', aria_label)
                 if not numbers:
@@ -632,45 +724,45 @@ def extract_tweet_stats(tweet_element):
 
                 if re.search(r'repl|comment|ответ', aria_label.lower()):
                     stats["replies"] = value
-                    debug_print(f"МЕТОД 2: Извлечено replies: {value}") # Используем debug_print
+                    logger.debug("МЕТОД 2: Извлечено replies: %s", value)
                 elif re.search(r'retweet|ретвит|repost', aria_label.lower()):
                     stats["retweets"] = value
-                    debug_print(f"МЕТОД 2: Извлечено retweets: {value}") # Используем debug_print
+                    logger.debug("МЕТОД 2: Извлечено retweets: %s", value)
                 elif re.search(r'like|нрав|лайк', aria_label.lower()):
                     stats["likes"] = value
-                    debug_print(f"МЕТОД 2: Извлечено likes: {value}") # Используем debug_print
+                    logger.debug("МЕТОД 2: Извлечено likes: %s", value)
             except Exception as e:
-                debug_print(f"Ошибка при обработке кнопки: {e}") # Используем debug_print
+                logger.debug("Ошибка при обработке кнопки: %s", e)
     except Exception as e:
-        debug_print(f"Ошибка в методе 2: {e}") # Используем debug_print
+        logger.debug("Ошибка в методе 2: %s", e)
 
     # МЕТОД 3: Поиск по порядку расположения кнопок в группе
     try:
         groups = tweet_element.find_elements(By.CSS_SELECTOR, 'div[role="group"]')
         for group in groups:
             buttons = group.find_elements(By.CSS_SELECTOR, 'div[role="button"]')
-            debug_print(f"Найдено {len(buttons)} кнопок в группе") # Используем debug_print
+            logger.debug("Найдено %s кнопок в группе", len(buttons))
 
             for i, button in enumerate(buttons):
                 text_elements = button.find_elements(By.TAG_NAME, 'span')
                 for elem in text_elements:
                     text = elem.text.strip()
-                    debug_print(f"Текст в кнопке {i}: '{text}'") # Используем debug_print
+                    logger.debug("Текст в кнопке %s: '%s'", i, text)
 
                     if text and text.isdigit():
                         value = int(text)
                         if i == 0 and stats["replies"] == 0:
                             stats["replies"] = value
-                            debug_print(f"МЕТОД 3: Извлечено replies по позиции: {value}") # Используем debug_print
+                            logger.debug("МЕТОД 3: Извлечено replies по позиции: %s", value)
                         elif i == 1 and stats["retweets"] == 0:
                             stats["retweets"] = value
-                            debug_print(f"МЕТОД 3: Извлечено retweets по позиции: {value}") # Используем debug_print
+                            logger.debug("МЕТОД 3: Извлечено retweets по позиции: %s", value)
                         elif i == 2 and stats["likes"] == 0:
                             stats["likes"] = value
-                            debug_print(f"МЕТОД 3: Извлечено likes по позиции: {value}") # Используем debug_print
+                            logger.debug("МЕТОД 3: Извлечено likes по позиции: %s", value)
                         break
     except Exception as e:
-        debug_print(f"Ошибка в методе 3: {e}") # Используем debug_print
+        logger.debug("Ошибка в методе 3: %s", e)
 
     # МЕТОД 4: Изучение всех span-элементов в твите
     try:
@@ -681,7 +773,7 @@ def extract_tweet_stats(tweet_element):
             text = span.text.strip()
             if text and text.isdigit():
                 number_spans.append((span, int(text)))
-                debug_print(f"Найден span с числом: {text}") # Используем debug_print
+                logger.debug("Найден span с числом: %s", text)
 
         if len(number_spans) >= 3 and stats["replies"] == 0:
             y_positions = []
@@ -693,17 +785,17 @@ def extract_tweet_stats(tweet_element):
 
             if stats["replies"] == 0:
                 stats["replies"] = y_positions[0][1]
-                debug_print(f"МЕТОД 4: Извлечено replies по Y-позиции: {stats['replies']}") # Используем debug_print
+                logger.debug("МЕТОД 4: Извлечено replies по Y-позиции: %s", stats['replies'])
 
             if stats["retweets"] == 0 and len(y_positions) > 1:
                 stats["retweets"] = y_positions[1][1]
-                debug_print(f"МЕТОД 4: Извлечено retweets по Y-позиции: {stats['retweets']}") # Используем debug_print
+                logger.debug("МЕТОД 4: Извлечено retweets по Y-позиции: %s", stats['retweets'])
 
             if stats["likes"] == 0 and len(y_positions) > 2:
                 stats["likes"] = y_positions[2][1]
-                debug_print(f"МЕТОД 4: Извлечено likes по Y-позиции: {stats['likes']}") # Используем debug_print
+                logger.debug("МЕТОД 4: Извлечено likes по Y-позиции: %s", stats['likes'])
     except Exception as e:
-        debug_print(f"Ошибка в методе 4: {e}") # Используем debug_print
+        logger.debug("Ошибка в методе 4: %s", e)
 
-    debug_print(f"Итоговая статистика твита: {stats}") # Используем debug_print
+    logger.debug("Итоговая статистика твита: %s", stats)
     return stats
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль для локального кэша лент аккаунтов (вместо файлов twitter_cache/{username}_tweets_selenium.json).
+Одна база SQLite в режиме WAL: твиты с ключом (username, tweet_id) и индексом по времени
+публикации, поэтому чтение кэша - выборка за окно сбора, а не загрузка и фильтрация всего файла.
+Запись аккаунта - одна транзакция; твиты старше TIMELINE_CACHE_TTL_HOURS удаляются.
+Несколько потоков и процессов могут работать с базой одновременно.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from twitter_scraper_snapshot import extract_tweet_id
+from twitter_scraper_utils import get_tweet_time
+
+# Настройка логирования
+logger = logging.getLogger('twitter_scraper.timeline_cache')
+
+TIMELINE_CACHE_FILE = os.path.join("twitter_cache", "timelines.sqlite3")
+TIMELINE_CACHE_TTL_HOURS = 7 * 24  # Твиты с более старой датой публикации удаляются из кэша
+TIMELINE_CACHE_EVICT_EVERY = 50  # Удалять устаревшие твиты после каждых N записей аккаунтов
+TIMELINE_CACHE_BUSY_TIMEOUT = 30  # Ожидание блокировки записи другим процессом (сек)
+
+_connection = None
+_lock = threading.Lock()
+_writes_since_evict = 0
+
+
+def _get_connection():
+    """Открывает (один раз) базу кэша; вызывается под _lock"""
+    global _connection
+    if _connection is None:
+        cache_dir = os.path.dirname(TIMELINE_CACHE_FILE)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        connection = sqlite3.connect(TIMELINE_CACHE_FILE, timeout=TIMELINE_CACHE_BUSY_TIMEOUT,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                username TEXT PRIMARY KEY,
+                name TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS tweets (
+                username TEXT NOT NULL,
+                tweet_id INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (username, tweet_id)
+            ) WITHOUT ROWID
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_tweets_username_created ON tweets (username, created_at)")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_tweets_created ON tweets (created_at)")
+        connection.commit()
+        _connection = connection
+    return _connection
+
+
+def get_cached_timeline(username, since=None, limit=None):
+    """
+    Возвращает ленту аккаунта из кэша (выборка по индексу (username, created_at))
+
+    Args:
+        username: Имя пользователя Twitter
+        since: Время (unix) - только твиты, опубликованные не раньше; None - все
+        limit: Максимальное количество твитов (самые новые)
+
+    Returns:
+        dict: name, updated_at (unix-время последней записи) и tweets (от новых к старым)
+              или None, если аккаунта нет в кэше
+    """
+    key = username.lower()
+    try:
+        with _lock:
+            connection = _get_connection()
+            account = connection.execute(
+                "SELECT name, updated_at FROM accounts WHERE username = ?", (key,)
+            ).fetchone()
+            if account is None:
+                return None
+            rows = connection.execute(
+                "SELECT payload FROM tweets WHERE username = ? AND created_at >= ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (key, since if since is not None else 0, limit if limit is not None else -1)
+            ).fetchall()
+        return {"name": account[0], "updated_at": account[1], "tweets": [json.loads(row[0]) for row in rows]}
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning("Ошибка чтения кэша ленты @%s: %s", username, e)
+        return None
+
+
+def store_timeline(username, name, tweets):
+    """
+    Сохраняет твиты аккаунта в кэш одной транзакцией (твиты с тем же ID заменяются)
+
+    Args:
+        username: Имя пользователя Twitter
+        name: Отображаемое имя
+        tweets: Список словарей твитов
+
+    Returns:
+        bool: Сохранено ли
+    """
+    global _writes_since_evict
+    key = username.lower()
+    rows = []
+    for tweet in tweets:
+        tweet_id = extract_tweet_id(tweet.get("url"))
+        tweet_time = get_tweet_time(tweet)
+        if tweet_id and tweet_time:
+            rows.append((key, int(tweet_id), tweet_time.timestamp(), json.dumps(tweet, ensure_ascii=False)))
+
+    try:
+        with _lock:
+            connection = _get_connection()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO accounts (username, name, updated_at) VALUES (?, ?, ?)",
+                    (key, name, time.time())
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO tweets (username, tweet_id, created_at, payload) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                _writes_since_evict += 1
+                if _writes_since_evict >= TIMELINE_CACHE_EVICT_EVERY:
+                    _writes_since_evict = 0
+                    _evict(connection)
+        return True
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        logger.error("Ошибка записи кэша ленты @%s: %s", username, e)
+        return False
+
+
+def _evict(connection):
+    """Удаляет твиты старше TIMELINE_CACHE_TTL_HOURS; вызывается под _lock"""
+    cursor = connection.execute("DELETE FROM tweets WHERE created_at < ?",
+                                (time.time() - TIMELINE_CACHE_TTL_HOURS * 3600,))
+    if cursor.rowcount:
+        logger.info("Из кэша лент удалено %s устаревших твитов", cursor.rowcount)